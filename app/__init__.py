@@ -1,4 +1,5 @@
 import os
+import logging
 from flask import Flask
 from app.extensions import db, migrate, login_manager
 from config import config_by_name
@@ -10,6 +11,11 @@ def create_app(config_name=None):
     config_name = config_name or os.getenv("FLASK_CONFIG", "development")
     app.config.from_object(config_by_name[config_name])
 
+    # Los servicios registran con logging.getLogger(__name__), hijos de app.logger:
+    # hilos de fondo y procesos largos salen por su handler con nivel y traza (INFO también fuera de debug)
+    if app.logger.level == logging.NOTSET:
+        app.logger.setLevel(logging.INFO)
+
     # Inicializar extensiones
     db.init_app(app)
     migrate.init_app(app, db)
@@ -25,9 +31,39 @@ def create_app(config_name=None):
         from app.models import (
             Usuario, Estudiante, Curso, Inscripcion, 
             Asistencia, Evaluacion, Nota, 
-            SeguimientoRiesgo, Intervencion, Ciclo, Reporte
+            SeguimientoRiesgo, Intervencion, Ciclo, Reporte, VersionDatos,
+            ResumenSemestre, CuboRiesgo, SincronizacionAsistencia, MapaAsistencia,
+            AsistenciaSemanal, RachaAusencias, RiesgoActual
         )
     
+    # Eventos de escritura: versiones de datos por semestre
+    from app.services.version_datos import registrar_eventos_version
+    registrar_eventos_version()
+    
+    # Resumen por semestre mantenido en cada escritura
+    from app.services.resumen import registrar_eventos_resumen
+    registrar_eventos_resumen()
+    
+    # Mapas de bits de asistencia por inscripción
+    from app.services.mapa_asistencia import registrar_eventos_mapas
+    registrar_eventos_mapas()
+    
+    # Totales semanales de asistencia por inscripción
+    from app.services.asistencia_semanal import registrar_eventos_semanas
+    registrar_eventos_semanas()
+    
+    # Invalidación de la caché de agregados al confirmar escrituras
+    from app.services.cache import registrar_eventos_cache
+    registrar_eventos_cache()
+    
+    # Aviso de consultas N+1 disparadas desde las plantillas (debug)
+    from app.services.cargas_perezosas import registrar_guardia_cargas
+    registrar_guardia_cargas(app)
+    
+    # Marcas de asistencia que quedaron en el buffer local si el proceso cayó (solo en el proceso web)
+    from app.services.buffer_asistencias import reanudar_con_primera_peticion
+    reanudar_con_primera_peticion(app)
+    
     # Configurar user_loader
     @login_manager.user_loader
     def load_user(user_id):
@@ -84,6 +120,10 @@ def create_app(config_name=None):
     from app.modules.asistencias import asistencias_bp
     app.register_blueprint(asistencias_bp)
     
+    # Comandos de consola (flask precalcular-reportes, ...)
+    from app.commands import registrar_comandos
+    registrar_comandos(app)
+    
   
   
     
@@ -0,0 +1,39 @@
+# app/campos.py
+"""
+Campos de formulario compartidos entre módulos.
+"""
+from flask import url_for
+from wtforms import SelectField
+from wtforms.validators import ValidationError
+
+
+class SeleccionRemotaField(SelectField):
+    """
+    Select cuyas opciones se buscan en el servidor mientras se escribe
+    (ver static/base/busqueda_remota.js). Solo se renderiza la opción
+    seleccionada y el valor enviado se valida con una única consulta, en
+    lugar de cargar todas las opciones en cada GET y POST.
+
+    `opciones(termino=None, limite=20, ids=None)` devuelve [(id, etiqueta)];
+    `endpoint` es la ruta JSON de sugerencias.
+    """
+
+    def __init__(self, label=None, validators=None, opciones=None, endpoint=None, **kwargs):
+        kwargs.setdefault('coerce', int)
+        super().__init__(label, validators, validate_choice=False, **kwargs)
+        self.opciones = opciones
+        self.endpoint = endpoint
+
+    def _opcion_actual(self):
+        if self.data in (None, ''):
+            return []
+        return self.opciones(ids=[self.data])
+
+    def __call__(self, **kwargs):
+        self.choices = self._opcion_actual()
+        kwargs.setdefault('data-busqueda-url', url_for(self.endpoint))
+        return super().__call__(**kwargs)
+
+    def pre_validate(self, form):
+        if self.data is not None and not self._opcion_actual():
+            raise ValidationError('Seleccione una opción válida de la lista.')
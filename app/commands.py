@@ -0,0 +1,197 @@
+# app/commands.py
+"""
+Comandos de consola (flask <comando>).
+
+Ejemplo de cron para precalcular los reportes cada noche:
+    0 2 * * * cd /ruta/proyecto && FLASK_APP=app.py flask precalcular-reportes
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+@click.command('precalcular-reportes')
+@click.option('--semestre', 'semestres', multiple=True,
+              help='Semestre a precalcular (repetible). Por defecto, el semestre actual.')
+@click.option('--categoria', 'categorias', multiple=True,
+              help='Categoría del filtro (repetible). Por defecto, PRECALCULO_CATEGORIAS.')
+@click.option('--programar', is_flag=True,
+              help='No termina: repite el precálculo cada día a PRECALCULO_HORA.')
+@click.option('--hora', default=None, help='Hora del precálculo programado (HH:MM).')
+@with_appcontext
+def precalcular_reportes_cmd(semestres, categorias, programar, hora):
+    """Genera los reportes estándar para servirlos ya calculados."""
+    from app.services.precalculo import precalcular_reportes, ejecutar_programado
+
+    app = current_app._get_current_object()
+
+    if programar:
+        ejecutar_programado(app, hora, list(semestres) or None)
+        return
+
+    with app.test_request_context(base_url=app.config.get('URL_BASE')):
+        resumen = precalcular_reportes(list(semestres) or None, list(categorias) or None)
+
+    for semestre, categoria, estado in resumen:
+        click.echo(f"{semestre} {categoria}: {estado}")
+
+
+@click.command('reconstruir-resumen')
+@with_appcontext
+def reconstruir_resumen_cmd():
+    """Recalcula desde cero la tabla resumen_semestre."""
+    from app.extensions import db
+    from app.services.resumen import reconstruir_resumen
+
+    try:
+        claves = reconstruir_resumen()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Resumen reconstruido: {', '.join(claves)}")
+
+
+@click.command('refrescar-cubo')
+@click.option('--semestre', 'semestres', multiple=True, required=True, help='Semestre a refrescar (repetible).')
+@with_appcontext
+def refrescar_cubo_cmd(semestres):
+    """Recalcula el cubo de riesgo (semestre x curso x categoría)."""
+    from app.extensions import db
+    from app.services.cubo_riesgo import refrescar_cubo
+    from app.services.version_datos import incrementar_version
+
+    try:
+        for semestre in semestres:
+            celdas = refrescar_cubo(semestre)
+            click.echo(f"{semestre}: {celdas} celdas")
+        # El ETag de /seguimiento/api/cubo sale de la versión de datos
+        incrementar_version(semestres)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+@click.command('preparar-busqueda')
+@with_appcontext
+def preparar_busqueda_cmd():
+    """Crea o reconstruye los índices de búsqueda (pg_trgm en PostgreSQL, FTS5 en SQLite)."""
+    from app.extensions import db
+    from app.services.busqueda import preparar_busqueda
+
+    try:
+        motor = preparar_busqueda()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Índices de búsqueda listos ({motor}). Reinicia la aplicación para que los use.")
+
+
+@click.command('depurar-duplicados')
+@click.option('--simular', is_flag=True, help='Solo informa cuántas filas se eliminarían.')
+@with_appcontext
+def depurar_duplicados_cmd(simular):
+    """Elimina inscripciones, asistencias y notas duplicadas (la migración 0003 hace lo mismo antes de crear las restricciones únicas)."""
+    from app.extensions import db
+    from app.services.depuracion import depurar_duplicados
+
+    try:
+        eliminadas = depurar_duplicados()
+        if simular:
+            db.session.rollback()
+        else:
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    for tabla, cantidad in eliminadas.items():
+        click.echo(f"{tabla}: {cantidad} {'se eliminarían' if simular else 'eliminadas'}")
+
+
+@click.command('reconstruir-mapas-asistencia')
+@with_appcontext
+def reconstruir_mapas_asistencia_cmd():
+    """Recalcula desde cero los mapas de bits de asistencia por inscripción."""
+    from app.extensions import db
+    from app.services.mapa_asistencia import reconstruir_mapas
+
+    try:
+        cantidad = reconstruir_mapas()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Mapas de asistencia reconstruidos: {cantidad} inscripciones")
+
+
+@click.command('reconstruir-asistencia-semanal')
+@with_appcontext
+def reconstruir_asistencia_semanal_cmd():
+    """Recalcula desde cero los totales semanales de asistencia."""
+    from app.extensions import db
+    from app.services.asistencia_semanal import reconstruir_semanas
+
+    try:
+        cantidad = reconstruir_semanas()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Asistencia semanal reconstruida: {cantidad} inscripciones")
+
+
+@click.command('refrescar-rachas')
+@click.option('--semestre', 'semestres', multiple=True, help='Semestre a refrescar (repetible). Por defecto, todos.')
+@with_appcontext
+def refrescar_rachas_cmd(semestres):
+    """Recalcula las rachas de ausencias injustificadas por inscripción."""
+    from app.extensions import db
+    from app.services.rachas import refrescar_rachas
+
+    try:
+        for semestre in semestres or [None]:
+            filas = refrescar_rachas(semestre)
+            click.echo(f"{semestre or 'Todos los semestres'}: {filas} inscripciones")
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+@click.command('refrescar-riesgo-actual')
+@click.option('--semestre', default=None, help='Semestre activo. Por defecto, el de la configuración del sistema.')
+@with_appcontext
+def refrescar_riesgo_actual_cmd(semestre):
+    """Reconstruye la proyección del riesgo actual (un seguimiento por estudiante)."""
+    from app.extensions import db
+    from app.modules.admin.routes import cargar_configuracion
+    from app.services.riesgo_actual import refrescar_riesgo_actual
+
+    semestre = semestre or cargar_configuracion()['semestre_actual']
+    try:
+        filas = refrescar_riesgo_actual(semestre)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f"Riesgo actual de {semestre}: {filas} estudiantes")
+
+
+def registrar_comandos(app):
+    app.cli.add_command(precalcular_reportes_cmd)
+    app.cli.add_command(reconstruir_resumen_cmd)
+    app.cli.add_command(refrescar_cubo_cmd)
+    app.cli.add_command(preparar_busqueda_cmd)
+    app.cli.add_command(depurar_duplicados_cmd)
+    app.cli.add_command(reconstruir_mapas_asistencia_cmd)
+    app.cli.add_command(reconstruir_asistencia_semanal_cmd)
+    app.cli.add_command(refrescar_rachas_cmd)
+    app.cli.add_command(refrescar_riesgo_actual_cmd)
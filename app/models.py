@@ -48,7 +48,7 @@ class Curso(db.Model):
     codigo_curso = db.Column(db.String(20), unique=True, nullable=False)
     nombre_curso = db.Column(db.String(100), nullable=False)
     creditos = db.Column(db.Integer, default=3)
-    semestre = db.Column(db.String(10), nullable=False)
+    semestre = db.Column(db.String(10), nullable=False, index=True)
     ciclo_id = db.Column(db.Integer, db.ForeignKey('ciclos.id'), nullable=False)
     activo = db.Column(db.Boolean, default=True)
     
@@ -72,6 +72,12 @@ class Inscripcion(db.Model):
     asistencias = db.relationship('Asistencia', backref='inscripcion', lazy=True)
     notas = db.relationship('Nota', backref='inscripcion', lazy=True)
     
+    # Una inscripción por estudiante y curso (el índice único sirve también las búsquedas por estudiante)
+    __table_args__ = (
+        db.UniqueConstraint('estudiante_id', 'curso_id', name='uq_inscripcion_estudiante_curso'),
+        db.Index('ix_inscripciones_curso_estado', 'curso_id', 'estado'),
+    )
+    
     def __repr__(self):
         return f'<Inscripcion Estudiante:{self.estudiante_id} Curso:{self.curso_id}>'
 
@@ -85,6 +91,12 @@ class Asistencia(db.Model):
     justificado = db.Column(db.Boolean, default=False)
     observaciones = db.Column(db.Text)
     
+    # Una asistencia por inscripción y fecha
+    __table_args__ = (
+        db.UniqueConstraint('inscripcion_id', 'fecha', name='uq_asistencia_inscripcion_fecha'),
+        db.Index('ix_asistencias_fecha', 'fecha'),
+    )
+    
     def __repr__(self):
         return f'<Asistencia {self.fecha} - Presente: {self.presente}>'
 
@@ -92,7 +104,7 @@ class Evaluacion(db.Model):
     __tablename__ = 'evaluaciones'
     
     id = db.Column(db.Integer, primary_key=True)
-    curso_id = db.Column(db.Integer, db.ForeignKey('cursos.id'), nullable=False)
+    curso_id = db.Column(db.Integer, db.ForeignKey('cursos.id'), nullable=False, index=True)
     nombre_evaluacion = db.Column(db.String(100), nullable=False)
     tipo_evaluacion = db.Column(db.String(50))
     peso = db.Column(db.Numeric(5, 2), default=100.0)
@@ -114,6 +126,12 @@ class Nota(db.Model):
     fecha_registro = db.Column(db.Date, default=datetime.utcnow)
     observaciones = db.Column(db.Text)
     
+    # Una nota por inscripción y evaluación
+    __table_args__ = (
+        db.UniqueConstraint('inscripcion_id', 'evaluacion_id', name='uq_nota_inscripcion_evaluacion'),
+        db.Index('ix_notas_evaluacion', 'evaluacion_id'),
+    )
+    
     def __repr__(self):
         return f'<Nota {self.nota}>'
 
@@ -129,6 +147,13 @@ class SeguimientoRiesgo(db.Model):
     factores_riesgo = db.Column(db.JSON)
     observaciones = db.Column(db.Text)
     
+    __table_args__ = (
+        # Último seguimiento de un estudiante en un semestre
+        db.Index('ix_seguimiento_estudiante_semestre', 'estudiante_id', 'semestre', 'fecha_evaluacion'),
+        # Listados y reportes por semestre y categoría
+        db.Index('ix_seguimiento_semestre_categoria', 'semestre', 'categoria_riesgo'),
+    )
+    
     def __repr__(self):
         return f'<SeguimientoRiesgo {self.estudiante_id} - {self.categoria_riesgo}>'
 
@@ -170,12 +195,136 @@ class Reporte(db.Model):
     descripcion = db.Column(db.Text)
     parametros = db.Column(db.JSON)  # Parámetros usados para generar el reporte
     contenido = db.Column(db.Text)   # HTML/JSON del reporte generado
-    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=True)  # NULL si lo generó el sistema
     fecha_generacion = db.Column(db.DateTime, default=datetime.utcnow)
     archivo_path = db.Column(db.String(500))  # Ruta del archivo PDF generado
+    semestre = db.Column(db.String(10))
+    huella = db.Column(db.String(64), index=True)  # Hash de tipo + parámetros
+    version_datos = db.Column(db.Integer)          # Versión de datos del semestre al generar
+    generado_por_sistema = db.Column(db.Boolean, default=False)  # Precálculo programado
     
     # Relación
     usuario = db.relationship('Usuario', backref='reportes')
     
     def __repr__(self):
-        return f'<Reporte {self.tipo_reporte} - {self.fecha_generacion}>'
\ No newline at end of file
+        return f'<Reporte {self.tipo_reporte} - {self.fecha_generacion}>'
+
+class VersionDatos(db.Model):
+    __tablename__ = 'versiones_datos'
+    
+    clave = db.Column(db.String(20), primary_key=True)  # Semestre, ej: "2025-1"
+    version = db.Column(db.Integer, nullable=False, default=0)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<VersionDatos {self.clave}: v{self.version}>'
+
+class ResumenSemestre(db.Model):
+    __tablename__ = 'resumen_semestre'
+    
+    # Semestre (ej: "2025-1") o "TOTAL" para la fila global.
+    # estudiantes_activos y notas solo se llevan en la fila TOTAL.
+    clave = db.Column(db.String(20), primary_key=True)
+    estudiantes_activos = db.Column(db.Integer, nullable=False, default=0)
+    cursos_activos = db.Column(db.Integer, nullable=False, default=0)
+    notas = db.Column(db.Integer, nullable=False, default=0)
+    riesgo_sin_riesgo = db.Column(db.Integer, nullable=False, default=0)
+    riesgo_alerta_amarilla = db.Column(db.Integer, nullable=False, default=0)
+    riesgo_alerta_roja = db.Column(db.Integer, nullable=False, default=0)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ResumenSemestre {self.clave}>'
+
+class CuboRiesgo(db.Model):
+    __tablename__ = 'cubo_riesgo'
+    
+    # Conteos precalculados por (semestre, curso, categoría); se refresca tras cada cálculo de riesgo
+    id = db.Column(db.Integer, primary_key=True)
+    semestre = db.Column(db.String(10), nullable=False, index=True)
+    curso_id = db.Column(db.Integer, db.ForeignKey('cursos.id'), nullable=False)
+    categoria_riesgo = db.Column(db.String(20), nullable=False)
+    estudiantes = db.Column(db.Integer, nullable=False, default=0)
+    puntaje_suma = db.Column(db.Numeric(12, 2), nullable=False, default=0)  # Para promediar al agregar
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('semestre', 'curso_id', 'categoria_riesgo', name='uq_cubo_riesgo_celda'),
+    )
+    
+    def __repr__(self):
+        return f'<CuboRiesgo {self.semestre} curso:{self.curso_id} {self.categoria_riesgo}>'
+
+class SincronizacionAsistencia(db.Model):
+    __tablename__ = 'sincronizaciones_asistencia'
+    
+    # Clave de idempotencia generada por el cliente para cada registro de asistencia enviado
+    clave = db.Column(db.String(64), primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuarios.id'), nullable=False)
+    inscripcion_id = db.Column(db.Integer, db.ForeignKey('inscripciones.id'), nullable=False)
+    fecha = db.Column(db.Date, nullable=False)
+    fecha_registro = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<SincronizacionAsistencia {self.clave}>'
+
+class MapaAsistencia(db.Model):
+    __tablename__ = 'mapas_asistencia'
+    
+    # Asistencia de una inscripción en bits: el bit i corresponde al día fecha_base + i.
+    # Se recalcula en cada escritura de asistencias (ver services/mapa_asistencia.py).
+    inscripcion_id = db.Column(db.Integer, primary_key=True)
+    fecha_base = db.Column(db.Date, nullable=False)
+    registrado = db.Column(db.LargeBinary, nullable=False)   # Días con registro (clases dictadas)
+    presente = db.Column(db.LargeBinary, nullable=False)
+    justificado = db.Column(db.LargeBinary, nullable=False)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<MapaAsistencia inscripcion:{self.inscripcion_id}>'
+
+class AsistenciaSemanal(db.Model):
+    __tablename__ = 'asistencia_semanal'
+    
+    # Totales de asistencia por inscripción y semana (lunes); se recalculan en cada escritura
+    inscripcion_id = db.Column(db.Integer, primary_key=True)
+    semana = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    presentes = db.Column(db.Integer, nullable=False, default=0)
+    justificadas = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<AsistenciaSemanal inscripcion:{self.inscripcion_id} {self.semana}>'
+
+class RachaAusencias(db.Model):
+    __tablename__ = 'rachas_ausencias'
+    
+    # Ausencias injustificadas consecutivas por inscripción (se guardan en cada escritura de asistencias)
+    inscripcion_id = db.Column(db.Integer, primary_key=True)
+    racha_actual = db.Column(db.Integer, nullable=False, default=0, index=True)
+    racha_maxima = db.Column(db.Integer, nullable=False, default=0)
+    inicio_racha = db.Column(db.Date)  # Primera ausencia de la racha actual
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RachaAusencias inscripcion:{self.inscripcion_id} actual:{self.racha_actual}>'
+
+class RiesgoActual(db.Model):
+    __tablename__ = 'riesgo_actual'
+    
+    # Último seguimiento de cada estudiante en el semestre activo; lo reemplaza cada cálculo de riesgo
+    estudiante_id = db.Column(db.Integer, db.ForeignKey('estudiantes.id'), primary_key=True)
+    semestre = db.Column(db.String(10), nullable=False)
+    seguimiento_id = db.Column(db.Integer, nullable=False)
+    categoria_riesgo = db.Column(db.String(20), nullable=False)
+    puntaje_riesgo = db.Column(db.Numeric(5, 2), nullable=False, default=0)
+    fecha_evaluacion = db.Column(db.Date)
+    fecha_actualizacion = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Listado de estudiantes en riesgo: rango por categoría ya ordenado por puntaje (y estudiante, para paginar estable)
+        db.Index('ix_riesgo_actual_categoria_puntaje', categoria_riesgo, puntaje_riesgo.desc(), estudiante_id),
+    )
+    
+    def __repr__(self):
+        return f'<RiesgoActual {self.estudiante_id} - {self.categoria_riesgo}>'
@@ -5,6 +5,7 @@ from werkzeug.security import generate_password_hash
 from . import admin_bp
 from app.models import Usuario
 from app.extensions import db
+from app.services.riesgo_actual import refrescar_riesgo_actual
 import json
 import os
 import re
@@ -47,6 +48,20 @@ def guardar_configuracion(config):
         print(f"❌ Error guardando configuración: {e}")
         return False
 
+def guardar_con_riesgo_actual(config, semestre_anterior):
+    """
+    Guarda la configuración. Si cambió el semestre activo, primero reemplaza la
+    proyección del riesgo actual: si eso falla el archivo no se toca, y la
+    proyección solo se confirma si el archivo se escribió.
+    """
+    cambia = config['semestre_actual'] != semestre_anterior
+    if cambia:
+        refrescar_riesgo_actual(config['semestre_actual'])
+    if not guardar_configuracion(config):
+        raise RuntimeError('No se pudo escribir config_sistema.json')
+    if cambia:
+        db.session.commit()
+
 def cargar_configuracion():
     """Cargar configuración desde archivo o usar valores por defecto"""
     try:
@@ -157,12 +172,14 @@ def configuracion():
             if abs(total_pesos - 1.0) > 0.01:
                 flash('Los pesos de los factores deben sumar exactamente 1.0', 'danger')
             else:
-                guardar_configuracion(nueva_config)
+                # El listado de estudiantes en riesgo pasa al nuevo semestre activo
+                guardar_con_riesgo_actual(nueva_config, config.get('semestre_actual'))
                 flash('Configuración actualizada exitosamente', 'success')
                 
         except ValueError as e:
             flash('Error en los valores ingresados. Verifique que sean números válidos.', 'danger')
         except Exception as e:
+            db.session.rollback()
             flash(f'Error al guardar la configuración: {str(e)}', 'danger')
         
         return redirect(url_for('admin.configuracion'))
@@ -192,14 +209,16 @@ def cambiar_semestre():
         config = cargar_configuracion()
         
         # Actualizar solo el semestre
+        semestre_anterior = config.get('semestre_actual')
         config['semestre_actual'] = nuevo_semestre
         
-        # Guardar configuración actualizada
-        guardar_configuracion(config)
+        # Guardar configuración actualizada (el listado de estudiantes en riesgo pasa al nuevo semestre activo)
+        guardar_con_riesgo_actual(config, semestre_anterior)
         
         flash(f'Semestre cambiado exitosamente a {nuevo_semestre}', 'success')
         
     except Exception as e:
+        db.session.rollback()
         flash(f'Error al cambiar semestre: {str(e)}', 'danger')
     
     return redirect(url_for('admin.configuracion'))
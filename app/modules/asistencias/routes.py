@@ -1,21 +1,39 @@
 # app/modules/asistencias/routes.py
-from flask import render_template, request, jsonify, flash, redirect, url_for
+from flask import render_template, request, jsonify, flash, redirect, url_for, current_app
 from flask_login import login_required, current_user
 from . import asistencias_bp
-from app.models import Asistencia, Inscripcion, Estudiante, Curso
+from app.models import Asistencia, Inscripcion, Estudiante, Curso, AsistenciaSemanal
 from app.extensions import db
+from sqlalchemy.orm import contains_eager, joinedload
+from app.services.streaming import renderizar_en_streaming
+from app.services.paginacion import paginar_keyset
+from app.services.upsert import upsert
+from app.services.sincronizacion import sincronizar_asistencias, validar_registro, LoteInvalido
+from app.services.buffer_asistencias import obtener_buffer
+from app.services.asistencia_semanal import columnas_totales, completar_totales
+from app.services.escrituras_asistencia import despues_de_escribir_asistencias
+from sqlalchemy.exc import IntegrityError
 from .forms import AsistenciaForm, AsistenciaMasivaForm
 from datetime import datetime
+from itertools import islice
+
+TAMANO_LOTE_ESTADISTICAS = 500
 
 @asistencias_bp.route('/')
 @login_required
 def index():
     """Lista de todas las asistencias"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    contar = request.args.get('contar') == '1'
     per_page = 10
 
-    # Query base con joins
-    asistencias_query = Asistencia.query.join(Inscripcion).join(Estudiante).join(Curso)
+    # Query base con joins (explícitos: el orden de la paginación usa columnas de Curso y Estudiante)
+    asistencias_query = Asistencia.query.join(Asistencia.inscripcion).join(Inscripcion.estudiante).join(Inscripcion.curso)
+    # La plantilla recorre inscripcion.estudiante/curso: se llenan con los mismos joins
+    asistencias_query = asistencias_query.options(
+        contains_eager(Asistencia.inscripcion).contains_eager(Inscripcion.estudiante),
+        contains_eager(Asistencia.inscripcion).contains_eager(Inscripcion.curso)
+    )
 
     # Filtros
     estudiante_id = request.args.get('estudiante_id', type=int)
@@ -35,9 +53,12 @@ def index():
         elif estado_asistencia == 'AUSENTE':
             asistencias_query = asistencias_query.filter(Asistencia.presente == False)
 
-    asistencias = asistencias_query.order_by(
-        Asistencia.fecha.desc(), Curso.nombre_curso, Estudiante.apellidos
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Paginación por cursor: mismo orden que antes más el id como desempate
+    asistencias = paginar_keyset(
+        asistencias_query,
+        [(Asistencia.fecha, True), (Curso.nombre_curso, False), (Estudiante.apellidos, False), (Asistencia.id, False)],
+        cursor=cursor, por_pagina=per_page, contar=contar
+    )
 
     # Para los filtros
     estudiantes = Estudiante.query.filter_by(activo=True).order_by('apellidos').all()
@@ -129,46 +150,30 @@ def procesar_masiva():
         fecha_str = request.form.get('fecha')
         fecha = datetime.strptime(fecha_str, '%Y-%m-%d').date()
         
-        # Obtener todas las inscripciones del curso
-        inscripciones = Inscripcion.query.filter_by(
+        # Ids de las inscripciones activas del curso (solo la columna)
+        inscripcion_ids = [fila.id for fila in db.session.query(Inscripcion.id).filter_by(
             curso_id=curso_id,
             estado='ACTIVO'
-        ).all()
+        )]
         
-        registros_procesados = 0
+        filas = [{
+            'inscripcion_id': inscripcion_id,
+            'fecha': fecha,
+            'presente': request.form.get(f'presente_{inscripcion_id}') == 'on',
+            'justificado': request.form.get(f'justificado_{inscripcion_id}') == 'on',
+            'observaciones': request.form.get(f'observaciones_{inscripcion_id}', '') or None
+        } for inscripcion_id in inscripcion_ids]
         
-        for inscripcion in inscripciones:
-            # Verificar si ya existe registro para esta fecha
-            asistencia_existente = Asistencia.query.filter_by(
-                inscripcion_id=inscripcion.id,
-                fecha=fecha
-            ).first()
-            
-            if asistencia_existente:
-                # Actualizar registro existente
-                presente = request.form.get(f'presente_{inscripcion.id}') == 'on'
-                justificado = request.form.get(f'justificado_{inscripcion.id}') == 'on'
-                observaciones = request.form.get(f'observaciones_{inscripcion.id}', '')
-                
-                asistencia_existente.presente = presente
-                asistencia_existente.justificado = justificado
-                asistencia_existente.observaciones = observaciones
-                registros_procesados += 1
-            else:
-                # Crear nuevo registro
-                presente = request.form.get(f'presente_{inscripcion.id}') == 'on'
-                justificado = request.form.get(f'justificado_{inscripcion.id}') == 'on'
-                observaciones = request.form.get(f'observaciones_{inscripcion.id}', '')
-                
-                nueva_asistencia = Asistencia(
-                    inscripcion_id=inscripcion.id,
-                    fecha=fecha,
-                    presente=presente,
-                    justificado=justificado,
-                    observaciones=observaciones or None
-                )
-                db.session.add(nueva_asistencia)
-                registros_procesados += 1
+        # Un solo INSERT ... ON CONFLICT (inscripcion_id, fecha) DO UPDATE para todo el curso
+        registros_procesados = upsert(
+            Asistencia, filas,
+            claves=('inscripcion_id', 'fecha'),
+            actualizar=('presente', 'justificado', 'observaciones')
+        )
+        
+        # El upsert no pasa por el ORM
+        if registros_procesados:
+            despues_de_escribir_asistencias(inscripcion_ids)
         
         db.session.commit()
         flash(f'Asistencias procesadas exitosamente: {registros_procesados} registros', 'success')
@@ -179,11 +184,73 @@ def procesar_masiva():
     
     return redirect(url_for('asistencias.index'))
 
+@asistencias_bp.route('/api/sincronizar', methods=['POST'])
+@login_required
+def api_sincronizar():
+    """
+    Sincroniza asistencias tomadas sin conexión (JSON):
+    {"registros": [{"clave", "inscripcion_id", "fecha", "presente", "justificado", "observaciones"}]}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Se esperaba un cuerpo JSON'}), 400
+
+    # Un reintento: si otra petición confirmó las mismas claves a la vez, la
+    # segunda pasada las ve como duplicadas
+    for intento in range(2):
+        try:
+            resultados = sincronizar_asistencias(data.get('registros'), current_user.id)
+            db.session.commit()
+            break
+        except LoteInvalido as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        except IntegrityError:
+            db.session.rollback()
+            if intento == 1:
+                return jsonify({'error': 'Conflicto al guardar, reintente la sincronización'}), 409
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+
+    return jsonify({
+        'resultados': resultados,
+        'aplicados': sum(1 for r in resultados if r['estado'] == 'aplicado')
+    })
+
+@asistencias_bp.route('/api/marcar', methods=['POST'])
+@login_required
+def api_marcar():
+    """
+    Marca de asistencia individual con escritura diferida (JSON):
+    {"inscripcion_id", "fecha" (hoy por defecto), "presente", "justificado", "observaciones"}.
+    Se guarda en el buffer local y se escribe en la base en unos segundos.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Se esperaba un cuerpo JSON'}), 400
+
+    marca, error = validar_registro({'presente': True, 'fecha': datetime.now().date().isoformat(), **data})
+    if error:
+        return jsonify({'error': error}), 400
+    
+    # El vaciador descartaría la marca en silencio: se rechaza aquí (una lectura por clave primaria)
+    activa = db.session.query(Inscripcion.id).filter_by(id=marca['inscripcion_id'], estado='ACTIVO').scalar()
+    if activa is None:
+        return jsonify({'error': 'La inscripción no existe o no está activa'}), 404
+
+    app = current_app._get_current_object()
+    marca_id = obtener_buffer(app).agregar(marca, app)
+    return jsonify({'estado': 'recibido', 'id': marca_id}), 202
+
 @asistencias_bp.route('/<int:asistencia_id>')
 @login_required
 def detalle(asistencia_id):
     """Detalle de una asistencia específica"""
-    asistencia = Asistencia.query.get_or_404(asistencia_id)
+    asistencia = Asistencia.query.options(
+        joinedload(Asistencia.inscripcion).joinedload(Inscripcion.estudiante),
+        joinedload(Asistencia.inscripcion).joinedload(Inscripcion.curso)
+    ).filter_by(id=asistencia_id).first_or_404()
     
     return render_template('asistencias/detalle.html', asistencia=asistencia)
 
@@ -243,6 +310,25 @@ def eliminar(asistencia_id):
     
     return redirect(url_for('asistencias.index'))
 
+def _fila_estadistica(stat, total_clases, asistencias, justificadas):
+    """Fila de la tabla de estadísticas con sus porcentajes"""
+    if total_clases > 0:
+        porcentaje_asistencia = (asistencias / total_clases) * 100
+        porcentaje_efectiva = ((asistencias - justificadas) / total_clases) * 100
+    else:
+        porcentaje_asistencia = 0
+        porcentaje_efectiva = 0
+
+    return {
+        'curso': stat.nombre_curso,
+        'estudiante': f"{stat.nombres} {stat.apellidos}",
+        'total_clases': total_clases,
+        'asistencias': asistencias,
+        'justificadas': justificadas,
+        'porcentaje_asistencia': porcentaje_asistencia,
+        'porcentaje_efectiva': porcentaje_efectiva
+    }
+
 @asistencias_bp.route('/estadisticas')
 @login_required
 def estadisticas():
@@ -252,17 +338,16 @@ def estadisticas():
     estudiante_id = request.args.get('estudiante_id', type=int)
     semestre = request.args.get('semestre', '')
     
-    # Query base para estadísticas
+    # Una fila por inscripción, sumando sus totales semanales (unas 20 filas por inscripción)
     query = db.session.query(
-        Inscripcion.curso_id,
+        Inscripcion.id,
         Curso.nombre_curso,
-        Inscripcion.estudiante_id,
         Estudiante.nombres,
         Estudiante.apellidos,
-        db.func.count(Asistencia.id).label('total_clases'),
-        db.func.sum(db.cast(Asistencia.presente, db.Integer)).label('asistencias'),
-        db.func.sum(db.cast(Asistencia.justificado, db.Integer)).label('justificadas')
-    ).join(Curso).join(Estudiante).join(Asistencia, isouter=True)
+        *columnas_totales()
+    ).join(Inscripcion.curso).join(Inscripcion.estudiante).outerjoin(
+        AsistenciaSemanal, AsistenciaSemanal.inscripcion_id == Inscripcion.id
+    )
     
     # Aplicar filtros
     if curso_id:
@@ -272,42 +357,32 @@ def estadisticas():
     if semestre:
         query = query.filter(Curso.semestre == semestre)
     
-    estadisticas = query.group_by(
-        Inscripcion.curso_id, Curso.nombre_curso, 
-        Inscripcion.estudiante_id, Estudiante.nombres, Estudiante.apellidos
-    ).all()
+    query = query.group_by(
+        Inscripcion.id, Curso.nombre_curso, Estudiante.nombres, Estudiante.apellidos
+    ).order_by(Curso.nombre_curso, Estudiante.apellidos, Inscripcion.id)
     
-    # Calcular porcentajes
-    estadisticas_con_porcentajes = []
-    for stat in estadisticas:
-        total_clases = stat.total_clases or 0
-        asistencias = stat.asistencias or 0
-        justificadas = stat.justificadas or 0
-        
-        if total_clases > 0:
-            porcentaje_asistencia = (asistencias / total_clases) * 100
-            porcentaje_efectiva = ((asistencias - justificadas) / total_clases) * 100
-        else:
-            porcentaje_asistencia = 0
-            porcentaje_efectiva = 0
-        
-        estadisticas_con_porcentajes.append({
-            'curso': stat.nombre_curso,
-            'estudiante': f"{stat.nombres} {stat.apellidos}",
-            'total_clases': total_clases,
-            'asistencias': asistencias,
-            'justificadas': justificadas,
-            'porcentaje_asistencia': porcentaje_asistencia,
-            'porcentaje_efectiva': porcentaje_efectiva
-        })
+    def estadisticas_con_porcentajes():
+        """Filas con porcentajes, leídas por lotes desde un cursor del servidor"""
+        filas = iter(query.yield_per(TAMANO_LOTE_ESTADISTICAS))
+        while True:
+            lote = list(islice(filas, TAMANO_LOTE_ESTADISTICAS))
+            if not lote:
+                break
+            # Inscripciones sin totales semanales: una consulta por lote sobre asistencias
+            totales = completar_totales({
+                stat.id: (stat.total_clases, stat.asistencias, stat.justificadas) for stat in lote
+            })
+            for stat in lote:
+                yield _fila_estadistica(stat, *totales[stat.id])
     
     # Para los filtros
     cursos = Curso.query.filter_by(activo=True).order_by('semestre', 'nombre_curso').all()
     estudiantes = Estudiante.query.filter_by(activo=True).order_by('apellidos').all()
     semestres = db.session.query(Curso.semestre).distinct().order_by(Curso.semestre.desc()).all()
     
-    return render_template('asistencias/estadisticas.html',
-                         estadisticas=estadisticas_con_porcentajes,
+    # La tabla se envía en streaming a medida que se recorren las filas
+    return renderizar_en_streaming('asistencias/estadisticas.html',
+                         estadisticas=estadisticas_con_porcentajes(),
                          cursos=cursos,
                          estudiantes=estudiantes,
                          semestres=semestres,
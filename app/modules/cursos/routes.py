@@ -4,6 +4,8 @@ from flask_login import login_required, current_user
 from . import cursos_bp
 from app.models import Curso, Inscripcion, Evaluacion,Estudiante
 from app.extensions import db
+from sqlalchemy.orm import contains_eager
+from app.services.busqueda import opciones_cursos, respuesta_sugerencias
 from .forms import CursoForm
 
 @cursos_bp.route('/')
@@ -35,6 +37,14 @@ def index():
                          cursos=cursos,
                          search=search)
 
+@cursos_bp.route('/api/buscar')
+@login_required
+def api_buscar():
+    """Sugerencias de cursos activos para los selects con búsqueda"""
+    termino = request.args.get('q', '')
+    limite = request.args.get('limite', 20, type=int)
+    return jsonify(respuesta_sugerencias(opciones_cursos(termino, limite)))
+
 @cursos_bp.route('/crear', methods=['GET', 'POST'])
 @login_required
 def crear():
@@ -85,8 +95,9 @@ def detalle(curso_id):
     inscripciones = (
         Inscripcion.query
         .filter_by(curso_id=curso_id)
-        .join(Inscripcion.estudiante)               
-        .order_by(Estudiante.apellidos)           
+        .join(Inscripcion.estudiante)
+        .options(contains_eager(Inscripcion.estudiante))
+        .order_by(Estudiante.apellidos)
         .all()
     )
     
@@ -1,50 +1,84 @@
 # app/modules/dashboard/routes.py
-from flask import render_template, jsonify
+from flask import render_template, jsonify, Response, current_app
 from flask_login import login_required, current_user
 from . import dashboard_bp
 from app.models import Estudiante, SeguimientoRiesgo, Curso, Inscripcion
 from app.extensions import db
+from app.services.cache import obtener_cacheado, cache
+from app.services.eventos import Difusor
+from app.services.condicional import con_etag
+from app.services.version_datos import obtener_version_global
+from app.services.resumen import leer_resumen, categorias_de, CLAVE_TOTAL
+
+
+def calcular_estadisticas():
+    """Agregados del dashboard, leídos de la fila TOTAL del resumen"""
+    total = leer_resumen()[CLAVE_TOTAL]
+    categorias = categorias_de(total)
+
+    return {
+        'categorias_riesgo': categorias,
+        'total_estudiantes': total['estudiantes_activos'],
+        'total_cursos_activos': total['cursos_activos'],
+        'estudiantes_riesgo': sum(
+            cantidad for categoria, cantidad in categorias.items() if categoria != 'SIN_RIESGO'
+        )
+    }
+
+
+TABLAS_ESTADISTICAS = (Estudiante.__tablename__, Curso.__tablename__, SeguimientoRiesgo.__tablename__)
+
+
+def obtener_estadisticas():
+    return obtener_cacheado('dashboard:estadisticas', calcular_estadisticas, tablas=TABLAS_ESTADISTICAS)
+
+
+# Un cálculo por cambio para todos los dashboards abiertos en este proceso; los
+# cambios de otros procesos se detectan por la versión global de datos
+difusor_estadisticas = Difusor(calcular_estadisticas, marca=obtener_version_global)
+cache.suscribir(TABLAS_ESTADISTICAS, difusor_estadisticas.despertar)
+
 
 @dashboard_bp.route('/')
 @dashboard_bp.route('/index')
 @login_required
 def index():
     """Panel principal del dashboard"""
-    # Estadísticas básicas (las mejoraremos después)
-    total_estudiantes = Estudiante.query.filter_by(activo=True).count()
-    total_cursos = Curso.query.filter_by(activo=True).count()
-    
-    # Estudiantes en riesgo (usaremos datos de prueba por ahora)
-    estudiantes_riesgo = SeguimientoRiesgo.query.filter(
-        SeguimientoRiesgo.categoria_riesgo != 'SIN_RIESGO'
-    ).count()
-    
+    estadisticas = obtener_estadisticas()
+
     return render_template('dashboard/index.html',
-                         total_estudiantes=total_estudiantes,
-                         total_cursos=total_cursos,
-                         estudiantes_riesgo=estudiantes_riesgo,
+                         total_estudiantes=estadisticas['total_estudiantes'],
+                         total_cursos=estadisticas['total_cursos_activos'],
+                         estudiantes_riesgo=estadisticas['estudiantes_riesgo'],
                          usuario_actual=current_user)
 
 @dashboard_bp.route('/estadisticas')
 @login_required
+@con_etag(lambda: obtener_version_global())
 def estadisticas():
     """Endpoint para estadísticas en JSON (para gráficos)"""
     try:
-        # Conteo por categoría de riesgo
-        categorias_riesgo = db.session.query(
-            SeguimientoRiesgo.categoria_riesgo,
-            db.func.count(SeguimientoRiesgo.id)
-        ).group_by(SeguimientoRiesgo.categoria_riesgo).all()
-        
-        estadisticas = {
-            'categorias_riesgo': {
-                categoria: cantidad for categoria, cantidad in categorias_riesgo
-            },
-            'total_estudiantes': Estudiante.query.filter_by(activo=True).count(),
-            'total_cursos_activos': Curso.query.filter_by(activo=True).count()
-        }
-        
-        return jsonify(estadisticas)
-    
+        estadisticas = obtener_estadisticas()
+
+        return jsonify({
+            'categorias_riesgo': estadisticas['categorias_riesgo'],
+            'total_estudiantes': estadisticas['total_estudiantes'],
+            'total_cursos_activos': estadisticas['total_cursos_activos']
+        })
+
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+
+@dashboard_bp.route('/stream')
+@login_required
+def stream():
+    """Estadísticas en vivo (Server-Sent Events): se envían solo cuando cambian"""
+    app = current_app._get_current_object()
+    difusor_estadisticas.intervalo = app.config.get('SSE_INTERVALO', 5)
+
+    return Response(
+        difusor_estadisticas.eventos(app, 'estadisticas'),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
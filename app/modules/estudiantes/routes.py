@@ -2,16 +2,20 @@
 from flask import render_template, request, jsonify, flash, redirect, url_for
 from flask_login import login_required, current_user
 from . import estudiantes_bp
-from app.models import Estudiante, SeguimientoRiesgo
+from app.models import Estudiante, SeguimientoRiesgo, RiesgoActual
 from .forms import EstudianteForm
 from datetime import datetime
 from app.extensions import db
+from app.services.paginacion import paginar_keyset
+from app.services.busqueda import filtrar_busqueda, opciones_estudiantes, respuesta_sugerencias
+from app.services.riesgo_actual import semestre_proyectado, CATEGORIAS_EN_RIESGO
 
 @estudiantes_bp.route('/')
 @login_required
 def index():
     """Lista de todos los estudiantes"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    contar = request.args.get('contar') == '1'
     per_page = 10
     
     # Query base
@@ -20,22 +24,27 @@ def index():
     # Búsqueda
     search = request.args.get('search', '')
     if search:
-        estudiantes_query = estudiantes_query.filter(
-            db.or_(
-                Estudiante.nombres.ilike(f'%{search}%'),
-                Estudiante.apellidos.ilike(f'%{search}%'),
-                Estudiante.codigo_estudiante.ilike(f'%{search}%')
-            )
-        )
+        estudiantes_query = filtrar_busqueda(estudiantes_query, search, Estudiante)
     
-    estudiantes = estudiantes_query.paginate(
-        page=page, per_page=per_page, error_out=False
+    # Paginación por cursor (apellidos, nombres, id)
+    estudiantes = paginar_keyset(
+        estudiantes_query,
+        [(Estudiante.apellidos, False), (Estudiante.nombres, False), (Estudiante.id, False)],
+        cursor=cursor, por_pagina=per_page, contar=contar
     )
     
     return render_template('estudiantes/index.html', 
                          estudiantes=estudiantes,
                          search=search)
 
+@estudiantes_bp.route('/api/buscar')
+@login_required
+def api_buscar():
+    """Sugerencias de estudiantes activos para los selects con búsqueda"""
+    termino = request.args.get('q', '')
+    limite = request.args.get('limite', 20, type=int)
+    return jsonify(respuesta_sugerencias(opciones_estudiantes(termino, limite)))
+
 @estudiantes_bp.route('/<int:estudiante_id>')
 @login_required
 def detalle(estudiante_id):
@@ -58,18 +67,23 @@ def en_riesgo():
     page = request.args.get('page', 1, type=int)
     per_page = 10
     
-    # Estudiantes con seguimiento de riesgo (excluyendo SIN_RIESGO)
-    estudiantes_riesgo = db.session.query(Estudiante, SeguimientoRiesgo).join(
-        SeguimientoRiesgo, Estudiante.id == SeguimientoRiesgo.estudiante_id
+    categoria = request.args.get('categoria', '')
+    categorias = [categoria] if categoria in CATEGORIAS_EN_RIESGO else list(CATEGORIAS_EN_RIESGO)
+    
+    # Proyección del riesgo actual: una fila por estudiante del semestre activo
+    estudiantes_riesgo = db.session.query(Estudiante, RiesgoActual).join(
+        RiesgoActual, Estudiante.id == RiesgoActual.estudiante_id
     ).filter(
-        SeguimientoRiesgo.categoria_riesgo != 'SIN_RIESGO',
+        RiesgoActual.categoria_riesgo.in_(categorias),
         Estudiante.activo == True
-    ).order_by(SeguimientoRiesgo.puntaje_riesgo.desc()).paginate(
+    ).order_by(RiesgoActual.puntaje_riesgo.desc(), RiesgoActual.estudiante_id).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
     return render_template('estudiantes/en_riesgo.html',
-                         estudiantes_riesgo=estudiantes_riesgo)
+                         estudiantes_riesgo=estudiantes_riesgo,
+                         categoria=categoria,
+                         semestre=semestre_proyectado())
     
     
 @estudiantes_bp.route('/crear', methods=['GET', 'POST'])
@@ -4,6 +4,12 @@ from flask_login import login_required, current_user
 from . import evaluaciones_bp
 from app.models import Evaluacion, Curso, Nota, Inscripcion, Estudiante
 from app.extensions import db
+from sqlalchemy.orm import contains_eager, joinedload
+from app.services.paginacion import paginar_keyset, FECHA_MINIMA
+from app.services.busqueda import filtrar_busqueda
+from app.services.libreta_notas import leer_libreta, guardar_libreta
+from app.services.estadisticas_evaluacion import obtener_estadisticas
+from app.modules.admin.routes import cargar_configuracion
 from .forms import EvaluacionForm, NotaForm
 from datetime import datetime
 
@@ -17,18 +23,12 @@ def index():
     per_page = 10
 
     # Query base con join para curso
-    evaluaciones_query = Evaluacion.query.join(Curso)
+    evaluaciones_query = Evaluacion.query.join(Evaluacion.curso).options(contains_eager(Evaluacion.curso))
 
     # Búsqueda
     search = request.args.get('search', '')
     if search:
-        evaluaciones_query = evaluaciones_query.filter(
-            db.or_(
-                Evaluacion.nombre_evaluacion.ilike(f'%{search}%'),
-                Curso.nombre_curso.ilike(f'%{search}%'),
-                Curso.codigo_curso.ilike(f'%{search}%')
-            )
-        )
+        evaluaciones_query = filtrar_busqueda(evaluaciones_query, search, Evaluacion, Curso)
 
     # Filtros
     curso_id = request.args.get('curso_id', type=int)
@@ -105,32 +105,30 @@ def crear_evaluacion():
 @login_required
 def detalle_evaluacion(evaluacion_id):
     """Detalle de una evaluación específica"""
-    evaluacion = Evaluacion.query.get_or_404(evaluacion_id)
+    evaluacion = Evaluacion.query.options(
+        joinedload(Evaluacion.curso)
+    ).filter_by(id=evaluacion_id).first_or_404()
     
-    # Obtener notas de esta evaluación
+    # Obtener notas de esta evaluación (con inscripción y estudiante en la misma consulta)
     notas = Nota.query.filter_by(
         evaluacion_id=evaluacion_id
-    ).join(Inscripcion).join(Estudiante).order_by(Estudiante.apellidos).all()
+    ).join(Nota.inscripcion).join(Inscripcion.estudiante).options(
+        contains_eager(Nota.inscripcion).contains_eager(Inscripcion.estudiante)
+    ).order_by(Estudiante.apellidos).all()
     
-    # Estadísticas
-    total_notas = len(notas)
-    promedio = db.session.query(db.func.avg(Nota.nota)).filter_by(
-        evaluacion_id=evaluacion_id
-    ).scalar() or 0
-    nota_maxima = db.session.query(db.func.max(Nota.nota)).filter_by(
-        evaluacion_id=evaluacion_id
-    ).scalar() or 0
-    nota_minima = db.session.query(db.func.min(Nota.nota)).filter_by(
-        evaluacion_id=evaluacion_id
-    ).scalar() or 0
+    total_inscritos = Inscripcion.query.filter_by(curso_id=evaluacion.curso_id).count()
+    
+    # Estadísticas (una consulta agregada, en caché hasta que cambie una nota de la evaluación)
+    nota_aprobatoria = float(cargar_configuracion().get('nota_minima_aprobatoria', 12.0))
+    estadisticas = obtener_estadisticas(evaluacion_id, nota_aprobatoria)
 
     return render_template('evaluaciones/detalle_evaluacion.html',
                          evaluacion=evaluacion,
                          notas=notas,
-                         total_notas=total_notas,
-                         promedio=promedio,
-                         nota_maxima=nota_maxima,
-                         nota_minima=nota_minima)
+                         total_inscritos=total_inscritos,
+                         total_notas=len(notas),
+                         estadisticas=estadisticas,
+                         nota_aprobatoria=nota_aprobatoria)
 
 @evaluaciones_bp.route('/<int:evaluacion_id>/editar', methods=['GET', 'POST'])
 @login_required
@@ -199,11 +197,20 @@ def eliminar_evaluacion(evaluacion_id):
 @login_required
 def notas_index():
     """Lista de todas las notas"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    contar = request.args.get('contar') == '1'
     per_page = 10
 
     # Query base con joins
-    notas_query = Nota.query.join(Inscripcion).join(Estudiante).join(Evaluacion).join(Curso)
+    notas_query = (
+        Nota.query
+        .join(Nota.inscripcion).join(Inscripcion.estudiante)
+        .join(Nota.evaluacion).join(Evaluacion.curso)
+        .options(
+            contains_eager(Nota.inscripcion).contains_eager(Inscripcion.estudiante),
+            contains_eager(Nota.evaluacion).contains_eager(Evaluacion.curso)
+        )
+    )
 
     # Filtros
     estudiante_id = request.args.get('estudiante_id', type=int)
@@ -217,9 +224,12 @@ def notas_index():
     if evaluacion_id:
         notas_query = notas_query.filter(Nota.evaluacion_id == evaluacion_id)
 
-    notas = notas_query.order_by(
-        Nota.fecha_registro.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Paginación por cursor (fecha de registro, id)
+    notas = paginar_keyset(
+        notas_query,
+        [(db.func.coalesce(Nota.fecha_registro, FECHA_MINIMA), True), (Nota.id, True)],
+        cursor=cursor, por_pagina=per_page, contar=contar
+    )
 
     # Para los filtros
     estudiantes = Estudiante.query.filter_by(activo=True).order_by('apellidos').all()
@@ -334,4 +344,41 @@ def eliminar_nota(nota_id):
         db.session.rollback()
         flash(f'Error al eliminar nota: {str(e)}', 'danger')
     
-    return redirect(url_for('evaluaciones.notas_index'))
\ No newline at end of file
+    return redirect(url_for('evaluaciones.notas_index'))
+
+@evaluaciones_bp.route('/libreta/<int:curso_id>', methods=['GET', 'POST'])
+@login_required
+def libreta(curso_id):
+    """Libreta de notas del curso: estudiantes x evaluaciones"""
+    curso = Curso.query.get_or_404(curso_id)
+    
+    if request.method == 'POST':
+        try:
+            # Celdas nota_<inscripcion_id>_<evaluacion_id>
+            celdas = {}
+            for nombre, valor in request.form.items():
+                partes = nombre.split('_')
+                if len(partes) == 3 and partes[0] == 'nota' and partes[1].isdigit() and partes[2].isdigit():
+                    celdas[(int(partes[1]), int(partes[2]))] = valor
+            
+            guardadas, errores = guardar_libreta(curso.id, celdas)
+            db.session.commit()
+            
+            flash(f'Libreta guardada: {guardadas} notas actualizadas', 'success')
+            for error in errores[:5]:
+                flash(error, 'warning')
+            if len(errores) > 5:
+                flash(f'... y {len(errores) - 5} celdas inválidas más', 'warning')
+                
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error al guardar la libreta: {str(e)}', 'danger')
+        
+        return redirect(url_for('evaluaciones.libreta', curso_id=curso.id))
+    
+    evaluaciones, filas = leer_libreta(curso.id)
+    
+    return render_template('evaluaciones/libreta.html',
+                         curso=curso,
+                         evaluaciones=evaluaciones,
+                         filas=filas)
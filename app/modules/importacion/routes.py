@@ -7,6 +7,7 @@ from datetime import datetime
 from . import importacion_bp
 from app.models import Estudiante, Curso, Inscripcion, Evaluacion, Nota, SeguimientoRiesgo
 from app.extensions import db
+from app.services.resumen import leer_resumen, CLAVE_TOTAL
 
 @importacion_bp.route('/')
 @login_required
@@ -252,14 +253,13 @@ def importar_notas():
 @login_required
 def resultados():
     """Mostrar resultados de importaciones"""
-    # Obtener estadísticas actuales
+    # Obtener estadísticas actuales (fila TOTAL del resumen)
+    total = leer_resumen()[CLAVE_TOTAL]
     estadisticas = {
-        'estudiantes': Estudiante.query.filter_by(activo=True).count(),
-        'cursos': Curso.query.filter_by(activo=True).count(),
-        'notas': Nota.query.count(),
-        'riesgo': SeguimientoRiesgo.query.filter(
-            SeguimientoRiesgo.categoria_riesgo != 'SIN_RIESGO'
-        ).count()
+        'estudiantes': total['estudiantes_activos'],
+        'cursos': total['cursos_activos'],
+        'notas': total['notas'],
+        'riesgo': total['riesgo_alerta_amarilla'] + total['riesgo_alerta_roja']
     }
     
     return render_template('importacion/resultados.html', estadisticas=estadisticas)
@@ -3,10 +3,16 @@ from flask_wtf import FlaskForm
 from wtforms import SelectField, DateField, StringField, SubmitField
 from wtforms.validators import DataRequired, Optional,length
 from app.models import Estudiante, Curso
+from app.campos import SeleccionRemotaField
+from app.services.busqueda import opciones_estudiantes, opciones_cursos
 
 class InscripcionForm(FlaskForm):
-    estudiante_id = SelectField('Estudiante', coerce=int, validators=[DataRequired()])
-    curso_id = SelectField('Curso', coerce=int, validators=[DataRequired()])
+    estudiante_id = SeleccionRemotaField('Estudiante', validators=[DataRequired()],
+                                         opciones=opciones_estudiantes,
+                                         endpoint='estudiantes.api_buscar')
+    curso_id = SeleccionRemotaField('Curso', validators=[DataRequired()],
+                                    opciones=opciones_cursos,
+                                    endpoint='cursos.api_buscar')
     fecha_inscripcion = DateField('Fecha de Inscripción', validators=[DataRequired()])
     estado = SelectField('Estado', 
                         choices=[
@@ -18,19 +24,6 @@ class InscripcionForm(FlaskForm):
                         ],
                         validators=[DataRequired()])
     submit = SubmitField('Guardar Inscripción')
-    
-    def __init__(self, *args, **kwargs):
-        super(InscripcionForm, self).__init__(*args, **kwargs)
-        # Cargar estudiantes activos
-        self.estudiante_id.choices = [
-            (est.id, f"{est.codigo_estudiante} - {est.nombres} {est.apellidos}")
-            for est in Estudiante.query.filter_by(activo=True).order_by('apellidos').all()
-        ]
-        # Cargar cursos activos
-        self.curso_id.choices = [
-            (curso.id, f"{curso.codigo_curso} - {curso.nombre_curso} ({curso.semestre})")
-            for curso in Curso.query.filter_by(activo=True).order_by('semestre', 'nombre_curso').all()
-        ]
         
 # ------------------------------------------------------------------
 # MATRICULAS MASIVAS    
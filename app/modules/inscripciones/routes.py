@@ -4,6 +4,10 @@ from flask_login import login_required, current_user
 from . import inscripciones_bp
 from app.models import Inscripcion, Estudiante, Curso, Asistencia, Nota, Evaluacion
 from app.extensions import db
+from sqlalchemy.orm import contains_eager, joinedload
+from app.services.paginacion import paginar_keyset, FECHA_MINIMA
+from app.services.busqueda import filtrar_busqueda, opciones_inscripciones, respuesta_sugerencias
+from app.services.mapa_asistencia import leer_mapas
 from .forms import InscripcionForm
 from datetime import datetime
 from .forms import InscripcionForm, MatriculaMasivaForm 
@@ -105,24 +109,19 @@ def matricula_masiva():
 @login_required
 def index():
     """Lista de todas las inscripciones"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
+    contar = request.args.get('contar') == '1'
     per_page = 10
 
     # Query base con joins para estudiante y curso
-    inscripciones_query = Inscripcion.query.join(Estudiante).join(Curso)
+    inscripciones_query = Inscripcion.query.join(Inscripcion.estudiante).join(Inscripcion.curso).options(
+        contains_eager(Inscripcion.estudiante), contains_eager(Inscripcion.curso)
+    )
 
     # Búsqueda
     search = request.args.get('search', '')
     if search:
-        inscripciones_query = inscripciones_query.filter(
-            db.or_(
-                Estudiante.nombres.ilike(f'%{search}%'),
-                Estudiante.apellidos.ilike(f'%{search}%'),
-                Estudiante.codigo_estudiante.ilike(f'%{search}%'),
-                Curso.nombre_curso.ilike(f'%{search}%'),
-                Curso.codigo_curso.ilike(f'%{search}%')
-            )
-        )
+        inscripciones_query = filtrar_busqueda(inscripciones_query, search, Estudiante, Curso)
 
     # Filtros
     estudiante_id = request.args.get('estudiante_id', type=int)
@@ -136,9 +135,12 @@ def index():
     if estado:
         inscripciones_query = inscripciones_query.filter(Inscripcion.estado == estado)
 
-    inscripciones = inscripciones_query.order_by(
-        Inscripcion.fecha_inscripcion.desc()
-    ).paginate(page=page, per_page=per_page, error_out=False)
+    # Paginación por cursor (fecha de inscripción, id)
+    inscripciones = paginar_keyset(
+        inscripciones_query,
+        [(db.func.coalesce(Inscripcion.fecha_inscripcion, FECHA_MINIMA), True), (Inscripcion.id, True)],
+        cursor=cursor, por_pagina=per_page, contar=contar
+    )
 
     # Para los filtros
     estudiantes = Estudiante.query.filter_by(activo=True).order_by('apellidos').all()
@@ -153,6 +155,14 @@ def index():
                          curso_id=curso_id,
                          estado=estado)
 
+@inscripciones_bp.route('/api/buscar')
+@login_required
+def api_buscar():
+    """Sugerencias de inscripciones activas para los selects con búsqueda"""
+    termino = request.args.get('q', '')
+    limite = request.args.get('limite', 20, type=int)
+    return jsonify(respuesta_sugerencias(opciones_inscripciones(termino, limite)))
+
 @inscripciones_bp.route('/crear', methods=['GET', 'POST'])
 @login_required
 def crear():
@@ -202,14 +212,24 @@ def crear():
 @login_required
 def detalle(inscripcion_id):
     """Detalle de una inscripción específica"""
-    inscripcion = Inscripcion.query.get_or_404(inscripcion_id)
+    inscripcion = Inscripcion.query.options(
+        joinedload(Inscripcion.estudiante), joinedload(Inscripcion.curso)
+    ).filter_by(id=inscripcion_id).first_or_404()
     
-    # Obtener asistencias
-    asistencias = (
-        Asistencia.query
-        .filter_by(inscripcion_id=inscripcion_id)
-        .order_by(Asistencia.fecha.desc())
-        .all()
+    # Estadísticas: mapa de bits de asistencia (lectura por clave) y promedio de notas
+    mapa = leer_mapas([inscripcion_id])[inscripcion_id]
+    total_asistencias = mapa.total_clases
+    asistencias_presente = mapa.asistencias
+    porcentaje_asistencia = mapa.porcentaje_asistencia
+    promedio_notas = db.session.query(db.func.avg(Nota.nota)).filter(Nota.inscripcion_id == inscripcion_id).scalar()
+    
+    # Historial de asistencias paginado (las más recientes primero)
+    asistencias = paginar_keyset(
+        Asistencia.query.filter_by(inscripcion_id=inscripcion_id),
+        orden=[(Asistencia.fecha, True), (Asistencia.id, True)],
+        cursor=request.args.get('cursor'),
+        por_pagina=20,
+        total=total_asistencias
     )
     
     # Obtener notas con join correcto
@@ -217,21 +237,10 @@ def detalle(inscripcion_id):
         Nota.query
         .filter_by(inscripcion_id=inscripcion_id)
         .join(Nota.evaluacion)
+        .options(contains_eager(Nota.evaluacion))
         .order_by(Evaluacion.nombre_evaluacion)
         .all()
     )
-    
-    # Calcular estadísticas
-    total_asistencias = len(asistencias)
-    asistencias_presente = sum(1 for a in asistencias if a.presente)
-    porcentaje_asistencia = (asistencias_presente / total_asistencias * 100) if total_asistencias > 0 else 0
-    
-    promedio_notas = (
-        db.session.query(db.func.avg(Nota.nota))
-        .filter_by(inscripcion_id=inscripcion_id)
-        .scalar()
-        or 0
-    )
 
     return render_template(
         'inscripciones/detalle.html',
@@ -241,7 +250,7 @@ def detalle(inscripcion_id):
         total_asistencias=total_asistencias,
         asistencias_presente=asistencias_presente,
         porcentaje_asistencia=porcentaje_asistencia,
-        promedio_notas=promedio_notas
+        promedio_notas=promedio_notas or 0
     )
 
 
@@ -1,6 +1,7 @@
-from flask import render_template, request, jsonify, flash, redirect, url_for, send_file
+from flask import render_template, request, jsonify, flash, redirect, url_for, send_file, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
 import os
+import logging
 import pdfkit
 from datetime import datetime
 import tempfile
@@ -8,9 +9,14 @@ import platform
 import io
 from . import reportes_bp
 from app.services.report_generator import ReportGenerator
+from app.services import pdf_nativo
+from app.services.version_datos import asegurar_version
+from app.services.streaming import renderizar_en_streaming
 from app.models import Reporte, Estudiante
 from app.extensions import db
 
+logger = logging.getLogger(__name__)
+
 
 def get_pdf_config():
     """Configuración portable y compatible con Render."""
@@ -39,6 +45,40 @@ def get_pdf_config():
         return pdfkit.configuration()
 
 
+PDF_OPCIONES = {
+    'page-size': 'A4',
+    'margin-top': '0.5in',
+    'margin-right': '0.5in',
+    'margin-bottom': '0.5in',
+    'margin-left': '0.5in',
+    'encoding': 'UTF-8',
+    'enable-local-file-access': ''
+}
+
+
+def obtener_motor_pdf():
+    """Motor PDF solicitado en el formulario o, si no, el configurado"""
+    motor = request.form.get('motor_pdf') or current_app.config.get('PDF_MOTOR', 'wkhtmltopdf')
+    return 'fpdf' if motor == 'fpdf' else 'wkhtmltopdf'
+
+
+def avisar_reporte_reutilizado(reporte):
+    fecha = reporte.fecha_generacion.strftime("%d/%m/%Y %H:%M")
+    if reporte.generado_por_sistema:
+        flash(f'Reporte precalculado el {fecha}; los datos no cambiaron desde entonces.', 'info')
+    else:
+        flash(f'Sin cambios en los datos desde el {fecha}: se muestra el reporte ya generado.', 'info')
+
+
+def enviar_pdf(pdf_bytes, nombre_archivo):
+    return send_file(
+        io.BytesIO(pdf_bytes),
+        mimetype="application/pdf",
+        as_attachment=True,
+        download_name=nombre_archivo
+    )
+
+
 # ======================================
 # PANEL PRINCIPAL
 # ======================================
@@ -64,53 +104,49 @@ def individual():
 @login_required
 def generar_individual():
     try:
-        estudiante_id = request.form.get('estudiante_id')
-        semestre = request.form.get('semestre')
+        estudiante_id = request.form.get('estudiante_id', type=int)
         formato = request.form.get('formato', 'html')
 
         generator = ReportGenerator()
-        resultado = generator.generar_reporte_riesgo_individual(estudiante_id, semestre)
-
-        html = resultado["html"]
-
-        # Guardar registro en BD (SOLO HTML)
-        reporte = Reporte(
-            tipo_reporte='INDIVIDUAL_RIESGO',
-            titulo=f'Reporte de Riesgo - {resultado["estudiante"].nombres} {resultado["estudiante"].apellidos}',
-            descripcion=f'Reporte individual de riesgo académico para el semestre {semestre}',
-            parametros={"estudiante_id": estudiante_id, "semestre": semestre},
-            contenido=html,
-            usuario_id=current_user.id
-        )
-        db.session.add(reporte)
+        semestre = generator.resolver_semestre(request.form.get('semestre'))
+        parametros = {"estudiante_id": estudiante_id, "semestre": semestre}
+
+        # Reutilizar el reporte si los datos del semestre no cambiaron
+        version = asegurar_version(semestre)
+        reporte = generator.buscar_reporte_vigente('INDIVIDUAL_RIESGO', parametros, version, current_user.id)
+        resultado = None
+
+        if reporte:
+            avisar_reporte_reutilizado(reporte)
+        else:
+            resultado = generator.generar_reporte_riesgo_individual(estudiante_id, semestre)
+
+            # Guardar registro en BD (SOLO HTML)
+            reporte = generator.registrar_reporte(
+                'INDIVIDUAL_RIESGO', parametros, version,
+                titulo=f'Reporte de Riesgo - {resultado["estudiante"].nombres} {resultado["estudiante"].apellidos}',
+                descripcion=f'Reporte individual de riesgo académico para el semestre {semestre}',
+                contenido=resultado["html"],
+                usuario_id=current_user.id
+            )
         db.session.commit()
 
+        html = reporte.contenido
+
         # ---------------------------------------
         # GENERAR PDF
         # ---------------------------------------
         if formato == 'pdf':
             try:
-                config = get_pdf_config()
-
-                options = {
-                    'page-size': 'A4',
-                    'margin-top': '0.5in',
-                    'margin-right': '0.5in',
-                    'margin-bottom': '0.5in',
-                    'margin-left': '0.5in',
-                    'encoding': 'UTF-8',
-                    'enable-local-file-access': ''
-                }
-
-                # GENERAR PDF EN MEMORIA (NO EN DISCO)
-                pdf_bytes = pdfkit.from_string(html, False, configuration=config, options=options)
-
-                return send_file(
-                    io.BytesIO(pdf_bytes),
-                    mimetype="application/pdf",
-                    as_attachment=True,
-                    download_name=f"reporte_individual_{estudiante_id}.pdf"
-                )
+                if obtener_motor_pdf() == 'fpdf':
+                    # PDF nativo: sin proceso externo (necesita los datos, no el HTML)
+                    resultado = resultado or generator.generar_reporte_riesgo_individual(estudiante_id, semestre)
+                    pdf_bytes = pdf_nativo.renderizar_individual(resultado, semestre)
+                else:
+                    # GENERAR PDF EN MEMORIA (NO EN DISCO)
+                    pdf_bytes = pdfkit.from_string(html, False, configuration=get_pdf_config(), options=PDF_OPCIONES)
+
+                return enviar_pdf(pdf_bytes, f"reporte_individual_{estudiante_id}.pdf")
 
             except Exception as err:
                 flash(f"Error generando PDF: {err}", "danger")
@@ -138,48 +174,59 @@ def general():
 @login_required
 def generar_general():
     try:
-        semestre = request.form.get('semestre')
-        categoria_filtro = request.form.get('categoria_filtro')
+        categoria_filtro = request.form.get('categoria_filtro') or 'TODOS'
         formato = request.form.get('formato', 'html')
 
         generator = ReportGenerator()
-        resultado = generator.generar_reporte_riesgo_general(semestre, categoria_filtro)
+        semestre = generator.resolver_semestre(request.form.get('semestre'))
 
-        html = resultado["html"]
+        # Exportación de datos (CSV / Excel) sin renderizar HTML
+        if formato in ('csv', 'xlsx'):
+            return exportar_general(generator, semestre, categoria_filtro, formato)
 
-        reporte = Reporte(
-            tipo_reporte='GENERAL_RIESGO',
-            titulo=f'Reporte General de Riesgo - {semestre}',
-            descripcion=f'Reporte general de riesgo académico. Filtro: {categoria_filtro}',
-            parametros={"semestre": semestre, "categoria_filtro": categoria_filtro},
-            contenido=html,
-            usuario_id=current_user.id
-        )
-        db.session.add(reporte)
+        parametros = {"semestre": semestre, "categoria_filtro": categoria_filtro}
+
+        # Reutilizar el reporte si los datos del semestre no cambiaron
+        version = asegurar_version(semestre)
+        reporte = generator.buscar_reporte_vigente('GENERAL_RIESGO', parametros, version, current_user.id)
+        resultado = None
+
+        campos = {
+            'titulo': f'Reporte General de Riesgo - {semestre}',
+            'descripcion': f'Reporte general de riesgo académico. Filtro: {categoria_filtro}',
+            'usuario_id': current_user.id
+        }
+
+        if reporte:
+            avisar_reporte_reutilizado(reporte)
+        elif formato == 'html':
+            db.session.commit()
+
+            # Vista previa en streaming; el reporte se registra al terminar de enviarse
+            flujo = generator.generar_reporte_riesgo_general_streaming(semestre, categoria_filtro)
+            return renderizar_en_streaming(
+                'reportes/vista_previa.html',
+                contenido=registrar_al_finalizar(flujo, generator, 'GENERAL_RIESGO', parametros, version, campos),
+                titulo=campos['titulo']
+            )
+        else:
+            resultado = generator.generar_reporte_riesgo_general(semestre, categoria_filtro)
+            reporte = generator.registrar_reporte(
+                'GENERAL_RIESGO', parametros, version, contenido=resultado["html"], **campos
+            )
         db.session.commit()
 
+        html = reporte.contenido
+
         if formato == "pdf":
             try:
-                config = get_pdf_config()
-
-                options = {
-                    'page-size': 'A4',
-                    'margin-top': '0.5in',
-                    'margin-right': '0.5in',
-                    'margin-bottom': '0.5in',
-                    'margin-left': '0.5in',
-                    'encoding': 'UTF-8',
-                    'enable-local-file-access': ''
-                }
-
-                pdf_bytes = pdfkit.from_string(html, False, configuration=config, options=options)
-
-                return send_file(
-                    io.BytesIO(pdf_bytes),
-                    mimetype="application/pdf",
-                    as_attachment=True,
-                    download_name=f"reporte_general_{semestre}.pdf"
-                )
+                if obtener_motor_pdf() == 'fpdf':
+                    resultado = resultado or generator.generar_reporte_riesgo_general(semestre, categoria_filtro)
+                    pdf_bytes = pdf_nativo.renderizar_general(resultado, semestre, categoria_filtro)
+                else:
+                    pdf_bytes = pdfkit.from_string(html, False, configuration=get_pdf_config(), options=PDF_OPCIONES)
+
+                return enviar_pdf(pdf_bytes, f"reporte_general_{semestre}.pdf")
 
             except Exception as err:
                 flash(f"Error generando PDF: {err}", "danger")
@@ -192,6 +239,41 @@ def generar_general():
         return redirect(url_for('reportes.general'))
 
 
+def registrar_al_finalizar(flujo, generator, tipo_reporte, parametros, version, campos):
+    """Reenvía el HTML en streaming y, al terminar, lo guarda en el historial"""
+    partes = []
+    for parte in flujo:
+        partes.append(parte)
+        yield parte
+
+    try:
+        generator.registrar_reporte(tipo_reporte, parametros, version, contenido=''.join(partes), **campos)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        logger.exception(f"No se pudo registrar el reporte {tipo_reporte}")
+
+
+def exportar_general(generator, semestre, categoria_filtro, formato):
+    """Exporta el reporte general como CSV (streaming) o XLSX (write-only)"""
+    nombre = f"reporte_general_{semestre}"
+
+    if formato == 'csv':
+        return Response(
+            stream_with_context(generator.exportar_riesgo_general_csv(semestre, categoria_filtro)),
+            mimetype='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename={nombre}.csv'}
+        )
+
+    archivo = generator.exportar_riesgo_general_xlsx(semestre, categoria_filtro)
+    return send_file(
+        archivo,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=f'{nombre}.xlsx'
+    )
+
+
 # ======================================
 # HISTORIAL
 # ======================================
@@ -219,7 +301,8 @@ def descargar(reporte_id):
     reporte = Reporte.query.get_or_404(reporte_id)
 
     # Seguridad
-    if reporte.usuario_id != current_user.id and current_user.rol != 'administrador':
+    if (not reporte.generado_por_sistema and reporte.usuario_id != current_user.id
+            and current_user.rol != 'administrador'):
         flash("No tiene permisos para acceder a este reporte.", 'danger')
         return redirect(url_for('reportes.historial'))
 
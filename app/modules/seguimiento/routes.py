@@ -3,9 +3,14 @@ from flask import render_template, request, jsonify, flash, redirect, url_for
 from flask_login import login_required, current_user
 from . import seguimiento_bp
 from app.services.riesgo_calculator_v2 import CalculatorRiesgoIntrasemestral
-from app.models import Estudiante, SeguimientoRiesgo
+from app.models import Estudiante, SeguimientoRiesgo, Curso
 from app.extensions import db
 from app.modules.admin.routes import cargar_configuracion  # IMPORTAR CONFIGURACIÓN
+from app.services.condicional import con_etag
+from app.services.version_datos import obtener_version, obtener_version_global
+from app.services.cubo_riesgo import refrescar_cubo, consultar_cubo, DIMENSIONES
+from app.services.rachas import alertas_rachas, RACHA_ALERTA
+from app.services.riesgo_actual import refrescar_riesgo_actual
 
 @seguimiento_bp.route('/')
 @login_required
@@ -61,6 +66,10 @@ def calcular_riesgo():
                 print(f"Error procesando estudiante {estudiante.id}: {e}")
                 continue
         
+        # Refrescar el cubo de analítica (y el riesgo actual si es el semestre activo) en la misma transacción
+        refrescar_cubo(semestre)
+        if semestre == config.get('semestre_actual'):
+            refrescar_riesgo_actual(semestre)
         db.session.commit()
         
         flash(f'✅ Cálculo de riesgo completado! {estudiantes_procesados} estudiantes evaluados.', 'success')
@@ -92,8 +101,28 @@ def resultados():
                          estadisticas=estadisticas,
                          ultimos_seguimientos=ultimos_seguimientos)
 
+@seguimiento_bp.route('/alertas-ausencias')
+@login_required
+def alertas_ausencias():
+    """Inscripciones con ausencias injustificadas seguidas hasta la última clase"""
+    semestre = request.args.get('semestre') or cargar_configuracion()['semestre_actual']
+    minimo = request.args.get('minimo', type=int) or cargar_configuracion().get('racha_ausencias_alerta', RACHA_ALERTA)
+    
+    alertas = alertas_rachas(semestre, minimo)
+    
+    return render_template('seguimiento/alertas_ausencias.html',
+                         alertas=alertas,
+                         semestre=semestre,
+                         minimo=minimo)
+
+def version_calculo_estudiante(estudiante_id):
+    """El resultado solo cambia con los datos del semestre o con la configuración de riesgo"""
+    return obtener_version(request.args.get('semestre', '2025-1')), cargar_configuracion()
+
+
 @seguimiento_bp.route('/api/calcular-estudiante/<int:estudiante_id>')
 @login_required
+@con_etag(version_calculo_estudiante)
 def calcular_estudiante(estudiante_id):
     """API para calcular riesgo de un estudiante específico"""
     try:
@@ -117,4 +146,38 @@ def calcular_estudiante(estudiante_id):
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@seguimiento_bp.route('/api/cubo')
+@login_required
+@con_etag(lambda: obtener_version_global())
+def api_cubo():
+    """
+    Analítica de riesgo por semestre, curso y categoría.
+    Parámetros: agrupar=categoria,curso,semestre (dimensiones del resultado)
+    y filtros opcionales semestre, curso_id, categoria.
+    """
+    try:
+        agrupar = [d for d in request.args.get('agrupar', 'categoria').split(',') if d]
+        invalidas = [d for d in agrupar if d not in DIMENSIONES]
+        if invalidas:
+            return jsonify({'error': f'Dimensiones no válidas: {", ".join(invalidas)}'}), 400
+
+        celdas = consultar_cubo(
+            agrupar,
+            semestre=request.args.get('semestre'),
+            curso_id=request.args.get('curso_id', type=int),
+            categoria=request.args.get('categoria')
+        )
+
+        if 'curso' in agrupar:
+            cursos = dict(db.session.query(Curso.id, Curso.codigo_curso).filter(
+                Curso.id.in_({celda['curso'] for celda in celdas})
+            ).all())
+            for celda in celdas:
+                celda['codigo_curso'] = cursos.get(celda['curso'])
+
+        return jsonify({'agrupar': agrupar, 'celdas': celdas})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,133 @@
+# app/services/asistencia_semanal.py
+"""
+Totales de asistencia por inscripción y semana (tabla asistencia_semanal).
+
+Cada fila resume las asistencias de una inscripción en una semana (que
+empieza el lunes): clases registradas, presentes y justificadas. Un
+semestre son unas 16-20 filas por inscripción, así que la vista del
+semestre completo (asistencias.estadisticas) agrega miles de filas en
+lugar de millones de marcas; lo de un estudiante o una inscripción sale de
+los mapas de bits (mapa_asistencia). Las inscripciones que aún no tienen filas
+(tabla sin reconstruir tras el despliegue) se cuentan al vuelo sobre las
+asistencias (completar_totales).
+
+Al escribir asistencias se recalculan, con un DELETE y un INSERT ... SELECT,
+las semanas de las inscripciones tocadas. Las escrituras Core pasan por
+escrituras_asistencia.despues_de_escribir_asistencias; para reparar, `flask reconstruir-asistencia-semanal`.
+"""
+from itertools import chain
+
+from sqlalchemy import event, select, insert, delete, func, case, literal_column
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import AsistenciaSemanal, Asistencia, Inscripcion
+from app.services.historial import valores_de
+
+TAMANO_LOTE = 1000
+
+
+def _inicio_semana(fecha, dialecto):
+    """Lunes de la semana de `fecha` como expresión SQL"""
+    if dialecto == 'postgresql':
+        return func.date_trunc('week', fecha).cast(db.Date)
+    # SQLite: retroceder 6 días y avanzar al siguiente lunes
+    return func.date(fecha, literal_column("'-6 days'"), literal_column("'weekday 1'"))
+
+
+def actualizar_semanas(inscripcion_ids, conexion=None):
+    """Recalcula las filas semanales de las inscripciones indicadas. No hace commit."""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return
+    conexion = conexion or db.session.connection()
+    semana = _inicio_semana(Asistencia.fecha, conexion.dialect.name)
+
+    conexion.execute(delete(AsistenciaSemanal).where(AsistenciaSemanal.inscripcion_id.in_(ids)))
+    conexion.execute(insert(AsistenciaSemanal).from_select(
+        ['inscripcion_id', 'semana', 'total', 'presentes', 'justificadas'],
+        select(
+            Asistencia.inscripcion_id,
+            semana,
+            func.count(Asistencia.id),
+            func.sum(case((Asistencia.presente == True, 1), else_=0)),
+            func.sum(case((Asistencia.justificado == True, 1), else_=0))
+        ).where(Asistencia.inscripcion_id.in_(ids)).group_by(Asistencia.inscripcion_id, semana)
+    ))
+
+
+def reconstruir_semanas():
+    """Recalcula toda la tabla. No hace commit. Devuelve cuántas inscripciones se procesaron."""
+    conexion = db.session.connection()
+    conexion.execute(delete(AsistenciaSemanal))
+    ids = list(conexion.execute(select(Asistencia.inscripcion_id).distinct()).scalars())
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        actualizar_semanas(ids[inicio:inicio + TAMANO_LOTE], conexion)
+    return len(ids)
+
+
+# ======================================
+# LECTURA
+# ======================================
+
+def columnas_totales():
+    """Sumas de total, presentes y justificadas (con 0 si no hay filas)"""
+    return (
+        func.coalesce(func.sum(AsistenciaSemanal.total), 0).label('total_clases'),
+        func.coalesce(func.sum(AsistenciaSemanal.presentes), 0).label('asistencias'),
+        func.coalesce(func.sum(AsistenciaSemanal.justificadas), 0).label('justificadas'),
+    )
+
+
+def calcular_totales(inscripcion_ids):
+    """{inscripcion_id: (total_clases, asistencias, justificadas)} contados sobre las asistencias"""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return {}
+    filas = db.session.execute(
+        select(
+            Asistencia.inscripcion_id,
+            func.count(Asistencia.id),
+            func.sum(case((Asistencia.presente == True, 1), else_=0)),
+            func.sum(case((Asistencia.justificado == True, 1), else_=0))
+        ).where(Asistencia.inscripcion_id.in_(ids)).group_by(Asistencia.inscripcion_id)
+    )
+    return {inscripcion_id: (total, presentes or 0, justificadas or 0)
+            for inscripcion_id, total, presentes, justificadas in filas}
+
+
+def completar_totales(totales):
+    """
+    Recibe {inscripcion_id: (total_clases, asistencias, justificadas)} leídos
+    de la tabla y calcula al vuelo las inscripciones sin filas semanales (la
+    tabla aún no se reconstruyó); las que no tienen asistencias quedan en 0.
+    """
+    sin_filas = [inscripcion_id for inscripcion_id, (total, _, _) in totales.items() if not total]
+    if sin_filas:
+        totales.update(calcular_totales(sin_filas))
+    return totales
+
+
+# ======================================
+# MANTENIMIENTO POR ESCRITURA
+# ======================================
+
+def _despues_de_flush(session, flush_context):
+    """Recalcula las semanas de las inscripciones cuyas asistencias cambiaron en este flush"""
+    ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Asistencia):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            ids |= valores_de(obj, 'inscripcion_id')
+        elif isinstance(obj, Inscripcion) and obj in session.deleted:
+            ids.add(obj.id)
+
+    if ids:
+        actualizar_semanas(ids, session.connection())
+
+
+def registrar_eventos_semanas():
+    """Registra el listener de mantenimiento (idempotente)"""
+    if not event.contains(Session, 'after_flush', _despues_de_flush):
+        event.listen(Session, 'after_flush', _despues_de_flush)
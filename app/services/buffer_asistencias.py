@@ -0,0 +1,226 @@
+# app/services/buffer_asistencias.py
+"""
+Buffer de escritura diferida para marcas de asistencia.
+
+Al inicio de cada clase llegan cientos de marcas en pocos minutos. En lugar
+de una transacción por marca en la base principal, cada marca se agrega a
+un archivo SQLite local en modo WAL (una escritura durable y barata) y se
+confirma al cliente de inmediato. Un hilo vaciador junta las marcas cada
+BUFFER_ASISTENCIAS_INTERVALO segundos, se queda con la última de cada
+(inscripción, fecha) y las escribe con un único upsert.
+
+Las marcas solo se borran del buffer después de confirmarse en la base
+principal: si el proceso cae antes, se reaplican al reiniciar (el upsert es
+idempotente). Varios workers pueden compartir el archivo; un turno con
+vencimiento en el propio buffer asegura que vacíe uno solo a la vez.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import select
+
+from app.extensions import db
+from app.models import Asistencia, Inscripcion
+from app.services.upsert import upsert
+from app.services.escrituras_asistencia import despues_de_escribir_asistencias
+
+TAMANO_LOTE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+class BufferAsistencias:
+    def __init__(self, ruta, intervalo=3):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._vaciador = None
+        self._crear_tablas()
+
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta, timeout=10, isolation_level=None)
+        conexion.execute("PRAGMA synchronous = NORMAL")
+        return conexion
+
+    def _crear_tablas(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        conexion = self._conectar()
+        try:
+            conexion.execute("PRAGMA journal_mode = WAL")
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS marcas (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    inscripcion_id INTEGER NOT NULL,
+                    fecha TEXT NOT NULL,
+                    presente INTEGER NOT NULL,
+                    justificado INTEGER NOT NULL,
+                    observaciones TEXT,
+                    recibido REAL NOT NULL
+                )
+            """)
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS turno (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    duenio TEXT,
+                    vence REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conexion.execute("INSERT OR IGNORE INTO turno (id, vence) VALUES (1, 0)")
+        finally:
+            conexion.close()
+
+    # ---- lado de las peticiones ----
+
+    def agregar(self, marca, app):
+        """Guarda una marca validada (dict de validar_registro) y devuelve su id en el buffer"""
+        conexion = self._conectar()
+        try:
+            cursor = conexion.execute(
+                "INSERT INTO marcas (inscripcion_id, fecha, presente, justificado, observaciones, recibido) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (marca['inscripcion_id'], marca['fecha'].isoformat(), int(marca['presente']),
+                 int(marca['justificado']), marca['observaciones'], time.time())
+            )
+            marca_id = cursor.lastrowid
+        finally:
+            conexion.close()
+        self.asegurar_vaciador(app)
+        return marca_id
+
+    def pendientes(self):
+        conexion = self._conectar()
+        try:
+            return conexion.execute("SELECT count(*) FROM marcas").fetchone()[0]
+        finally:
+            conexion.close()
+
+    # ---- lado del vaciador ----
+
+    def _tomar_turno(self, conexion):
+        """Solo un proceso vacía a la vez; el turno vence si su dueño cae"""
+        duenio = f'{os.getpid()}:{threading.get_ident()}'
+        ahora = time.time()
+        cursor = conexion.execute(
+            "UPDATE turno SET duenio = ?, vence = ? WHERE id = 1 AND (vence < ? OR duenio = ?)",
+            (duenio, ahora + max(self.intervalo * 5, 30), ahora, duenio)
+        )
+        return cursor.rowcount == 1
+
+    def vaciar(self):
+        """Escribe en la base principal un lote de marcas pendientes. Devuelve cuántas se sacaron del buffer."""
+        conexion = self._conectar()
+        try:
+            if not self._tomar_turno(conexion):
+                return 0
+
+            filas = conexion.execute(
+                "SELECT id, inscripcion_id, fecha, presente, justificado, observaciones "
+                "FROM marcas ORDER BY id LIMIT ?", (TAMANO_LOTE,)
+            ).fetchall()
+            if not filas:
+                return 0
+
+            # La última marca de cada (inscripción, fecha) gana
+            marcas = {}
+            for _, inscripcion_id, fecha, presente, justificado, observaciones in filas:
+                marcas[(inscripcion_id, fecha)] = {
+                    'inscripcion_id': inscripcion_id,
+                    'fecha': date.fromisoformat(fecha),
+                    'presente': bool(presente),
+                    'justificado': bool(justificado),
+                    'observaciones': observaciones,
+                }
+
+            activas = set(db.session.execute(
+                select(Inscripcion.id).where(
+                    Inscripcion.id.in_({i for i, _ in marcas}), Inscripcion.estado == 'ACTIVO'
+                )
+            ).scalars())
+            validas = [m for (i, _), m in marcas.items() if i in activas]
+            descartadas = len(marcas) - len(validas)
+            if descartadas:
+                logger.warning(f"Buffer de asistencias: {descartadas} marcas de inscripciones inexistentes o inactivas descartadas")
+
+            try:
+                if validas:
+                    upsert(Asistencia, validas,
+                           claves=('inscripcion_id', 'fecha'),
+                           actualizar=('presente', 'justificado', 'observaciones'))
+                    despues_de_escribir_asistencias([m['inscripcion_id'] for m in validas])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            # Recién ahora se quitan del buffer: si algo falló antes, se reintentan
+            conexion.execute("DELETE FROM marcas WHERE id <= ?", (filas[-1][0],))
+            return len(filas)
+        finally:
+            conexion.close()
+
+    def _vaciar_en_bucle(self, app):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            try:
+                with app.app_context():
+                    while self.vaciar() >= TAMANO_LOTE:
+                        pass
+                    db.session.remove()
+            except Exception:
+                logger.exception("Buffer de asistencias: error al vaciar, se reintentará")
+
+    def asegurar_vaciador(self, app):
+        with self._lock:
+            if self._vaciador is None or not self._vaciador.is_alive():
+                self._vaciador = threading.Thread(target=self._vaciar_en_bucle, args=(app,), daemon=True)
+                self._vaciador.start()
+
+
+_buffer = None
+_lock_buffer = threading.Lock()
+
+
+def _ruta(app):
+    return app.config.get('BUFFER_ASISTENCIAS_RUTA') or os.path.join(app.instance_path, 'buffer_asistencias.db')
+
+
+def obtener_buffer(app):
+    """Buffer del proceso (se crea la primera vez)"""
+    global _buffer
+    with _lock_buffer:
+        if _buffer is None:
+            _buffer = BufferAsistencias(_ruta(app), app.config.get('BUFFER_ASISTENCIAS_INTERVALO', 3))
+        return _buffer
+
+
+def reanudar_buffer(app):
+    """Si quedaron marcas de una ejecución anterior, inicia el vaciador"""
+    if not os.path.exists(_ruta(app)):
+        return
+    buffer = obtener_buffer(app)
+    pendientes = buffer.pendientes()
+    if pendientes:
+        logger.info(f"Buffer de asistencias: {pendientes} marcas pendientes, reanudando")
+        buffer.asegurar_vaciador(app)
+
+
+def reanudar_con_primera_peticion(app):
+    """
+    Reanuda el buffer al atender la primera petición: solo el proceso web
+    vacía marcas, no los comandos de consola ni los scripts que crean la app.
+    """
+    reanudado = threading.Event()
+
+    @app.before_request
+    def _reanudar_buffer():
+        if not reanudado.is_set():
+            reanudado.set()
+            reanudar_buffer(app)
@@ -0,0 +1,236 @@
+# app/services/busqueda.py
+"""
+Búsqueda indexada de estudiantes, cursos y evaluaciones.
+
+- PostgreSQL: índices GIN con pg_trgm sobre f_unaccent(lower(texto)), donde
+  texto concatena nombres, apellidos, códigos... `LIKE '%palabra%'` sobre esa
+  misma expresión usa el índice y no distingue tildes (José = jose).
+- SQLite: una tabla FTS5 por entidad (rowid = id) con el tokenizador
+  unicode61 sin diacríticos, sincronizada por triggers. Busca por prefijo de
+  palabra ("jos" encuentra "José"), no por subcadena.
+
+Los índices se crean con `flask preparar-busqueda`. Mientras no existan se
+usa el ILIKE de siempre, así que nada se rompe antes de ejecutarlo (los
+procesos ya iniciados lo detectan al reiniciarse).
+"""
+from sqlalchemy import func, literal_column, select, table, column, text, and_, or_
+
+from app.extensions import db
+from app.models import Estudiante, Curso, Evaluacion, Inscripcion
+
+# Columnas que forman el texto buscable de cada entidad
+CAMPOS_BUSQUEDA = {
+    Estudiante: ('nombres', 'apellidos', 'codigo_estudiante'),
+    Curso: ('nombre_curso', 'codigo_curso'),
+    Evaluacion: ('nombre_evaluacion',),
+}
+
+_disponible = {}
+
+
+def _texto(modelo, prefijo=None):
+    """Expresión SQL con las columnas buscables concatenadas"""
+    columnas = [
+        literal_column(f'{prefijo}.{campo}') if prefijo else getattr(modelo, campo)
+        for campo in CAMPOS_BUSQUEDA[modelo]
+    ]
+    expresion = columnas[0]
+    for columna in columnas[1:]:
+        expresion = expresion.op('||')(literal_column("' '")).op('||')(columna)
+    return expresion
+
+
+def _texto_normalizado(modelo):
+    # Debe coincidir exactamente con la expresión de los índices GIN
+    return func.f_unaccent(func.lower(_texto(modelo)))
+
+
+def _tabla_fts(modelo):
+    return f'fts_{modelo.__tablename__}'
+
+
+def _nombre_indice(modelo):
+    return f'ix_{modelo.__tablename__}_busqueda_trgm'
+
+
+def busqueda_disponible():
+    """Indica si los índices de búsqueda existen en esta base (se consulta una vez por proceso)"""
+    motor = db.engine.dialect.name
+    if motor not in _disponible:
+        conexion = db.session.connection()
+        if motor == 'postgresql':
+            _disponible[motor] = conexion.execute(
+                text("SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL")
+            ).scalar()
+        elif motor == 'sqlite':
+            _disponible[motor] = conexion.execute(
+                text("SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = :nombre"),
+                {'nombre': _tabla_fts(Estudiante)}
+            ).scalar() > 0
+        else:
+            _disponible[motor] = False
+    return _disponible[motor]
+
+
+# ======================================
+# CONDICIONES DE BÚSQUEDA
+# ======================================
+
+def _condicion_palabra(modelo, palabra):
+    """Condición 'la palabra aparece en el texto buscable del modelo'"""
+    motor = db.engine.dialect.name
+
+    if not busqueda_disponible():
+        return or_(*[getattr(modelo, campo).ilike(f'%{palabra}%') for campo in CAMPOS_BUSQUEDA[modelo]])
+
+    if motor == 'postgresql':
+        patron = '%' + palabra.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        return _texto_normalizado(modelo).like(func.f_unaccent(func.lower(patron)))
+
+    # SQLite FTS5: prefijo de palabra, entre comillas para escapar la sintaxis de MATCH
+    fts = table(_tabla_fts(modelo), column('rowid'), column('texto'))
+    consulta = '"' + palabra.replace('"', '""') + '"*'
+    return modelo.id.in_(select(fts.c.rowid).where(fts.c.texto.op('MATCH')(consulta)))
+
+
+def filtrar_busqueda(query, termino, *modelos):
+    """
+    Filtra `query` para que cada palabra del término aparezca en alguno de
+    los modelos indicados (que deben estar en la consulta o en sus joins).
+    """
+    palabras = (termino or '').split()
+    if not palabras:
+        return query
+    return query.filter(and_(*[
+        or_(*[_condicion_palabra(modelo, palabra) for modelo in modelos])
+        for palabra in palabras
+    ]))
+
+
+# ======================================
+# CREACIÓN DE ÍNDICES
+# ======================================
+
+def preparar_busqueda():
+    """Crea (o reconstruye) la infraestructura de búsqueda. No hace commit."""
+    conexion = db.session.connection()
+    motor = conexion.dialect.name
+
+    if motor == 'postgresql':
+        conexion.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conexion.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        # unaccent() no es IMMUTABLE y no puede indexarse: envoltura inmutable
+        conexion.execute(text(
+            "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+            "$func$ SELECT public.unaccent('public.unaccent', $1) $func$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+        ))
+        for modelo in CAMPOS_BUSQUEDA:
+            expresion = _texto_normalizado(modelo).compile(
+                dialect=conexion.dialect, compile_kwargs={'literal_binds': True}
+            )
+            conexion.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {_nombre_indice(modelo)} "
+                f"ON {modelo.__tablename__} USING gin (({expresion}) gin_trgm_ops)"
+            ))
+
+    elif motor == 'sqlite':
+        for modelo in CAMPOS_BUSQUEDA:
+            tabla, fts = modelo.__tablename__, _tabla_fts(modelo)
+            nuevo = _texto(modelo, 'new').compile(dialect=conexion.dialect)
+
+            conexion.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} "
+                f"USING fts5(texto, tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+            conexion.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabla} BEGIN
+                    INSERT INTO {fts}(rowid, texto) VALUES (new.id, {nuevo});
+                END
+            """))
+            conexion.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabla} BEGIN
+                    DELETE FROM {fts} WHERE rowid = old.id;
+                    INSERT INTO {fts}(rowid, texto) VALUES (new.id, {nuevo});
+                END
+            """))
+            conexion.execute(text(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabla} BEGIN
+                    DELETE FROM {fts} WHERE rowid = old.id;
+                END
+            """))
+            conexion.execute(text(f"DELETE FROM {fts}"))
+            conexion.execute(text(
+                f"INSERT INTO {fts}(rowid, texto) SELECT id, {_texto(modelo, tabla).compile(dialect=conexion.dialect)} FROM {tabla}"
+            ))
+
+    else:
+        raise RuntimeError(f'Búsqueda indexada no soportada en {motor}')
+
+    _disponible.pop(motor, None)
+    return motor
+
+
+# ======================================
+# SUGERENCIAS (TYPEAHEAD) Y ETIQUETAS
+# ======================================
+# Consultas de solo columnas: una consulta por búsqueda, sin cargas perezosas.
+
+LIMITE_SUGERENCIAS = 50
+
+
+def _limitar(query, termino, limite, ids, modelo, *modelos_busqueda):
+    """
+    Filtra por ids (validación) o por término con límite (sugerencias). El
+    término se busca en `modelos_busqueda` o, si no se indican, en `modelo`.
+    """
+    if ids is not None:
+        return query.filter(modelo.id.in_(ids))
+    return filtrar_busqueda(query, termino, *(modelos_busqueda or (modelo,))).limit(
+        max(1, min(limite, LIMITE_SUGERENCIAS))
+    )
+
+
+def opciones_estudiantes(termino=None, limite=20, ids=None):
+    """[(id, etiqueta)] de estudiantes activos que coinciden con el término (o con los ids)"""
+    query = db.session.query(
+        Estudiante.id, Estudiante.codigo_estudiante, Estudiante.nombres, Estudiante.apellidos
+    ).filter(Estudiante.activo == True).order_by(Estudiante.apellidos, Estudiante.nombres)
+
+    return [
+        (fila.id, f"{fila.codigo_estudiante} - {fila.nombres} {fila.apellidos}")
+        for fila in _limitar(query, termino, limite, ids, Estudiante)
+    ]
+
+
+def opciones_cursos(termino=None, limite=20, ids=None):
+    """[(id, etiqueta)] de cursos activos"""
+    query = db.session.query(
+        Curso.id, Curso.codigo_curso, Curso.nombre_curso, Curso.semestre
+    ).filter(Curso.activo == True).order_by(Curso.semestre, Curso.nombre_curso)
+
+    return [
+        (fila.id, f"{fila.codigo_curso} - {fila.nombre_curso} ({fila.semestre})")
+        for fila in _limitar(query, termino, limite, ids, Curso)
+    ]
+
+
+def opciones_inscripciones(termino=None, limite=20, ids=None):
+    """[(id, etiqueta)] de inscripciones activas de estudiantes y cursos activos"""
+    query = db.session.query(
+        Inscripcion.id, Estudiante.codigo_estudiante, Estudiante.nombres, Estudiante.apellidos, Curso.nombre_curso
+    ).join(Inscripcion.estudiante).join(Inscripcion.curso).filter(
+        Inscripcion.estado == 'ACTIVO',
+        Estudiante.activo == True,
+        Curso.activo == True
+    ).order_by(Curso.nombre_curso, Estudiante.apellidos)
+
+    return [
+        (fila.id, f"{fila.codigo_estudiante} - {fila.nombres} {fila.apellidos} - {fila.nombre_curso}")
+        for fila in _limitar(query, termino, limite, ids, Inscripcion, Estudiante, Curso)
+    ]
+
+
+def respuesta_sugerencias(opciones):
+    """Formato JSON común de los endpoints de sugerencias"""
+    return {'resultados': [{'id': id_, 'texto': texto} for id_, texto in opciones]}
@@ -0,0 +1,144 @@
+# app/services/cache.py
+"""
+Caché en memoria para agregados baratos de servir y caros de recalcular.
+
+Cada entrada tiene un TTL (CACHE_TTL, en segundos) y la lista de tablas de
+las que depende. Al confirmar una transacción que escribió en alguna de esas
+tablas la entrada se descarta, así que en este proceso no se sirven datos
+viejos.
+
+Una dependencia puede acotarse a una parte de la tabla con 'tabla:valor'
+(p. ej. 'notas:12', las notas de la evaluación 12). Una escritura en
+'notas:12' descarta las entradas de 'notas:12' y de 'notas', pero no las de
+'notas:13'; una escritura en 'notas' descarta todas. Las escrituras ORM en
+una tabla registrada con particionar() se anotan por ese valor. La caché es por proceso: en los demás workers el TTL acota cuánto
+puede tardar en verse un cambio.
+"""
+import threading
+import time
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.services.historial import valores_de
+
+
+def _coincide(dependencia, escrita):
+    tabla_dep, _, valor_dep = dependencia.partition(':')
+    tabla_esc, _, valor_esc = escrita.partition(':')
+    return tabla_dep == tabla_esc and (not valor_dep or not valor_esc or valor_dep == valor_esc)
+
+
+def _afectada(dependencias, escritas):
+    return any(_coincide(dependencia, escrita) for dependencia in dependencias for escrita in escritas)
+
+
+class CacheTTL:
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+        self._generacion = 0
+        self._suscriptores = []
+
+    def suscribir(self, tablas, funcion):
+        """Llama a funcion(tablas_escritas) cuando se invalide alguna de `tablas`"""
+        self._suscriptores.append((frozenset(tablas), funcion))
+
+    def obtener(self, clave, calcular, ttl, tablas=()):
+        """Valor en caché de `clave` o, si caducó, el resultado de calcular()"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            generacion = self._generacion
+        if entrada and entrada[0] > ahora:
+            return entrada[1]
+
+        valor = calcular()
+
+        with self._lock:
+            # Si hubo una invalidación mientras se calculaba, el valor puede estar viejo
+            if generacion == self._generacion:
+                self._datos[clave] = (ahora + ttl, valor, frozenset(tablas))
+        return valor
+
+    def invalidar(self, tablas):
+        """Descarta las entradas que dependen de alguna de las tablas"""
+        tablas = set(tablas)
+        with self._lock:
+            self._generacion += 1
+            for clave in [c for c, (_, _, deps) in self._datos.items() if _afectada(deps, tablas)]:
+                del self._datos[clave]
+
+        for deps, funcion in self._suscriptores:
+            if _afectada(deps, tablas):
+                funcion(tablas)
+
+    def limpiar(self):
+        with self._lock:
+            self._generacion += 1
+            self._datos.clear()
+
+
+cache = CacheTTL()
+
+
+def obtener_cacheado(clave, calcular, tablas):
+    """Atajo que toma el TTL de la configuración (CACHE_TTL=0 desactiva la caché)"""
+    ttl = current_app.config.get('CACHE_TTL', 60)
+    if ttl <= 0:
+        return calcular()
+    return cache.obtener(clave, calcular, ttl, tablas)
+
+
+# ======================================
+# INVALIDACIÓN POR ESCRITURA
+# ======================================
+
+# tabla -> atributo por el que se anotan sus escrituras ORM ('tabla:valor')
+_PARTICIONES = {}
+
+
+def particionar(tabla, atributo):
+    """Las escrituras ORM en `tabla` invalidan solo 'tabla:<valor de atributo>' (y 'tabla')"""
+    _PARTICIONES[tabla] = atributo
+
+
+def _anotar_tablas_escritas(session, flush_context):
+    tablas = session.info.setdefault('tablas_escritas', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        nombre = obj.__table__.name
+        atributo = _PARTICIONES.get(nombre)
+        if atributo is None:
+            tablas.add(nombre)
+            continue
+        valores = valores_de(obj, atributo)
+        if valores:
+            tablas.update(f'{nombre}:{valor}' for valor in valores)
+        else:
+            tablas.add(nombre)
+
+
+def anotar_escritura(session, *tablas):
+    """Para escrituras Core (sin objetos ORM): invalida `tablas` al confirmar"""
+    session.info.setdefault('tablas_escritas', set()).update(tablas)
+
+
+def _despues_de_commit(session):
+    tablas = session.info.pop('tablas_escritas', None)
+    if tablas:
+        cache.invalidar(tablas)
+
+
+def _despues_de_rollback(session):
+    session.info.pop('tablas_escritas', None)
+
+
+def registrar_eventos_cache():
+    """Registra los listeners de invalidación (idempotente)"""
+    for nombre, funcion in (('after_flush', _anotar_tablas_escritas),
+                            ('after_commit', _despues_de_commit),
+                            ('after_rollback', _despues_de_rollback)):
+        if not event.contains(Session, nombre, funcion):
+            event.listen(Session, nombre, funcion)
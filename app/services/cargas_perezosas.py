@@ -0,0 +1,67 @@
+# app/services/cargas_perezosas.py
+"""
+Guardia contra cargas perezosas (N+1) durante el renderizado de plantillas.
+
+Las relaciones de los modelos son `lazy=True`: si una plantilla recorre
+`asistencia.inscripcion.estudiante` sobre objetos que la consulta no cargó,
+cada fila dispara SELECTs extra. Las rutas deben cargar lo que la plantilla
+usa (contains_eager / selectinload / joinedload). Con la guardia activa, una
+carga perezosa que ejecute SQL mientras se renderiza una plantilla se
+registra ('log') o lanza un error ('raise').
+
+Se configura con GUARDIA_CARGAS_PEREZOSAS; por defecto 'log' en modo debug
+y desactivada en producción. Las cargas resueltas desde el identity map (sin
+SQL) no cuentan.
+"""
+import logging
+
+from flask import before_render_template, template_rendered, g, has_app_context, current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class CargaPerezosaError(RuntimeError):
+    pass
+
+
+def _inicio_render(app, template, context, **extra):
+    g.renderizando = g.get('renderizando', 0) + 1
+
+
+def _fin_render(app, template, context, **extra):
+    g.renderizando = max(g.get('renderizando', 0) - 1, 0)
+
+
+def _describir(orm_execute_state):
+    ruta = orm_execute_state.loader_strategy_path
+    relacion = ruta[-1] if ruta is not None and len(ruta) else None
+    return str(relacion) if relacion is not None else orm_execute_state.lazy_loaded_from.class_.__name__
+
+
+def _al_ejecutar(orm_execute_state):
+    if orm_execute_state.lazy_loaded_from is None:
+        return
+    if not has_app_context() or not g.get('renderizando'):
+        return
+
+    modo = current_app.config.get('GUARDIA_CARGAS_PEREZOSAS')
+    mensaje = f"Carga perezosa de {_describir(orm_execute_state)} durante el renderizado"
+    if modo == 'raise':
+        raise CargaPerezosaError(mensaje)
+    logger.warning(mensaje)
+
+
+def registrar_guardia_cargas(app):
+    """Activa la guardia según GUARDIA_CARGAS_PEREZOSAS ('log', 'raise' o vacío)"""
+    modo = app.config.get('GUARDIA_CARGAS_PEREZOSAS')
+    if modo is None:
+        modo = app.config['GUARDIA_CARGAS_PEREZOSAS'] = 'log' if app.debug else ''
+    if not modo:
+        return
+
+    before_render_template.connect(_inicio_render, app)
+    template_rendered.connect(_fin_render, app)
+    if not event.contains(Session, 'do_orm_execute', _al_ejecutar):
+        event.listen(Session, 'do_orm_execute', _al_ejecutar)
@@ -0,0 +1,44 @@
+# app/services/condicional.py
+"""
+GET condicional (ETag / If-None-Match) para endpoints JSON.
+
+La ETag se calcula a partir de datos baratos (versión de datos, parámetros
+de la petición, configuración) sin ejecutar la vista. Si el cliente ya tiene
+esa versión se responde 304 sin consultar nada más.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from flask import request, make_response
+
+
+def calcular_etag(*partes):
+    contenido = json.dumps([request.path, sorted(request.args.items(multi=True)), *partes],
+                           sort_keys=True, default=str)
+    return hashlib.sha1(contenido.encode('utf-8')).hexdigest()
+
+
+def con_etag(partes_etag):
+    """
+    Decorador de vistas: `partes_etag(**kwargs_de_la_vista)` devuelve lo que
+    identifica la versión de la respuesta (p. ej. la versión de datos).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            etag = calcular_etag(partes_etag(**kwargs))
+
+            if request.if_none_match.contains(etag):
+                respuesta = make_response('', 304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+
+            respuesta.set_etag(etag)
+            # El navegador puede guardar la respuesta, pero debe revalidarla siempre
+            respuesta.headers['Cache-Control'] = 'private, no-cache'
+            return respuesta
+        return envoltura
+    return decorador
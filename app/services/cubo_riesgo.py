@@ -0,0 +1,88 @@
+# app/services/cubo_riesgo.py
+"""
+Cubo de riesgo: estudiantes y puntaje por (semestre, curso, categoría).
+
+Se refresca con una sola sentencia INSERT ... SELECT desde seguimiento_riesgo
+e inscripciones después de cada cálculo de riesgo. Las consultas de la API
+agregan sobre el cubo y nunca leen notas ni asistencias.
+
+Un estudiante cuenta una vez por cada curso en el que está inscrito: al
+agregar varios cursos los totales son inscripciones, no estudiantes únicos.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, func, literal
+
+from app.extensions import db
+from app.models import CuboRiesgo, SeguimientoRiesgo, Inscripcion, Curso
+
+DIMENSIONES = {
+    'semestre': CuboRiesgo.semestre,
+    'curso': CuboRiesgo.curso_id,
+    'categoria': CuboRiesgo.categoria_riesgo,
+}
+
+
+def refrescar_cubo(semestre):
+    """Reemplaza las celdas del semestre con los seguimientos actuales. No hace commit."""
+    db.session.flush()  # Los seguimientos pendientes deben estar en la base antes del INSERT ... SELECT
+    conexion = db.session.connection()
+    conexion.execute(delete(CuboRiesgo).where(CuboRiesgo.semestre == semestre))
+
+    origen = select(
+        SeguimientoRiesgo.semestre,
+        Curso.id,
+        func.coalesce(SeguimientoRiesgo.categoria_riesgo, 'SIN_RIESGO'),
+        func.count(SeguimientoRiesgo.id),
+        func.coalesce(func.sum(SeguimientoRiesgo.puntaje_riesgo), 0),
+        literal(datetime.utcnow())
+    ).join(
+        Inscripcion, Inscripcion.estudiante_id == SeguimientoRiesgo.estudiante_id
+    ).join(
+        Curso, (Curso.id == Inscripcion.curso_id) & (Curso.semestre == SeguimientoRiesgo.semestre)
+    ).where(
+        SeguimientoRiesgo.semestre == semestre
+    ).group_by(
+        SeguimientoRiesgo.semestre, Curso.id, func.coalesce(SeguimientoRiesgo.categoria_riesgo, 'SIN_RIESGO')
+    )
+
+    resultado = conexion.execute(
+        insert(CuboRiesgo).from_select(
+            ['semestre', 'curso_id', 'categoria_riesgo', 'estudiantes', 'puntaje_suma', 'fecha_actualizacion'],
+            origen
+        )
+    )
+    return resultado.rowcount
+
+
+def consultar_cubo(agrupar=('categoria',), semestre=None, curso_id=None, categoria=None):
+    """
+    Agrega el cubo por las dimensiones de `agrupar` (semestre, curso,
+    categoria), filtrando por las que se indiquen. Devuelve una lista de
+    diccionarios con las dimensiones, 'estudiantes' y 'puntaje_promedio'.
+    """
+    columnas = [DIMENSIONES[d].label(d) for d in agrupar]
+    query = db.session.query(
+        *columnas,
+        func.sum(CuboRiesgo.estudiantes).label('estudiantes'),
+        func.sum(CuboRiesgo.puntaje_suma).label('puntaje_suma')
+    )
+
+    if semestre:
+        query = query.filter(CuboRiesgo.semestre == semestre)
+    if curso_id:
+        query = query.filter(CuboRiesgo.curso_id == curso_id)
+    if categoria:
+        query = query.filter(CuboRiesgo.categoria_riesgo == categoria)
+
+    if columnas:
+        query = query.group_by(*[DIMENSIONES[d] for d in agrupar]).order_by(*[DIMENSIONES[d] for d in agrupar])
+
+    celdas = []
+    for fila in query.all():
+        estudiantes = int(fila.estudiantes or 0)
+        celda = {d: getattr(fila, d) for d in agrupar}
+        celda['estudiantes'] = estudiantes
+        celda['puntaje_promedio'] = round(float(fila.puntaje_suma) / estudiantes, 2) if estudiantes else 0
+        celdas.append(celda)
+    return celdas
@@ -0,0 +1,65 @@
+# app/services/depuracion.py
+"""
+Eliminación de registros duplicados antes de crear las restricciones únicas:
+
+- inscripciones (estudiante, curso): se conserva la más antigua y se le
+  pasan las asistencias y notas de las demás;
+- asistencias (inscripción, fecha) y notas (inscripción, evaluación): se
+  conserva el registro más reciente (id mayor).
+
+Se hace con el ORM para que los eventos de versión y resumen vean los
+cambios. No hace commit.
+"""
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import Inscripcion, Asistencia, Nota
+
+
+def _grupos_duplicados(modelo, *columnas):
+    """Valores de `columnas` que aparecen en más de una fila"""
+    return db.session.query(*columnas).group_by(*columnas).having(func.count(modelo.id) > 1).all()
+
+
+def _filas_del_grupo(modelo, columnas, valores):
+    return modelo.query.filter(
+        *[columna == valor for columna, valor in zip(columnas, valores)]
+    ).order_by(modelo.id).all()
+
+
+def _fusionar_inscripciones():
+    columnas = (Inscripcion.estudiante_id, Inscripcion.curso_id)
+    eliminadas = 0
+    for valores in _grupos_duplicados(Inscripcion, *columnas):
+        conservada, *sobrantes = _filas_del_grupo(Inscripcion, columnas, valores)
+        for sobrante in sobrantes:
+            # Reasignar por la relación: así el ORM no anula la FK al borrar
+            for asistencia in list(sobrante.asistencias):
+                asistencia.inscripcion = conservada
+            for nota in list(sobrante.notas):
+                nota.inscripcion = conservada
+            db.session.delete(sobrante)
+            eliminadas += 1
+    db.session.flush()
+    return eliminadas
+
+
+def _eliminar_repetidos(modelo, *columnas):
+    eliminadas = 0
+    for valores in _grupos_duplicados(modelo, *columnas):
+        *sobrantes, _conservada = _filas_del_grupo(modelo, columnas, valores)
+        for sobrante in sobrantes:
+            db.session.delete(sobrante)
+            eliminadas += 1
+    db.session.flush()
+    return eliminadas
+
+
+def depurar_duplicados():
+    """Elimina los duplicados y devuelve {tabla: filas eliminadas}"""
+    # Primero las inscripciones: al fusionarlas pueden aparecer asistencias y notas repetidas
+    return {
+        Inscripcion.__tablename__: _fusionar_inscripciones(),
+        Asistencia.__tablename__: _eliminar_repetidos(Asistencia, Asistencia.inscripcion_id, Asistencia.fecha),
+        Nota.__tablename__: _eliminar_repetidos(Nota, Nota.inscripcion_id, Nota.evaluacion_id),
+    }
@@ -0,0 +1,28 @@
+# app/services/escrituras_asistencia.py
+"""
+Seguimiento de las escrituras Core de asistencias.
+
+Los upserts masivos (formulario masivo, sincronización, buffer de marcas)
+no pasan por el ORM, así que los listeners after_flush no los ven. Cada
+uno llama a despues_de_escribir_asistencias, que hace en un solo lugar lo
+que esos listeners harían: versión de datos, mapas de bits, totales
+semanales e invalidación de caché. Una nueva tabla derivada de asistencias se agrega aquí.
+"""
+from app.extensions import db
+from app.models import Asistencia
+from app.services.version_datos import incrementar_version, semestres_de_inscripciones
+from app.services.mapa_asistencia import actualizar_mapas
+from app.services.asistencia_semanal import actualizar_semanas
+from app.services.cache import anotar_escritura
+
+
+def despues_de_escribir_asistencias(inscripcion_ids, conexion=None):
+    """Actualiza lo derivado de las asistencias de estas inscripciones. No hace commit."""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return
+    conexion = conexion or db.session.connection()
+    incrementar_version(semestres_de_inscripciones(ids, conexion), conexion)
+    actualizar_mapas(ids, conexion)
+    actualizar_semanas(ids, conexion)
+    anotar_escritura(db.session, Asistencia.__tablename__)
@@ -0,0 +1,82 @@
+# app/services/estadisticas_evaluacion.py
+"""
+Estadísticas de una evaluación en una sola consulta agregada.
+
+Cantidad, promedio, mínima, máxima, desviación estándar, aprobados y un
+histograma de 0 a 20 salen de un único SELECT sobre las notas de la
+evaluación (la desviación se obtiene de la suma y la suma de cuadrados,
+así que funciona también en SQLite). El resultado se guarda en la caché
+con la dependencia 'notas:<evaluacion_id>': solo lo invalida una escritura
+en las notas de esa evaluación.
+"""
+from math import sqrt
+
+from sqlalchemy import select, func, case, and_
+
+from app.extensions import db
+from app.models import Nota
+from app.services.cache import obtener_cacheado, particionar
+
+NOTA_MAXIMA = 20
+ANCHO_INTERVALO = 2
+
+# Las escrituras ORM de notas invalidan solo las entradas de su evaluación
+particionar(Nota.__tablename__, 'evaluacion_id')
+
+
+def _intervalos():
+    return [(desde, desde + ANCHO_INTERVALO) for desde in range(0, NOTA_MAXIMA, ANCHO_INTERVALO)]
+
+
+def calcular_estadisticas(evaluacion_id, nota_minima):
+    """Agrega las notas de la evaluación en una consulta"""
+    intervalos = _intervalos()
+    contar = lambda condicion: func.sum(case((condicion, 1), else_=0))
+
+    fila = db.session.execute(
+        select(
+            func.count(Nota.nota),
+            func.avg(Nota.nota),
+            func.min(Nota.nota),
+            func.max(Nota.nota),
+            func.sum(Nota.nota),
+            func.sum(Nota.nota * Nota.nota),
+            contar(Nota.nota >= nota_minima),
+            *[
+                # El último intervalo incluye la nota máxima
+                contar(and_(Nota.nota >= desde, Nota.nota <= hasta if hasta == NOTA_MAXIMA else Nota.nota < hasta))
+                for desde, hasta in intervalos
+            ]
+        ).where(Nota.evaluacion_id == evaluacion_id)
+    ).one()
+
+    cantidad, promedio, minima, maxima, suma, suma_cuadrados, aprobados = fila[:7]
+    cantidad = cantidad or 0
+
+    desviacion = 0.0
+    if cantidad > 1:
+        varianza = (float(suma_cuadrados) - float(suma) ** 2 / cantidad) / (cantidad - 1)
+        desviacion = sqrt(max(varianza, 0.0))
+
+    return {
+        'cantidad': cantidad,
+        'promedio': float(promedio or 0),
+        'minima': float(minima or 0),
+        'maxima': float(maxima or 0),
+        'desviacion': desviacion,
+        'aprobados': aprobados or 0,
+        'tasa_aprobacion': (aprobados or 0) / cantidad * 100 if cantidad else 0,
+        'histograma': [
+            {'desde': desde, 'hasta': hasta, 'cantidad': cantidad_intervalo or 0}
+            for (desde, hasta), cantidad_intervalo in zip(intervalos, fila[7:])
+        ],
+    }
+
+
+def obtener_estadisticas(evaluacion_id, nota_minima):
+    """Estadísticas de la evaluación desde la caché (o calculadas)"""
+    return obtener_cacheado(
+        f'evaluacion:{evaluacion_id}:{nota_minima}',
+        lambda: calcular_estadisticas(evaluacion_id, nota_minima),
+        tablas=(f'{Nota.__tablename__}:{evaluacion_id}',)
+    )
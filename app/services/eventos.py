@@ -0,0 +1,111 @@
+# app/services/eventos.py
+"""
+Difusión de datos a clientes conectados por Server-Sent Events.
+
+Un Difusor calcula un valor (p. ej. los conteos del dashboard) en un único
+hilo vigía por proceso y lo entrega a todos los clientes suscritos, solo
+cuando cambia. Las escrituras confirmadas en este proceso despiertan al
+vigía al instante (ver cache.suscribir). Para ver las de otros procesos el
+vigía lee cada intervalo una marca barata (p. ej. la versión global de
+datos) y solo recalcula si cambió: un cálculo por cambio y proceso, más una
+lectura de la marca por intervalo. Sin marca, recalcula en cada intervalo.
+
+Cada conexión SSE ocupa un hilo del servidor: usar gunicorn con workers
+gthread (o gevent), no el worker sync por defecto.
+"""
+import json
+import logging
+import threading
+import time
+
+from app.extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+class Difusor:
+    def __init__(self, calcular, intervalo=5, marca=None):
+        self.calcular = calcular
+        self.intervalo = intervalo
+        self.marca = marca
+        self.version = 0
+        self.datos = None
+        self.clientes = 0
+        self._condicion = threading.Condition()
+        self._despertar = threading.Event()
+        self._vigia = None
+
+    # ---- lado del vigía ----
+
+    def despertar(self, *args):
+        """Pide al vigía que recalcule ya (p. ej. tras un commit)"""
+        self._despertar.set()
+
+    def _vigilar(self, app):
+        marca_vista = None
+        while True:
+            with self._condicion:
+                if self.clientes == 0:
+                    self._vigia = None
+                    return
+
+            try:
+                with app.app_context():
+                    marca = self.marca() if self.marca else None
+                    if marca is None or marca != marca_vista or self.datos is None:
+                        datos = self.calcular()
+                        marca_vista = marca
+                    else:
+                        datos = self.datos
+                    db.session.remove()
+            except Exception:
+                logger.exception("Difusor: error calculando datos")
+                datos = self.datos
+
+            with self._condicion:
+                if datos != self.datos:
+                    self.datos = datos
+                    self.version += 1
+                    self._condicion.notify_all()
+
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def _asegurar_vigia(self, app):
+        # Llamar con self._condicion tomada
+        if self._vigia is None or not self._vigia.is_alive():
+            self._vigia = threading.Thread(target=self._vigilar, args=(app,), daemon=True)
+            self._vigia.start()
+
+    # ---- lado de los clientes ----
+
+    def esperar_cambio(self, version_vista, timeout):
+        """Bloquea hasta que haya una versión distinta de `version_vista` o venza el timeout"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.version != version_vista, timeout)
+            return self.version, self.datos
+
+    def eventos(self, app, nombre_evento, duracion_maxima=300, latido=20):
+        """
+        Generador de mensajes SSE para un cliente. Envía el valor actual, luego
+        cada cambio, y un comentario de latido para mantener viva la conexión.
+        Tras `duracion_maxima` segundos cierra; EventSource se reconecta solo.
+        """
+        with self._condicion:
+            self.clientes += 1
+            self._asegurar_vigia(app)
+
+        try:
+            yield "retry: 3000\n\n"
+            version_vista = 0
+            fin = time.monotonic() + duracion_maxima
+            while time.monotonic() < fin:
+                version, datos = self.esperar_cambio(version_vista, latido)
+                if version == version_vista:
+                    yield ": latido\n\n"
+                    continue
+                version_vista = version
+                yield f"event: {nombre_evento}\ndata: {json.dumps(datos)}\n\n"
+        finally:
+            with self._condicion:
+                self.clientes -= 1
@@ -0,0 +1,13 @@
+# app/services/historial.py
+"""
+Ayudas comunes para los listeners after_flush.
+"""
+from itertools import chain
+
+from sqlalchemy import inspect
+
+
+def valores_de(obj, atributo):
+    """Valor actual y anterior (si cambió en este flush) de un atributo, sin None"""
+    historial = inspect(obj).attrs[atributo].history
+    return set(chain(historial.added, historial.unchanged, historial.deleted)) - {None}
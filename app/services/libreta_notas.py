@@ -0,0 +1,135 @@
+# app/services/libreta_notas.py
+"""
+Libreta de notas de un curso: estudiantes x evaluaciones en una matriz.
+
+La matriz se lee con una sola consulta (inscripciones activas cruzadas con
+las evaluaciones del curso y sus notas) y se guarda con un único upsert
+sobre (inscripcion_id, evaluacion_id) que solo incluye las celdas que
+cambiaron. Una celda vacía no borra la nota: para eso está eliminar_nota.
+
+El upsert no pasa por el ORM: versión de datos, notas del resumen e
+invalidación de caché se actualizan a mano. No hace commit.
+"""
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import and_
+
+from app.extensions import db
+from app.models import Nota, Evaluacion, Inscripcion, Estudiante
+from app.services.upsert import upsert
+from app.services.version_datos import incrementar_version, semestres_de_cursos
+from app.services.cache import anotar_escritura
+from app.services.resumen import aplicar_delta, CLAVE_TOTAL
+
+NOTA_MINIMA = Decimal('0')
+NOTA_MAXIMA = Decimal('20')
+CENTESIMOS = Decimal('0.01')
+
+
+def _matriz(curso_id, *columnas):
+    """Inscripciones activas del curso x evaluaciones del curso, con la nota de cada celda si existe"""
+    return db.session.query(*columnas).select_from(Inscripcion).join(
+        Inscripcion.estudiante
+    ).outerjoin(
+        Evaluacion, Evaluacion.curso_id == Inscripcion.curso_id
+    ).outerjoin(
+        Nota, and_(Nota.inscripcion_id == Inscripcion.id, Nota.evaluacion_id == Evaluacion.id)
+    ).filter(
+        Inscripcion.curso_id == curso_id,
+        Inscripcion.estado == 'ACTIVO',
+        Estudiante.activo == True
+    )
+
+
+def leer_libreta(curso_id):
+    """
+    Devuelve (evaluaciones, filas): evaluaciones es una lista de dicts
+    {id, nombre, tipo, peso}; cada fila es {inscripcion_id, codigo,
+    estudiante, notas: {evaluacion_id: nota}}.
+    """
+    consulta = _matriz(
+        curso_id,
+        Inscripcion.id, Estudiante.codigo_estudiante, Estudiante.nombres, Estudiante.apellidos,
+        Evaluacion.id, Evaluacion.nombre_evaluacion, Evaluacion.tipo_evaluacion, Evaluacion.peso,
+        Nota.nota
+    ).order_by(
+        Estudiante.apellidos, Estudiante.nombres, Inscripcion.id, Evaluacion.fecha_creacion, Evaluacion.id
+    )
+
+    evaluaciones = {}
+    filas = {}
+    for (inscripcion_id, codigo, nombres, apellidos,
+         evaluacion_id, nombre, tipo, peso, nota) in consulta:
+        fila = filas.setdefault(inscripcion_id, {
+            'inscripcion_id': inscripcion_id,
+            'codigo': codigo,
+            'estudiante': f"{apellidos}, {nombres}",
+            'notas': {}
+        })
+        if evaluacion_id is None:
+            continue
+        evaluaciones.setdefault(evaluacion_id, {'id': evaluacion_id, 'nombre': nombre, 'tipo': tipo, 'peso': peso})
+        if nota is not None:
+            fila['notas'][evaluacion_id] = nota
+
+    return list(evaluaciones.values()), list(filas.values())
+
+
+def _convertir(texto):
+    """Decimal con dos decimales o None si no es una nota válida (0 a 20)"""
+    try:
+        nota = Decimal(texto.replace(',', '.'))
+        if not nota.is_finite():  # 'nan' e 'inf' son Decimal válidos, pero no notas
+            return None
+        nota = nota.quantize(CENTESIMOS)
+    except (InvalidOperation, ValueError):
+        return None
+    return nota if NOTA_MINIMA <= nota <= NOTA_MAXIMA else None
+
+
+def guardar_libreta(curso_id, celdas):
+    """
+    Guarda las celdas {(inscripcion_id, evaluacion_id): texto} que cambiaron.
+    Devuelve (celdas guardadas, lista de errores).
+    """
+    # Una lectura: celdas válidas del curso y si ya tienen nota
+    actuales = {
+        (inscripcion_id, evaluacion_id): (nota_id, nota)
+        for inscripcion_id, evaluacion_id, nota_id, nota in _matriz(
+            curso_id, Inscripcion.id, Evaluacion.id, Nota.id, Nota.nota
+        ).filter(Evaluacion.id.isnot(None))
+    }
+
+    hoy = date.today()
+    filas = []
+    errores = []
+    for clave, texto in celdas.items():
+        texto = (texto or '').strip()
+        if not texto:
+            continue
+        if clave not in actuales:
+            errores.append(f'Celda {clave[0]}/{clave[1]}: la inscripción o la evaluación no pertenecen al curso')
+            continue
+        nota = _convertir(texto)
+        if nota is None:
+            errores.append(f'Celda {clave[0]}/{clave[1]}: "{texto}" no es una nota entre {NOTA_MINIMA} y {NOTA_MAXIMA}')
+            continue
+        if actuales[clave][1] is not None and Decimal(actuales[clave][1]).quantize(CENTESIMOS) == nota:
+            continue
+        filas.append({'inscripcion_id': clave[0], 'evaluacion_id': clave[1], 'nota': nota, 'fecha_registro': hoy})
+
+    if filas:
+        # Un solo INSERT ... ON CONFLICT (inscripcion_id, evaluacion_id) DO UPDATE
+        upsert(Nota, filas,
+               claves=('inscripcion_id', 'evaluacion_id'),
+               actualizar=('nota', 'fecha_registro'))
+
+        conexion = db.session.connection()
+        incrementar_version(semestres_de_cursos([curso_id]), conexion)
+        nuevas = sum(1 for fila in filas if actuales[(fila['inscripcion_id'], fila['evaluacion_id'])][0] is None)
+        if nuevas:
+            aplicar_delta({(CLAVE_TOTAL, 'notas'): nuevas}, conexion)
+        anotar_escritura(db.session, *{f"{Nota.__tablename__}:{fila['evaluacion_id']}" for fila in filas})
+
+    return len(filas), errores
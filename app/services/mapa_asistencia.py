@@ -0,0 +1,256 @@
+# app/services/mapa_asistencia.py
+"""
+Mapa de bits de asistencia por inscripción (tabla mapas_asistencia).
+
+Cada inscripción guarda tres conjuntos de bits sobre los días desde
+fecha_base: días con registro (clases dictadas), presentes y justificados.
+Los porcentajes de una inscripción o de un estudiante salen de contar bits
+(int.bit_count) sobre unas pocas filas leídas por clave, sin agregar filas
+de asistencias: el factor de asistencia del riesgo, el reporte individual y
+el detalle de la inscripción los leen de aquí. La vista del semestre
+completo (asistencias.estadisticas) suma los totales semanales. Las rachas
+de ausencias (tabla rachas_ausencias) se guardan desde los mismos mapas.
+
+El mapa de una inscripción se recalcula desde sus asistencias en cada flush
+que las toca; las escrituras Core pasan por
+escrituras_asistencia.despues_de_escribir_asistencias. Para reparar todo,
+`flask reconstruir-mapas-asistencia`. Si un mapa aún no existe se calcula
+al vuelo al leerlo.
+"""
+from datetime import datetime, timedelta
+from itertools import chain
+
+from sqlalchemy import event, select, delete
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import MapaAsistencia, Asistencia, Inscripcion, Curso
+from app.services.upsert import upsert
+from app.services.historial import valores_de
+from app.services.rachas import guardar_rachas
+
+TAMANO_LOTE = 1000
+
+COLUMNAS_MAPA = (MapaAsistencia.fecha_base, MapaAsistencia.registrado,
+                 MapaAsistencia.presente, MapaAsistencia.justificado)
+
+
+def _a_bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def _de_bytes(datos):
+    return int.from_bytes(datos or b'', 'little')
+
+
+class Mapa:
+    __slots__ = ('fecha_base', 'registrado', 'presente', 'justificado')
+
+    def __init__(self, fecha_base=None, registrado=0, presente=0, justificado=0):
+        self.fecha_base = fecha_base
+        self.registrado = registrado
+        self.presente = presente
+        self.justificado = justificado
+
+    @classmethod
+    def desde_fila(cls, fila):
+        return cls(fila.fecha_base, _de_bytes(fila.registrado), _de_bytes(fila.presente), _de_bytes(fila.justificado))
+
+    def marcar(self, fecha, presente, justificado):
+        if self.fecha_base is None:
+            self.fecha_base = fecha
+        elif fecha < self.fecha_base:
+            # Fecha anterior a la base: se corre todo a la izquierda
+            corrimiento = (self.fecha_base - fecha).days
+            self.registrado <<= corrimiento
+            self.presente <<= corrimiento
+            self.justificado <<= corrimiento
+            self.fecha_base = fecha
+
+        bit = 1 << (fecha - self.fecha_base).days
+        self.registrado |= bit
+        if presente:
+            self.presente |= bit
+        if justificado:
+            self.justificado |= bit
+
+    @property
+    def total_clases(self):
+        return self.registrado.bit_count()
+
+    @property
+    def asistencias(self):
+        return (self.presente & self.registrado).bit_count()
+
+    @property
+    def justificadas(self):
+        return (self.justificado & self.registrado).bit_count()
+
+    @property
+    def porcentaje_asistencia(self):
+        return self.asistencias / self.total_clases * 100 if self.total_clases else 0
+
+    def rachas(self):
+        """(racha actual, racha máxima, inicio de la actual) de ausencias injustificadas, en clases"""
+        ausente = self.registrado & ~self.presente & ~self.justificado
+        actual = maxima = inicio = 0
+        pendientes = self.registrado
+        while pendientes:
+            bit = pendientes & -pendientes  # Siguiente clase registrada
+            if ausente & bit:
+                if not actual:
+                    inicio = bit.bit_length() - 1
+                actual += 1
+                maxima = max(maxima, actual)
+            else:
+                actual = 0
+            pendientes ^= bit
+        return actual, maxima, self.fecha_base + timedelta(days=inicio) if actual else None
+
+
+def totales(mapas):
+    """(total_clases, asistencias, justificadas) sumados sobre varios mapas"""
+    mapas = list(mapas)
+    return (
+        sum(m.total_clases for m in mapas),
+        sum(m.asistencias for m in mapas),
+        sum(m.justificadas for m in mapas),
+    )
+
+
+# ======================================
+# CÁLCULO Y LECTURA
+# ======================================
+
+def calcular_mapas(inscripcion_ids, conexion=None):
+    """Construye desde las asistencias los mapas de las inscripciones (una consulta)"""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return {}
+    conexion = conexion or db.session.connection()
+    mapas = {}
+    filas = conexion.execute(
+        select(Asistencia.inscripcion_id, Asistencia.fecha, Asistencia.presente, Asistencia.justificado)
+        .where(Asistencia.inscripcion_id.in_(ids))
+    )
+    for inscripcion_id, fecha, presente, justificado in filas:
+        mapas.setdefault(inscripcion_id, Mapa()).marcar(fecha, presente, justificado)
+    return mapas
+
+
+def _completar(mapas, ids):
+    """Calcula al vuelo los mapas que faltan; las inscripciones sin asistencias quedan vacías"""
+    faltantes = set(ids) - mapas.keys()
+    if faltantes:
+        mapas.update(calcular_mapas(faltantes))
+    for inscripcion_id in ids:
+        mapas.setdefault(inscripcion_id, Mapa())
+    return mapas
+
+
+def leer_mapas(inscripcion_ids):
+    """{inscripcion_id: Mapa} leídos de la tabla; los que faltan se calculan al vuelo"""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return {}
+    filas = db.session.execute(
+        select(MapaAsistencia.inscripcion_id, *COLUMNAS_MAPA).where(MapaAsistencia.inscripcion_id.in_(ids))
+    )
+    return _completar({fila.inscripcion_id: Mapa.desde_fila(fila) for fila in filas}, ids)
+
+
+def consulta_mapas_estudiante(estudiante_id, semestre):
+    """Inscripciones del estudiante en el semestre con su mapa (columnas en NULL si aún no existe)"""
+    return (
+        select(Inscripcion.id, Inscripcion.curso_id, *COLUMNAS_MAPA)
+        .select_from(Inscripcion)
+        .join(Curso, Curso.id == Inscripcion.curso_id)
+        .outerjoin(MapaAsistencia, MapaAsistencia.inscripcion_id == Inscripcion.id)
+        .where(Inscripcion.estudiante_id == estudiante_id, Curso.semestre == semestre)
+    )
+
+
+def _mapas_estudiante(estudiante_id, semestre):
+    """{inscripcion_id: (curso_id, Mapa)} del estudiante en el semestre"""
+    filas = db.session.execute(consulta_mapas_estudiante(estudiante_id, semestre)).all()
+    mapas = _completar(
+        {fila.id: Mapa.desde_fila(fila) for fila in filas if fila.fecha_base is not None},
+        [fila.id for fila in filas]
+    )
+    return {fila.id: (fila.curso_id, mapas[fila.id]) for fila in filas}
+
+
+def totales_estudiante(estudiante_id, semestre):
+    """(total_clases, asistencias, justificadas) del estudiante en el semestre"""
+    return totales(mapa for _, mapa in _mapas_estudiante(estudiante_id, semestre).values())
+
+
+def totales_por_curso(estudiante_id, semestre):
+    """{curso_id: (total_clases, asistencias, justificadas)} del estudiante en el semestre"""
+    por_curso = {}
+    for curso_id, mapa in _mapas_estudiante(estudiante_id, semestre).values():
+        por_curso.setdefault(curso_id, []).append(mapa)
+    return {curso_id: totales(mapas) for curso_id, mapas in por_curso.items()}
+
+
+# ======================================
+# MANTENIMIENTO
+# ======================================
+
+def actualizar_mapas(inscripcion_ids, conexion=None):
+    """Recalcula y guarda los mapas de las inscripciones indicadas. No hace commit."""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return
+    conexion = conexion or db.session.connection()
+    mapas = calcular_mapas(ids, conexion)
+
+    sin_asistencias = ids - mapas.keys()
+    if sin_asistencias:
+        conexion.execute(delete(MapaAsistencia).where(MapaAsistencia.inscripcion_id.in_(sin_asistencias)))
+
+    ahora = datetime.utcnow()
+    upsert(MapaAsistencia, [{
+        'inscripcion_id': inscripcion_id,
+        'fecha_base': mapa.fecha_base,
+        'registrado': _a_bytes(mapa.registrado),
+        'presente': _a_bytes(mapa.presente),
+        'justificado': _a_bytes(mapa.justificado),
+        'fecha_actualizacion': ahora,
+    } for inscripcion_id, mapa in mapas.items()],
+        claves=('inscripcion_id',),
+        actualizar=('fecha_base', 'registrado', 'presente', 'justificado', 'fecha_actualizacion'))
+
+    # Las rachas de ausencias salen de los mismos mapas
+    guardar_rachas(mapas, sin_asistencias, conexion)
+
+
+def reconstruir_mapas():
+    """Recalcula todos los mapas desde cero. No hace commit. Devuelve cuántos se guardaron."""
+    conexion = db.session.connection()
+    conexion.execute(delete(MapaAsistencia))
+    ids = list(conexion.execute(select(Asistencia.inscripcion_id).distinct()).scalars())
+    for inicio in range(0, len(ids), TAMANO_LOTE):
+        actualizar_mapas(ids[inicio:inicio + TAMANO_LOTE], conexion)
+    return len(ids)
+
+
+def _despues_de_flush(session, flush_context):
+    """Recalcula los mapas de las inscripciones cuyas asistencias cambiaron en este flush"""
+    ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Asistencia):
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+            ids |= valores_de(obj, 'inscripcion_id')
+        elif isinstance(obj, Inscripcion) and obj in session.deleted:
+            ids.add(obj.id)
+
+    if ids:
+        actualizar_mapas(ids, session.connection())
+
+
+def registrar_eventos_mapas():
+    """Registra el listener de mantenimiento (idempotente)"""
+    if not event.contains(Session, 'after_flush', _despues_de_flush):
+        event.listen(Session, 'after_flush', _despues_de_flush)
@@ -0,0 +1,159 @@
+# app/services/paginacion.py
+"""
+Paginación por cursor (keyset).
+
+En lugar de OFFSET, cada página continúa desde los valores de orden de la
+última fila vista: `WHERE (orden) > (valores del cursor) ORDER BY orden LIMIT n`.
+Así la página 1000 cuesta lo mismo que la primera. El orden debe terminar en
+una columna única (normalmente el id) para que el cursor sea exacto, y sus
+columnas no deben ser nulas (usar coalesce si lo son). Si el orden usa
+columnas de otras tablas, los joins deben ser explícitos (por relación).
+
+El total es opcional: exacto solo si se pide; si no, en PostgreSQL se usa la
+estimación del planificador (EXPLAIN), que no recorre la tabla.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+from app.extensions import db
+
+# Sustituto de fechas nulas en columnas de orden (coalesce)
+FECHA_MINIMA = date(1900, 1, 1)
+
+
+class PaginaKeyset:
+    def __init__(self, items, por_pagina, siguiente=None, anterior=None, total=None, total_exacto=False):
+        self.items = items
+        self.por_pagina = por_pagina
+        self.siguiente = siguiente
+        self.anterior = anterior
+        self.total = total
+        self.total_exacto = total_exacto
+
+    @property
+    def has_next(self):
+        return self.siguiente is not None
+
+    @property
+    def has_prev(self):
+        return self.anterior is not None
+
+
+# ======================================
+# CURSORES
+# ======================================
+
+def _a_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def _desde_json(valor, expresion):
+    if valor is None:
+        return None
+    try:
+        tipo = expresion.type.python_type
+    except NotImplementedError:
+        return valor
+    if tipo is datetime:
+        return datetime.fromisoformat(valor)
+    if tipo is date:
+        return date.fromisoformat(valor)
+    if tipo is Decimal:
+        return Decimal(valor)
+    return valor
+
+
+def codificar_cursor(direccion, valores):
+    contenido = json.dumps({'d': direccion, 'v': [_a_json(v) for v in valores]})
+    return base64.urlsafe_b64encode(contenido.encode('utf-8')).decode('ascii')
+
+
+def decodificar_cursor(cursor, orden):
+    """Devuelve (dirección, valores) o (None, None) si el cursor no es válido"""
+    try:
+        contenido = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        valores = contenido['v']
+        if contenido['d'] not in ('sig', 'ant') or len(valores) != len(orden):
+            return None, None
+        return contenido['d'], [_desde_json(v, expr) for v, (expr, _) in zip(valores, orden)]
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+# ======================================
+# CONSULTA
+# ======================================
+
+def _despues_de(orden, valores, hacia_atras=False):
+    """Condición 'fila posterior al cursor' para un orden con direcciones mixtas"""
+    condiciones = []
+    for i, (expresion, descendente) in enumerate(orden):
+        mayor = descendente == hacia_atras  # ascendente hacia delante => '>'
+        comparacion = expresion > valores[i] if mayor else expresion < valores[i]
+        iguales = [orden[j][0] == valores[j] for j in range(i)]
+        condiciones.append(and_(*iguales, comparacion))
+    return or_(*condiciones)
+
+
+def estimar_total(query):
+    """Filas estimadas por el planificador de PostgreSQL (None en otros motores)"""
+    conexion = db.session.connection()
+    if conexion.dialect.name != 'postgresql':
+        return None
+    compilada = query.statement.compile(dialect=conexion.dialect)
+    plan = conexion.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compilada}", compilada.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def paginar_keyset(query, orden, cursor=None, por_pagina=10, contar=False, total=None):
+    """
+    Pagina `query` según `orden`, una lista de (expresión, descendente) que
+    termina en una columna única. `contar=True` calcula el total exacto;
+    si el total ya se conoce (p. ej. de un agregado), pasarlo en `total`.
+    """
+    direccion, valores = decodificar_cursor(cursor, orden) if cursor else (None, None)
+    hacia_atras = direccion == 'ant'
+
+    if total is not None:
+        total_exacto = True
+    elif contar:
+        total, total_exacto = query.order_by(None).count(), True
+    else:
+        total, total_exacto = estimar_total(query.order_by(None)), False
+
+    paginada = query.add_columns(*[expresion for expresion, _ in orden])
+    if valores is not None:
+        paginada = paginada.filter(_despues_de(orden, valores, hacia_atras))
+
+    paginada = paginada.order_by(None).order_by(*[
+        (expresion.asc() if descendente == hacia_atras else expresion.desc())
+        for expresion, descendente in orden
+    ])
+
+    filas = paginada.limit(por_pagina + 1).all()
+    hay_mas = len(filas) > por_pagina
+    filas = filas[:por_pagina]
+    if hacia_atras:
+        filas.reverse()
+
+    items = [fila[0] for fila in filas]
+    claves = [tuple(fila[1:]) for fila in filas]
+
+    siguiente = anterior = None
+    if claves:
+        if hay_mas or hacia_atras:
+            siguiente = codificar_cursor('sig', claves[-1])
+        if (hay_mas and hacia_atras) or (direccion == 'sig'):
+            anterior = codificar_cursor('ant', claves[0])
+
+    return PaginaKeyset(items, por_pagina, siguiente, anterior, total, total_exacto)
@@ -0,0 +1,201 @@
+"""
+Renderizador PDF nativo (fpdf) para los reportes de riesgo.
+
+Construye el PDF directamente desde los diccionarios que devuelve
+ReportGenerator, sin HTML intermedio ni el binario externo wkhtmltopdf.
+"""
+from datetime import datetime
+from fpdf import FPDF
+
+COLORES_CATEGORIA = {
+    'ALERTA_ROJA': (220, 53, 69),
+    'ALERTA_AMARILLA': (255, 193, 7),
+    'SIN_RIESGO': (25, 135, 84),
+}
+
+
+def texto_pdf(valor):
+    """fpdf 1.7 solo admite latin-1: reemplaza los caracteres no soportados"""
+    if valor is None:
+        return ''
+    return str(valor).encode('latin-1', 'replace').decode('latin-1')
+
+
+class ReportePDF(FPDF):
+    def __init__(self, titulo, subtitulo=''):
+        super().__init__(orientation='P', unit='mm', format='A4')
+        self.titulo = titulo
+        self.subtitulo = subtitulo
+        self.set_margins(12, 12, 12)
+        self.set_auto_page_break(auto=True, margin=15)
+        self.alias_nb_pages()
+
+    def header(self):
+        self.set_font('Arial', 'B', 13)
+        self.cell(0, 7, texto_pdf('Sistema de Seguimiento Estudiantil'), 0, 1, 'C')
+        self.set_font('Arial', '', 11)
+        self.cell(0, 6, texto_pdf(self.titulo), 0, 1, 'C')
+        if self.subtitulo:
+            self.set_font('Arial', 'I', 9)
+            self.cell(0, 5, texto_pdf(self.subtitulo), 0, 1, 'C')
+        self.set_draw_color(44, 62, 80)
+        self.set_line_width(0.6)
+        self.line(12, self.get_y() + 1, 198, self.get_y() + 1)
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 8, texto_pdf(f'Página {self.page_no()}/{{nb}}'), 0, 0, 'R')
+
+    def titulo_seccion(self, texto):
+        self.ln(2)
+        self.set_font('Arial', 'B', 11)
+        self.set_fill_color(240, 240, 240)
+        self.cell(0, 7, texto_pdf(texto), 0, 1, 'L', True)
+        self.ln(1)
+
+    def par_clave_valor(self, clave, valor):
+        self.set_font('Arial', 'B', 9)
+        self.cell(45, 6, texto_pdf(clave), 1, 0, 'L')
+        self.set_font('Arial', '', 9)
+        self.cell(0, 6, texto_pdf(valor), 1, 1, 'L')
+
+    def tabla(self, encabezados, anchos, filas):
+        self.set_font('Arial', 'B', 8)
+        self.set_fill_color(230, 230, 230)
+        for encabezado, ancho in zip(encabezados, anchos):
+            self.cell(ancho, 6, texto_pdf(encabezado), 1, 0, 'C', True)
+        self.ln()
+
+        self.set_font('Arial', '', 8)
+        for fila in filas:
+            # Repetir encabezado al saltar de página
+            if self.get_y() > self.page_break_trigger - 6:
+                self.add_page()
+                self.set_font('Arial', 'B', 8)
+                for encabezado, ancho in zip(encabezados, anchos):
+                    self.cell(ancho, 6, texto_pdf(encabezado), 1, 0, 'C', True)
+                self.ln()
+                self.set_font('Arial', '', 8)
+            for valor, ancho in zip(fila, anchos):
+                self.cell(ancho, 6, texto_pdf(valor)[:int(ancho * 0.6)], 1, 0, 'L')
+            self.ln()
+
+    def insignia_categoria(self, categoria):
+        self.set_fill_color(*COLORES_CATEGORIA.get(categoria, (108, 117, 125)))
+        self.set_text_color(0 if categoria == 'ALERTA_AMARILLA' else 255)
+        self.set_font('Arial', 'B', 10)
+        self.cell(60, 8, texto_pdf((categoria or '').replace('_', ' ')), 0, 1, 'C', True)
+        self.set_text_color(0)
+
+    def a_bytes(self):
+        return self.output(dest='S').encode('latin-1')
+
+
+def renderizar_individual(resultado, semestre):
+    """PDF del reporte individual a partir de generar_reporte_riesgo_individual()"""
+    estudiante = resultado['estudiante']
+    seguimiento = resultado['seguimiento']
+
+    pdf = ReportePDF('Reporte Individual de Riesgo Académico',
+                     f'Semestre: {semestre} | Generado el: {datetime.now().strftime("%d/%m/%Y %H:%M")}')
+    pdf.add_page()
+
+    pdf.titulo_seccion('Datos del Estudiante')
+    pdf.par_clave_valor('Código', estudiante.codigo_estudiante)
+    pdf.par_clave_valor('Nombres', estudiante.nombres)
+    pdf.par_clave_valor('Apellidos', estudiante.apellidos)
+    pdf.par_clave_valor('Email', estudiante.email)
+    pdf.par_clave_valor('Teléfono', estudiante.telefono or 'No registrado')
+    pdf.par_clave_valor('Estado', 'Activo' if estudiante.activo else 'Inactivo')
+
+    pdf.titulo_seccion('Evaluación de Riesgo')
+    if seguimiento:
+        pdf.insignia_categoria(seguimiento.categoria_riesgo)
+        pdf.ln(1)
+        pdf.par_clave_valor('Puntaje', f'{float(seguimiento.puntaje_riesgo or 0):.2f}')
+        if seguimiento.fecha_evaluacion:
+            pdf.par_clave_valor('Fecha evaluación', seguimiento.fecha_evaluacion.strftime('%d/%m/%Y'))
+
+        if seguimiento.factores_riesgo:
+            pdf.ln(2)
+            pdf.tabla(
+                ['Factor', 'Valor', 'Peso', 'Contribución', 'Descripción'],
+                [40, 18, 15, 24, 89],
+                [
+                    [
+                        factor.get('nombre'),
+                        f"{factor.get('valor', 0):.3f}",
+                        f"{factor.get('peso', 0) * 100:.0f}%",
+                        f"{factor.get('valor', 0) * factor.get('peso', 0):.3f}",
+                        factor.get('descripcion'),
+                    ]
+                    for factor in seguimiento.factores_riesgo
+                ]
+            )
+    else:
+        pdf.set_font('Arial', '', 9)
+        pdf.multi_cell(0, 6, texto_pdf(
+            f'No se encontró evaluación de riesgo para este estudiante en el semestre {semestre}.'))
+
+    pdf.titulo_seccion('Rendimiento por Curso')
+    if resultado['datos_cursos']:
+        pdf.tabla(
+            ['Código', 'Curso', 'Promedio', 'Asistencia', 'Clases'],
+            [25, 85, 25, 30, 21],
+            [
+                [
+                    datos['curso'].codigo_curso,
+                    datos['curso'].nombre_curso,
+                    datos['promedio'] if isinstance(datos['promedio'], str) else f"{datos['promedio']:.1f}/20",
+                    f"{datos['asistencia']:.1f}%" if datos['total_clases'] > 0 else 'Sin registros',
+                    datos['total_clases'],
+                ]
+                for datos in resultado['datos_cursos']
+            ]
+        )
+    else:
+        pdf.set_font('Arial', '', 9)
+        pdf.multi_cell(0, 6, texto_pdf(
+            f'El estudiante no está inscrito en cursos para el semestre {semestre}.'))
+
+    return pdf.a_bytes()
+
+
+def renderizar_general(resultado, semestre, categoria_filtro=None):
+    """PDF del reporte general a partir de generar_reporte_riesgo_general()"""
+    estadisticas = resultado['estadisticas']
+    subtitulo = f'Semestre: {semestre}'
+    if categoria_filtro and categoria_filtro != 'TODOS':
+        subtitulo += f" | Filtro: {categoria_filtro.replace('_', ' ')}"
+    subtitulo += f' | Generado el: {datetime.now().strftime("%d/%m/%Y %H:%M")}'
+
+    pdf = ReportePDF('Reporte General de Riesgo Académico', subtitulo)
+    pdf.add_page()
+
+    pdf.titulo_seccion('Resumen Estadístico')
+    pdf.par_clave_valor('Total estudiantes', estadisticas['total_estudiantes'])
+    pdf.par_clave_valor('En el reporte', estadisticas['total_riesgo'])
+    pdf.par_clave_valor('Porcentaje', f"{estadisticas['porcentaje_riesgo']:.1f}%")
+    for categoria in ('SIN_RIESGO', 'ALERTA_AMARILLA', 'ALERTA_ROJA'):
+        pdf.par_clave_valor(categoria.replace('_', ' ').title(),
+                            estadisticas['categorias'].get(categoria, 0))
+
+    pdf.titulo_seccion('Listado de Estudiantes')
+    pdf.tabla(
+        ['Código', 'Estudiante', 'Categoría', 'Puntaje', 'Email'],
+        [22, 62, 32, 16, 54],
+        (
+            [
+                estudiante.codigo_estudiante,
+                f'{estudiante.nombres} {estudiante.apellidos}',
+                (seguimiento.categoria_riesgo or '').replace('_', ' '),
+                f'{float(seguimiento.puntaje_riesgo or 0):.2f}',
+                estudiante.email,
+            ]
+            for estudiante, seguimiento in resultado['estudiantes_riesgo']
+        )
+    )
+
+    return pdf.a_bytes()
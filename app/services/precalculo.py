@@ -0,0 +1,88 @@
+# app/services/precalculo.py
+"""
+Precálculo de reportes estándar fuera de horario.
+
+Genera el reporte general de riesgo de cada semestre para las categorías
+configuradas (PRECALCULO_CATEGORIAS) y lo guarda como Reporte del sistema.
+Cuando un usuario pide el mismo reporte, /reportes encuentra la copia por
+huella y versión de datos y la sirve sin volver a generarla.
+"""
+import logging
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.extensions import db
+from app.services.report_generator import ReportGenerator
+from app.services.version_datos import asegurar_version
+
+logger = logging.getLogger(__name__)
+
+
+def precalcular_reportes(semestres=None, categorias=None):
+    """
+    Genera los reportes que no tengan ya una copia vigente.
+    Debe llamarse dentro de un contexto de petición (url_for en las plantillas).
+    Devuelve una lista de (semestre, categoría, estado).
+    """
+    generator = ReportGenerator()
+    semestres = semestres or [generator.resolver_semestre()]
+    categorias = categorias or current_app.config.get('PRECALCULO_CATEGORIAS', ['TODOS'])
+    resumen = []
+
+    for semestre in semestres:
+        for categoria_filtro in categorias:
+            parametros = {"semestre": semestre, "categoria_filtro": categoria_filtro}
+            try:
+                version = asegurar_version(semestre)
+                if generator.buscar_reporte_vigente('GENERAL_RIESGO', parametros, version):
+                    db.session.commit()
+                    resumen.append((semestre, categoria_filtro, 'vigente'))
+                    continue
+
+                resultado = generator.generar_reporte_riesgo_general(semestre, categoria_filtro)
+                generator.registrar_reporte(
+                    'GENERAL_RIESGO', parametros, version,
+                    titulo=f'Reporte General de Riesgo - {semestre}',
+                    descripcion=f'Reporte general de riesgo académico (precalculado). Filtro: {categoria_filtro}',
+                    contenido=resultado['html'],
+                    usuario_id=None,
+                    generado_por_sistema=True
+                )
+                db.session.commit()
+                resumen.append((semestre, categoria_filtro, 'generado'))
+
+            except Exception as e:
+                db.session.rollback()
+                logger.exception(f"Precálculo {semestre}/{categoria_filtro}")
+                resumen.append((semestre, categoria_filtro, f'error: {e}'))
+
+    return resumen
+
+
+def segundos_hasta(hora, ahora=None):
+    """Segundos que faltan para la próxima ocurrencia de 'HH:MM'"""
+    ahora = ahora or datetime.now()
+    horas, minutos = (int(parte) for parte in hora.split(':'))
+    objetivo = ahora.replace(hour=horas, minute=minutos, second=0, microsecond=0)
+    if objetivo <= ahora:
+        objetivo += timedelta(days=1)
+    return (objetivo - ahora).total_seconds()
+
+
+def ejecutar_programado(app, hora=None, semestres=None):
+    """
+    Planificador mínimo: espera hasta la hora indicada, precalcula y repite
+    cada día. Pensado para un proceso aparte (no dentro de los workers web).
+    """
+    hora = hora or app.config.get('PRECALCULO_HORA', '02:00')
+    while True:
+        espera = segundos_hasta(hora)
+        logger.info(f"Próximo precálculo de reportes a las {hora} (en {espera / 3600:.1f} h)")
+        time.sleep(espera)
+
+        with app.test_request_context(base_url=app.config.get('URL_BASE')):
+            for semestre, categoria, estado in precalcular_reportes(semestres):
+                logger.info(f"Precálculo {semestre} {categoria}: {estado}")
+            db.session.remove()
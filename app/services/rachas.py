@@ -0,0 +1,147 @@
+# app/services/rachas.py
+"""
+Rachas de ausencias injustificadas por inscripción (tabla rachas_ausencias).
+
+Un estudiante que deja de venir de golpe mantiene un porcentaje de
+asistencia aceptable durante semanas; la racha actual lo detecta enseguida.
+Se calculan con una sola sentencia INSERT ... SELECT (huecos e islas con
+funciones de ventana): cada asistencia se numera dentro de su inscripción y
+dentro de su inscripción y estado; la diferencia identifica cada tramo
+consecutivo de ausencias o de asistencias.
+
+La racha actual es el tramo de ausencias que termina en la última clase
+registrada. Cada escritura de asistencias guarda las rachas de las
+inscripciones tocadas desde sus mapas de bits (guardar_rachas, llamado por
+mapa_asistencia.actualizar_mapas), así que las lecturas no refrescan nada.
+La sentencia de ventanas reconstruye la tabla con `flask refrescar-rachas`
+(carga inicial o reparación).
+"""
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, func, case, literal, and_
+
+from app.extensions import db
+from app.models import RachaAusencias, Asistencia, Inscripcion, Curso, Estudiante
+from app.services.upsert import upsert
+
+RACHA_ALERTA = 3
+
+
+def _inscripciones(semestre, estudiante_id=None):
+    consulta = select(Inscripcion.id).join(Curso, Curso.id == Inscripcion.curso_id).where(Curso.semestre == semestre)
+    if estudiante_id:
+        consulta = consulta.where(Inscripcion.estudiante_id == estudiante_id)
+    return consulta
+
+
+def refrescar_rachas(semestre=None):
+    """Recalcula las rachas del semestre (o de todas las inscripciones). No hace commit."""
+    db.session.flush()  # Las asistencias pendientes deben estar en la base antes del INSERT ... SELECT
+    conexion = db.session.connection()
+
+    borrar = delete(RachaAusencias)
+    if semestre:
+        borrar = borrar.where(RachaAusencias.inscripcion_id.in_(_inscripciones(semestre)))
+    conexion.execute(borrar)
+
+    ausente = case(
+        (and_(Asistencia.presente == False, Asistencia.justificado == False), 1), else_=0
+    ).label('ausente')
+
+    marcadas = select(
+        Asistencia.inscripcion_id,
+        Asistencia.fecha,
+        ausente,
+        (
+            func.row_number().over(partition_by=Asistencia.inscripcion_id, order_by=Asistencia.fecha)
+            - func.row_number().over(partition_by=(Asistencia.inscripcion_id, ausente), order_by=Asistencia.fecha)
+        ).label('tramo'),
+        func.max(Asistencia.fecha).over(partition_by=Asistencia.inscripcion_id).label('ultima')
+    )
+    if semestre:
+        marcadas = marcadas.where(Asistencia.inscripcion_id.in_(_inscripciones(semestre)))
+    marcadas = marcadas.subquery('marcadas')
+
+    # Un tramo por fila: largo, inicio y si llega hasta la última clase
+    tramos = select(
+        marcadas.c.inscripcion_id,
+        marcadas.c.ausente,
+        func.count().label('largo'),
+        func.min(marcadas.c.fecha).label('inicio'),
+        (func.max(marcadas.c.fecha) == func.max(marcadas.c.ultima)).label('es_ultimo')
+    ).group_by(marcadas.c.inscripcion_id, marcadas.c.tramo, marcadas.c.ausente).subquery('tramos')
+
+    actual = and_(tramos.c.ausente == 1, tramos.c.es_ultimo)
+    origen = select(
+        tramos.c.inscripcion_id,
+        func.coalesce(func.max(case((actual, tramos.c.largo))), 0),
+        func.coalesce(func.max(case((tramos.c.ausente == 1, tramos.c.largo))), 0),
+        func.max(case((actual, tramos.c.inicio))),
+        literal(datetime.utcnow())
+    ).group_by(tramos.c.inscripcion_id)
+
+    resultado = conexion.execute(
+        insert(RachaAusencias).from_select(
+            ['inscripcion_id', 'racha_actual', 'racha_maxima', 'inicio_racha', 'fecha_actualizacion'],
+            origen
+        )
+    )
+    return resultado.rowcount
+
+
+def guardar_rachas(mapas, sin_asistencias=(), conexion=None):
+    """
+    Guarda las rachas de {inscripcion_id: Mapa} recién recalculados y borra
+    las de inscripciones que se quedaron sin asistencias. No hace commit.
+    """
+    conexion = conexion or db.session.connection()
+    if sin_asistencias:
+        conexion.execute(delete(RachaAusencias).where(RachaAusencias.inscripcion_id.in_(sin_asistencias)))
+
+    ahora = datetime.utcnow()
+    filas = []
+    for inscripcion_id, mapa in mapas.items():
+        actual, maxima, inicio = mapa.rachas()
+        filas.append({
+            'inscripcion_id': inscripcion_id,
+            'racha_actual': actual,
+            'racha_maxima': maxima,
+            'inicio_racha': inicio,
+            'fecha_actualizacion': ahora,
+        })
+    upsert(RachaAusencias, filas,
+           claves=('inscripcion_id',),
+           actualizar=('racha_actual', 'racha_maxima', 'inicio_racha', 'fecha_actualizacion'))
+
+
+def consulta_racha_estudiante(estudiante_id, semestre):
+    """Racha actual más larga entre las inscripciones del estudiante en el semestre"""
+    return select(func.coalesce(func.max(RachaAusencias.racha_actual), 0)).where(
+        RachaAusencias.inscripcion_id.in_(_inscripciones(semestre, estudiante_id))
+    )
+
+
+def racha_actual_estudiante(estudiante_id, semestre):
+    return db.session.execute(consulta_racha_estudiante(estudiante_id, semestre)).scalar()
+
+
+def alertas_rachas(semestre, minimo=RACHA_ALERTA):
+    """Inscripciones del semestre con al menos `minimo` ausencias seguidas, de la racha más larga a la más corta"""
+    return db.session.query(
+        RachaAusencias.racha_actual,
+        RachaAusencias.racha_maxima,
+        RachaAusencias.inicio_racha,
+        RachaAusencias.fecha_actualizacion,
+        Estudiante.id.label('estudiante_id'),
+        Estudiante.codigo_estudiante,
+        Estudiante.nombres,
+        Estudiante.apellidos,
+        Curso.nombre_curso
+    ).join(
+        Inscripcion, Inscripcion.id == RachaAusencias.inscripcion_id
+    ).join(Inscripcion.curso).join(Inscripcion.estudiante).filter(
+        Curso.semestre == semestre,
+        RachaAusencias.racha_actual >= minimo
+    ).order_by(
+        RachaAusencias.racha_actual.desc(), Estudiante.apellidos, Curso.nombre_curso
+    ).all()
@@ -1,10 +1,17 @@
 import os
+import io
+import csv
 import json
 import tempfile
 from datetime import datetime
-from flask import render_template
-from app.models import Estudiante, SeguimientoRiesgo, Curso, Inscripcion, Nota, Asistencia
+from openpyxl import Workbook
+from flask import render_template, stream_template
+from sqlalchemy import or_
+from app.models import Estudiante, SeguimientoRiesgo, Curso, Inscripcion, Nota, Asistencia, Reporte
 from app.extensions import db
+from app.services.version_datos import huella_reporte
+from app.services.resumen import leer_resumen, categorias_de, CLAVE_TOTAL
+from app.services.mapa_asistencia import totales_por_curso
 
 
 class ReportGenerator:
@@ -16,13 +23,19 @@ class ReportGenerator:
         # Crear carpeta temporal para reportes
         self.reports_dir = tempfile.mkdtemp(prefix="reports_")
 
+    @staticmethod
+    def resolver_semestre(semestre=None):
+        """Semestre solicitado o, si viene vacío, el semestre actual"""
+        if not semestre:
+            from app.modules.admin.routes import obtener_semestre_actual
+            semestre = obtener_semestre_actual()
+        return semestre
+
     def generar_reporte_riesgo_individual(self, estudiante_id, semestre=None):
         """Genera reporte individual de riesgo para un estudiante"""
         estudiante = Estudiante.query.get_or_404(estudiante_id)
 
-        if not semestre:
-            from app.modules.admin.routes import obtener_semestre_actual
-            semestre = obtener_semestre_actual()
+        semestre = self.resolver_semestre(semestre)
 
         # Obtener seguimiento de riesgo más reciente
         seguimiento = SeguimientoRiesgo.query.filter_by(
@@ -37,6 +50,8 @@ class ReportGenerator:
         ).all()
 
         # Obtener notas y asistencias
+        asistencia_por_curso = totales_por_curso(estudiante_id, semestre) if cursos else {}
+
         datos_cursos = []
         for curso in cursos:
             # Promedio de notas del curso
@@ -47,18 +62,9 @@ class ReportGenerator:
                 Inscripcion.curso_id == curso.id
             ).scalar()
 
-            # Asistencia del curso
-            asistencia_query = db.session.query(
-                db.func.count(Asistencia.id),
-                db.func.sum(db.cast(Asistencia.presente, db.Integer))
-            ).join(Inscripcion).filter(
-                Inscripcion.estudiante_id == estudiante_id,
-                Inscripcion.curso_id == curso.id
-            ).first()
-
-            total_clases = asistencia_query[0] or 0
-            asistencias = asistencia_query[1] or 0
-            porcentaje_asistencia = (asistencias / total_clases * 100) if total_clases > 0 else 0
+            # Asistencia del curso (mapa de bits de la inscripción)
+            total_clases, asistencias, _ = asistencia_por_curso.get(curso.id, (0, 0, 0))
+            porcentaje_asistencia = asistencias / total_clases * 100 if total_clases else 0
 
             datos_cursos.append({
                 'curso': curso,
@@ -81,47 +87,24 @@ class ReportGenerator:
             'html': html_content,
             'estudiante': estudiante,
             'seguimiento': seguimiento,
-            'datos_cursos': datos_cursos
+            'datos_cursos': datos_cursos,
+            'semestre': semestre
         }
 
     def generar_reporte_riesgo_general(self, semestre=None, categoria_filtro=None):
         """Genera reporte general de riesgo para todos los estudiantes"""
-        if not semestre:
-            from app.modules.admin.routes import obtener_semestre_actual
-            semestre = obtener_semestre_actual()
+        semestre = self.resolver_semestre(semestre)
 
         # Obtener estudiantes en riesgo
-        query = db.session.query(Estudiante, SeguimientoRiesgo).join(
-            SeguimientoRiesgo, Estudiante.id == SeguimientoRiesgo.estudiante_id
-        ).filter(
-            SeguimientoRiesgo.semestre == semestre,
-            Estudiante.activo == True
+        query = self._filtrar_riesgo_general(
+            db.session.query(Estudiante, SeguimientoRiesgo),
+            semestre, categoria_filtro
         )
 
-        if categoria_filtro and categoria_filtro != 'TODOS':
-            query = query.filter(SeguimientoRiesgo.categoria_riesgo == categoria_filtro)
-
-        estudiantes_riesgo = query.order_by(
-            SeguimientoRiesgo.puntaje_riesgo.desc()
-        ).all()
+        estudiantes_riesgo = query.all()
 
         # Estadísticas
-        total_estudiantes = Estudiante.query.filter_by(activo=True).count()
-        total_riesgo = len(estudiantes_riesgo)
-
-        categorias_count = db.session.query(
-            SeguimientoRiesgo.categoria_riesgo,
-            db.func.count(SeguimientoRiesgo.id)
-        ).filter(
-            SeguimientoRiesgo.semestre == semestre
-        ).group_by(SeguimientoRiesgo.categoria_riesgo).all()
-
-        estadisticas = {
-            'total_estudiantes': total_estudiantes,
-            'total_riesgo': total_riesgo,
-            'porcentaje_riesgo': (total_riesgo / total_estudiantes * 100) if total_estudiantes > 0 else 0,
-            'categorias': dict(categorias_count)
-        }
+        estadisticas = self._estadisticas_riesgo_general(semestre, len(estudiantes_riesgo))
 
         html_content = render_template(
             'reportes/general_riesgo.html',
@@ -135,5 +118,171 @@ class ReportGenerator:
         return {
             'html': html_content,
             'estadisticas': estadisticas,
-            'estudiantes_riesgo': estudiantes_riesgo
+            'estudiantes_riesgo': estudiantes_riesgo,
+            'semestre': semestre
         }
+
+    def generar_reporte_riesgo_general_streaming(self, semestre=None, categoria_filtro=None):
+        """
+        Variante en streaming del reporte general: devuelve la plantilla como
+        iterable de fragmentos HTML. El listado se lee por lotes (yield_per)
+        mientras se envía, en lugar de cargarlo completo con .all().
+        """
+        semestre = self.resolver_semestre(semestre)
+
+        query = self._filtrar_riesgo_general(
+            db.session.query(Estudiante, SeguimientoRiesgo),
+            semestre, categoria_filtro
+        )
+
+        # El encabezado necesita el total antes del listado: COUNT en lugar de len()
+        estadisticas = self._estadisticas_riesgo_general(semestre, query.order_by(None).count())
+
+        return stream_template(
+            'reportes/general_riesgo.html',
+            estudiantes_riesgo=query.yield_per(500),
+            estadisticas=estadisticas,
+            semestre=semestre,
+            categoria_filtro=categoria_filtro,
+            fecha_generacion=datetime.now().strftime('%d/%m/%Y %H:%M')
+        )
+
+    def _estadisticas_riesgo_general(self, semestre, total_riesgo):
+        """Totales del encabezado del reporte general"""
+        resumen = leer_resumen(semestre)
+        total_estudiantes = resumen[CLAVE_TOTAL]['estudiantes_activos']
+        categorias_count = categorias_de(resumen[semestre])
+
+        return {
+            'total_estudiantes': total_estudiantes,
+            'total_riesgo': total_riesgo,
+            'porcentaje_riesgo': (total_riesgo / total_estudiantes * 100) if total_estudiantes > 0 else 0,
+            'categorias': dict(categorias_count)
+        }
+
+    # ======================================
+    # REUTILIZACIÓN DE REPORTES
+    # ======================================
+
+    def buscar_reporte_vigente(self, tipo_reporte, parametros, version, usuario_id=None):
+        """
+        Reporte ya generado con los mismos parámetros y la misma versión de
+        datos del semestre. Si existe, su contenido sigue siendo válido.
+        Solo se reutilizan los del propio usuario y los precalculados, que
+        cualquier usuario puede descargar.
+        """
+        return Reporte.query.filter(
+            Reporte.tipo_reporte == tipo_reporte,
+            Reporte.huella == huella_reporte(tipo_reporte, parametros),
+            Reporte.version_datos == version,
+            or_(Reporte.generado_por_sistema == True, Reporte.usuario_id == usuario_id)
+        ).order_by(Reporte.fecha_generacion.desc()).first()
+
+    def registrar_reporte(self, tipo_reporte, parametros, version, **campos):
+        """Crea el registro Reporte con su huella y versión de datos"""
+        reporte = Reporte(
+            tipo_reporte=tipo_reporte,
+            parametros=parametros,
+            semestre=parametros.get('semestre'),
+            huella=huella_reporte(tipo_reporte, parametros),
+            version_datos=version,
+            **campos
+        )
+        db.session.add(reporte)
+        return reporte
+
+    # ======================================
+    # EXPORTACIÓN DEL REPORTE GENERAL
+    # ======================================
+
+    COLUMNAS_EXPORTACION = [
+        'codigo_estudiante', 'nombres', 'apellidos', 'email', 'telefono',
+        'semestre', 'categoria_riesgo', 'puntaje_riesgo', 'fecha_evaluacion'
+    ]
+
+    def _filtrar_riesgo_general(self, query, semestre, categoria_filtro=None):
+        """Aplica join, filtros y orden del reporte general a una consulta"""
+        query = query.select_from(Estudiante).join(
+            SeguimientoRiesgo, Estudiante.id == SeguimientoRiesgo.estudiante_id
+        ).filter(
+            SeguimientoRiesgo.semestre == semestre,
+            Estudiante.activo == True
+        )
+
+        if categoria_filtro and categoria_filtro != 'TODOS':
+            query = query.filter(SeguimientoRiesgo.categoria_riesgo == categoria_filtro)
+
+        return query.order_by(SeguimientoRiesgo.puntaje_riesgo.desc())
+
+    def iterar_filas_riesgo_general(self, semestre=None, categoria_filtro=None, lote=500):
+        """
+        Recorre el reporte general fila por fila.
+        Se seleccionan solo columnas (sin objetos ORM) y se usa yield_per,
+        que en PostgreSQL abre un cursor del lado del servidor: la memoria
+        usada no depende del tamaño de la cohorte.
+        """
+        semestre = self.resolver_semestre(semestre)
+
+        query = self._filtrar_riesgo_general(
+            db.session.query(
+                Estudiante.codigo_estudiante,
+                Estudiante.nombres,
+                Estudiante.apellidos,
+                Estudiante.email,
+                Estudiante.telefono,
+                SeguimientoRiesgo.semestre,
+                SeguimientoRiesgo.categoria_riesgo,
+                SeguimientoRiesgo.puntaje_riesgo,
+                SeguimientoRiesgo.fecha_evaluacion
+            ),
+            semestre, categoria_filtro
+        ).yield_per(lote)
+
+        for fila in query:
+            yield [
+                fila.codigo_estudiante,
+                fila.nombres,
+                fila.apellidos,
+                fila.email,
+                fila.telefono or '',
+                fila.semestre,
+                fila.categoria_riesgo,
+                float(fila.puntaje_riesgo) if fila.puntaje_riesgo is not None else None,
+                fila.fecha_evaluacion.isoformat() if fila.fecha_evaluacion else ''
+            ]
+
+    def exportar_riesgo_general_csv(self, semestre=None, categoria_filtro=None, lote=500):
+        """Genera el CSV del reporte general por bloques (para respuestas en streaming)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        # BOM para que Excel reconozca UTF-8 (tildes y ñ)
+        buffer.write('\ufeff')
+        writer.writerow(self.COLUMNAS_EXPORTACION)
+
+        for i, fila in enumerate(self.iterar_filas_riesgo_general(semestre, categoria_filtro, lote), start=1):
+            writer.writerow(fila)
+            if i % lote == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        yield buffer.getvalue()
+
+    def exportar_riesgo_general_xlsx(self, semestre=None, categoria_filtro=None, lote=500):
+        """
+        Genera el XLSX del reporte general con openpyxl en modo write-only.
+        Las filas se vuelcan a disco a medida que se escriben; devuelve un
+        archivo temporal posicionado al inicio.
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet('Riesgo General')
+        ws.append(self.COLUMNAS_EXPORTACION)
+
+        for fila in self.iterar_filas_riesgo_general(semestre, categoria_filtro, lote):
+            ws.append(fila)
+
+        archivo = tempfile.TemporaryFile()
+        wb.save(archivo)
+        archivo.seek(0)
+        return archivo
@@ -0,0 +1,213 @@
+# app/services/resumen.py
+"""
+Resumen precalculado por semestre (tabla resumen_semestre).
+
+Guarda los totales que muestran el dashboard, la página de resultados de
+importación y el encabezado del reporte general: estudiantes y cursos
+activos, notas y estudiantes por categoría de riesgo. Se actualiza de forma
+incremental en cada flush que toca estudiantes, cursos, notas o
+seguimientos, así que leerlo es una consulta por clave primaria.
+
+La fila "TOTAL" acumula todos los semestres. Las escrituras masivas que no
+pasan por el ORM no se reflejan: para reparar, `flask reconstruir-resumen`.
+"""
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, select, update, insert, delete, func, inspect
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import ResumenSemestre, Estudiante, Curso, Nota, SeguimientoRiesgo
+
+CLAVE_TOTAL = 'TOTAL'
+
+COLUMNAS_CATEGORIA = {
+    'SIN_RIESGO': 'riesgo_sin_riesgo',
+    'ALERTA_AMARILLA': 'riesgo_alerta_amarilla',
+    'ALERTA_ROJA': 'riesgo_alerta_roja',
+}
+
+COLUMNAS = ['estudiantes_activos', 'cursos_activos', 'notas'] + list(COLUMNAS_CATEGORIA.values())
+
+
+# ======================================
+# CÁLCULO COMPLETO
+# ======================================
+
+def calcular_fila(clave, conexion=None):
+    """Calcula desde cero los totales de una clave (semestre o TOTAL)"""
+    conexion = conexion or db.session.connection()
+    fila = dict.fromkeys(COLUMNAS, 0)
+
+    cursos = select(func.count(Curso.id)).where(Curso.activo == True)
+    categorias = select(SeguimientoRiesgo.categoria_riesgo, func.count(SeguimientoRiesgo.id))
+
+    if clave == CLAVE_TOTAL:
+        fila['estudiantes_activos'] = conexion.execute(
+            select(func.count(Estudiante.id)).where(Estudiante.activo == True)
+        ).scalar()
+        fila['notas'] = conexion.execute(select(func.count(Nota.id))).scalar()
+    else:
+        cursos = cursos.where(Curso.semestre == clave)
+        categorias = categorias.where(SeguimientoRiesgo.semestre == clave)
+
+    fila['cursos_activos'] = conexion.execute(cursos).scalar()
+    for categoria, cantidad in conexion.execute(categorias.group_by(SeguimientoRiesgo.categoria_riesgo)):
+        if categoria in COLUMNAS_CATEGORIA:
+            fila[COLUMNAS_CATEGORIA[categoria]] = cantidad
+
+    return fila
+
+
+def reconstruir_resumen(conexion=None):
+    """Vuelve a calcular todas las filas del resumen. Devuelve las claves creadas."""
+    conexion = conexion or db.session.connection()
+
+    semestres = {
+        fila[0] for fila in chain(
+            conexion.execute(select(Curso.semestre).distinct()),
+            conexion.execute(select(SeguimientoRiesgo.semestre).distinct())
+        ) if fila[0]
+    }
+    claves = [CLAVE_TOTAL] + sorted(semestres)
+
+    ahora = datetime.utcnow()
+    conexion.execute(delete(ResumenSemestre))
+    for clave in claves:
+        conexion.execute(
+            insert(ResumenSemestre).values(clave=clave, fecha_actualizacion=ahora, **calcular_fila(clave, conexion))
+        )
+    return claves
+
+
+# ======================================
+# LECTURA
+# ======================================
+
+def leer_resumen(semestre=None):
+    """
+    Totales de la fila TOTAL y, si se indica, de la fila del semestre, en una
+    sola consulta. Devuelve {'TOTAL': {...}, semestre: {...}}. Si una fila aún
+    no existe (resumen sin construir) se calcula al vuelo.
+    """
+    claves = [CLAVE_TOTAL] + ([semestre] if semestre else [])
+    filas = db.session.execute(
+        select(ResumenSemestre).where(ResumenSemestre.clave.in_(claves))
+    ).scalars().all()
+
+    resumen = {fila.clave: {columna: getattr(fila, columna) for columna in COLUMNAS} for fila in filas}
+    for clave in claves:
+        if clave not in resumen:
+            resumen[clave] = calcular_fila(clave)
+    return resumen
+
+
+def categorias_de(fila):
+    """{'SIN_RIESGO': n, 'ALERTA_AMARILLA': n, 'ALERTA_ROJA': n} de una fila del resumen"""
+    return {categoria: fila[columna] for categoria, columna in COLUMNAS_CATEGORIA.items()}
+
+
+# ======================================
+# ACTUALIZACIÓN INCREMENTAL
+# ======================================
+
+def _aportes(obj, valores):
+    """Contadores (clave, columna) a los que suma un objeto con estos valores"""
+    if isinstance(obj, Estudiante):
+        return [(CLAVE_TOTAL, 'estudiantes_activos')] if valores['activo'] else []
+    if isinstance(obj, Curso):
+        return [(CLAVE_TOTAL, 'cursos_activos'), (valores['semestre'], 'cursos_activos')] if valores['activo'] else []
+    if isinstance(obj, Nota):
+        return [(CLAVE_TOTAL, 'notas')]
+    if isinstance(obj, SeguimientoRiesgo):
+        columna = COLUMNAS_CATEGORIA.get(valores['categoria_riesgo'])
+        return [(CLAVE_TOTAL, columna), (valores['semestre'], columna)] if columna else []
+    return []
+
+
+ATRIBUTOS = {
+    Estudiante: ('activo',),
+    Curso: ('activo', 'semestre'),
+    Nota: (),
+    SeguimientoRiesgo: ('categoria_riesgo', 'semestre'),
+}
+
+
+def _valores_antes_despues(obj, atributos):
+    """Valores de los atributos antes y después de este flush"""
+    estado = inspect(obj)
+    antes, despues = {}, {}
+    for atributo in atributos:
+        historial = estado.attrs[atributo].history
+        actual = (historial.added or historial.unchanged or [None])[0]
+        despues[atributo] = actual
+        antes[atributo] = historial.deleted[0] if historial.deleted else actual
+    return antes, despues
+
+
+def _despues_de_flush(session, flush_context):
+    """Aplica al resumen la diferencia que produce este flush"""
+    delta = Counter()
+
+    for conjunto, signo_antes, signo_despues in ((session.new, 0, 1),
+                                                 (session.dirty, 1, 1),
+                                                 (session.deleted, 1, 0)):
+        for obj in conjunto:
+            atributos = ATRIBUTOS.get(type(obj))
+            if atributos is None:
+                continue
+            if signo_antes and signo_despues and not session.is_modified(obj, include_collections=False):
+                continue
+
+            antes, despues = _valores_antes_despues(obj, atributos)
+            if signo_antes:
+                delta.subtract(_aportes(obj, antes))
+            if signo_despues:
+                delta.update(_aportes(obj, despues))
+
+    delta = {clave_columna: valor for clave_columna, valor in delta.items() if valor}
+    if delta:
+        aplicar_delta(delta, session.connection())
+
+
+def aplicar_delta(delta, conexion):
+    """Suma {(clave, columna): n} al resumen; las filas que faltan se calculan completas"""
+    ahora = datetime.utcnow()
+    por_clave = {}
+    for (clave, columna), valor in delta.items():
+        por_clave.setdefault(clave, {})[columna] = valor
+
+    for clave, columnas in por_clave.items():
+        resultado = conexion.execute(
+            update(ResumenSemestre)
+            .where(ResumenSemestre.clave == clave)
+            .values(fecha_actualizacion=ahora, **{
+                columna: getattr(ResumenSemestre, columna) + valor for columna, valor in columnas.items()
+            })
+        )
+        if resultado.rowcount == 0:
+            # El flush ya está en la base: el cálculo completo incluye este cambio
+            conexion.execute(
+                insert(ResumenSemestre).values(clave=clave, fecha_actualizacion=ahora, **calcular_fila(clave, conexion))
+            )
+
+
+def _al_asignar(objetivo, valor, anterior, iniciador):
+    """No hace nada: registrarlo con active_history basta"""
+
+
+def registrar_eventos_resumen():
+    """Registra el listener del resumen (idempotente)"""
+    if not event.contains(Session, 'after_flush', _despues_de_flush):
+        event.listen(Session, 'after_flush', _despues_de_flush)
+
+    # Con active_history el ORM carga el valor anterior aunque el atributo esté
+    # expirado (objeto leído antes de un commit): sin él, el historial no tendría
+    # "antes" y el delta se perdería
+    for modelo, atributos in ATRIBUTOS.items():
+        for atributo in atributos:
+            columna = getattr(modelo, atributo)
+            if not event.contains(columna, 'set', _al_asignar):
+                event.listen(columna, 'set', _al_asignar, active_history=True)
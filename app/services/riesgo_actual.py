@@ -0,0 +1,62 @@
+# app/services/riesgo_actual.py
+"""
+Riesgo actual: una fila por estudiante con su último seguimiento del
+semestre activo (tabla riesgo_actual).
+
+seguimiento_riesgo guarda el historial de todos los semestres; el listado
+de estudiantes en riesgo solo necesita el estado vigente. La proyección se
+reemplaza con una sola sentencia INSERT ... SELECT (row_number() para quedarse
+con el seguimiento más reciente de cada estudiante) al terminar un cálculo
+de riesgo del semestre activo o al cambiar de semestre activo. El índice
+(categoria_riesgo, puntaje_riesgo DESC, estudiante_id) sirve sin ordenar el
+listado filtrado por una categoría.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, insert, delete, func, literal
+
+from app.extensions import db
+from app.models import RiesgoActual, SeguimientoRiesgo
+
+CATEGORIAS_EN_RIESGO = ('ALERTA_ROJA', 'ALERTA_AMARILLA')
+
+
+def refrescar_riesgo_actual(semestre):
+    """Reemplaza la proyección con los seguimientos del semestre. No hace commit."""
+    db.session.flush()  # Los seguimientos pendientes deben estar en la base antes del INSERT ... SELECT
+    conexion = db.session.connection()
+    conexion.execute(delete(RiesgoActual))
+
+    ultimos = select(
+        SeguimientoRiesgo.estudiante_id,
+        SeguimientoRiesgo.id,
+        func.coalesce(SeguimientoRiesgo.categoria_riesgo, 'SIN_RIESGO').label('categoria_riesgo'),
+        func.coalesce(SeguimientoRiesgo.puntaje_riesgo, 0).label('puntaje_riesgo'),
+        SeguimientoRiesgo.fecha_evaluacion,
+        func.row_number().over(
+            partition_by=SeguimientoRiesgo.estudiante_id,
+            order_by=(SeguimientoRiesgo.fecha_evaluacion.desc(), SeguimientoRiesgo.id.desc())
+        ).label('orden')
+    ).where(SeguimientoRiesgo.semestre == semestre).subquery('ultimos')
+
+    resultado = conexion.execute(
+        insert(RiesgoActual).from_select(
+            ['estudiante_id', 'semestre', 'seguimiento_id', 'categoria_riesgo',
+             'puntaje_riesgo', 'fecha_evaluacion', 'fecha_actualizacion'],
+            select(
+                ultimos.c.estudiante_id,
+                literal(semestre),
+                ultimos.c.id,
+                ultimos.c.categoria_riesgo,
+                ultimos.c.puntaje_riesgo,
+                ultimos.c.fecha_evaluacion,
+                literal(datetime.utcnow())
+            ).where(ultimos.c.orden == 1)
+        )
+    )
+    return resultado.rowcount
+
+
+def semestre_proyectado():
+    """Semestre que contiene hoy la proyección (None si está vacía)"""
+    return db.session.execute(select(RiesgoActual.semestre).limit(1)).scalar()
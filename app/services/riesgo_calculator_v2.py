@@ -4,6 +4,8 @@ from datetime import datetime
 from typing import Dict, List
 from dataclasses import dataclass
 from sqlalchemy import text  # IMPORTANTE: Agregar esta importación
+from app.services.rachas import RACHA_ALERTA, racha_actual_estudiante
+from app.services.mapa_asistencia import totales_estudiante
 
 @dataclass
 class FactorRiesgo:
@@ -26,6 +28,7 @@ class CalculatorRiesgoIntrasemestral:
         self.peso_rendimiento = self.config.get('peso_rendimiento', 0.4)
         self.peso_asistencia = self.config.get('peso_asistencia', 0.3)
         self.peso_distribucion = self.config.get('peso_distribucion', 0.3)
+        self.racha_alerta = self.config.get('racha_ausencias_alerta', RACHA_ALERTA)
 
     def calcular_riesgo_estudiante(self, estudiante_id: int, semestre: str, db) -> Dict:
         """Calcula riesgo usando solo factores del semestre actual"""
@@ -149,32 +152,13 @@ class CalculatorRiesgoIntrasemestral:
 
     def _evaluar_asistencia_actual(self, estudiante_id: int, semestre: str, db) -> FactorRiesgo:
         """Evalúa asistencia del semestre actual"""
-        # CONSULTA CORREGIDA
-        query = text("""
-        SELECT 
-            COUNT(*) as total_clases,
-            SUM(CASE WHEN a.presente = TRUE THEN 1 ELSE 0 END) as asistencias,
-            SUM(CASE WHEN a.justificado = TRUE THEN 1 ELSE 0 END) as justificadas
-        FROM asistencias a
-        JOIN inscripciones i ON a.inscripcion_id = i.id
-        JOIN cursos c ON i.curso_id = c.id
-        WHERE i.estudiante_id = :estudiante_id AND c.semestre = :semestre
-        """)
-        
         try:
-            # EJECUCIÓN CORREGIDA
-            result = db.session.execute(query, {
-                'estudiante_id': estudiante_id, 
-                'semestre': semestre
-            }).fetchone()
+            # Conteo de bits de los mapas de asistencia del semestre, sin recorrer asistencias
+            total_clases, asistencias, justificadas = totales_estudiante(estudiante_id, semestre)
             
-            if not result or result.total_clases == 0:  # CORREGIDO: usar punto
+            if total_clases == 0:
                 return FactorRiesgo("Asistencia Actual", 0.2, self.peso_asistencia, 
                                   "Sin registros de asistencia")
-
-            total_clases = result.total_clases  # CORREGIDO: usar punto
-            asistencias = result.asistencias
-            justificadas = result.justificadas
             
             porcentaje_asistencia = (asistencias / total_clases) * 100
             
@@ -194,9 +178,17 @@ class CalculatorRiesgoIntrasemestral:
             else:
                 valor = 0.9
 
+            # Racha precalculada (rachas_ausencias): quien deja de venir de golpe aún puede tener buen porcentaje
+            racha_actual = racha_actual_estudiante(estudiante_id, semestre)
+            
+            if racha_actual >= self.racha_alerta:
+                valor = max(valor, 0.9)
+
             descripcion = f"Asistencia: {porcentaje_efectivo:.1f}% ({asistencias}/{total_clases} clases)"
             if justificadas > 0:
                 descripcion += f" | {justificadas} justificadas"
+            if racha_actual >= self.racha_alerta:
+                descripcion += f" | {racha_actual} ausencias seguidas"
 
             return FactorRiesgo("Asistencia Actual", valor, self.peso_asistencia, descripcion)
             
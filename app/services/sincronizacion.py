@@ -0,0 +1,120 @@
+# app/services/sincronizacion.py
+"""
+Sincronización por lotes de asistencias tomadas sin conexión.
+
+El cliente envía registros {clave, inscripcion_id, fecha, presente,
+justificado, observaciones}; `clave` es un identificador único generado por
+el cliente (p. ej. un UUID) que hace idempotente el reenvío: un registro
+cuya clave ya se procesó se responde como 'duplicado' y no se vuelve a
+aplicar (así un reintento tardío no pisa una corrección posterior).
+
+Los registros válidos se aplican con un único upsert. No hace commit.
+"""
+from datetime import date
+
+from sqlalchemy import insert, select
+
+from app.extensions import db
+from app.models import Asistencia, Inscripcion, SincronizacionAsistencia
+from app.services.upsert import upsert
+from app.services.escrituras_asistencia import despues_de_escribir_asistencias
+
+MAXIMO_REGISTROS = 1000
+LARGO_CLAVE = 64
+
+
+class LoteInvalido(ValueError):
+    pass
+
+
+def validar_registro(registro):
+    """Devuelve (fila para el upsert, None) o (None, mensaje de error)"""
+    if not isinstance(registro, dict):
+        return None, 'El registro debe ser un objeto'
+
+    inscripcion_id = registro.get('inscripcion_id')
+    if not isinstance(inscripcion_id, int) or isinstance(inscripcion_id, bool):
+        return None, 'inscripcion_id debe ser un entero'
+
+    try:
+        fecha = date.fromisoformat(registro.get('fecha') or '')
+    except (TypeError, ValueError):
+        return None, 'fecha debe tener el formato AAAA-MM-DD'
+
+    observaciones = registro.get('observaciones')
+    if observaciones is not None and not isinstance(observaciones, str):
+        return None, 'observaciones debe ser texto'
+
+    return {
+        'inscripcion_id': inscripcion_id,
+        'fecha': fecha,
+        'presente': bool(registro.get('presente', False)),
+        'justificado': bool(registro.get('justificado', False)),
+        'observaciones': (observaciones or '').strip()[:500] or None,
+    }, None
+
+
+def sincronizar_asistencias(registros, usuario_id):
+    """
+    Aplica un lote de registros y devuelve una lista de resultados en el
+    mismo orden: {'clave', 'estado': 'aplicado'|'duplicado'|'error', 'mensaje'?}.
+    """
+    if not isinstance(registros, list):
+        raise LoteInvalido('Se esperaba una lista "registros"')
+    if len(registros) > MAXIMO_REGISTROS:
+        raise LoteInvalido(f'Máximo {MAXIMO_REGISTROS} registros por lote')
+
+    claves = [r.get('clave') if isinstance(r, dict) else None for r in registros]
+    claves_validas = [c for c in claves if isinstance(c, str) and 0 < len(c) <= LARGO_CLAVE]
+
+    # Una consulta para las claves ya procesadas y otra para las inscripciones activas
+    ya_procesadas = set(db.session.execute(
+        select(SincronizacionAsistencia.clave).where(SincronizacionAsistencia.clave.in_(claves_validas))
+    ).scalars()) if claves_validas else set()
+
+    ids_pedidos = {r.get('inscripcion_id') for r in registros if isinstance(r, dict)}
+    ids_pedidos = {i for i in ids_pedidos if isinstance(i, int)}
+    inscripciones_activas = set(db.session.execute(
+        select(Inscripcion.id).where(Inscripcion.id.in_(ids_pedidos), Inscripcion.estado == 'ACTIVO')
+    ).scalars()) if ids_pedidos else set()
+
+    resultados = []
+    filas = {}          # (inscripcion_id, fecha) -> fila; el último registro del lote gana
+    nuevas_claves = []
+    vistas = set()
+
+    for registro, clave in zip(registros, claves):
+        if not isinstance(clave, str) or not 0 < len(clave) <= LARGO_CLAVE:
+            resultados.append({'clave': clave, 'estado': 'error',
+                               'mensaje': f'clave obligatoria (máximo {LARGO_CLAVE} caracteres)'})
+            continue
+        if clave in ya_procesadas or clave in vistas:
+            resultados.append({'clave': clave, 'estado': 'duplicado'})
+            continue
+
+        fila, error = validar_registro(registro)
+        if error is None and fila['inscripcion_id'] not in inscripciones_activas:
+            error = 'La inscripción no existe o no está activa'
+        if error:
+            resultados.append({'clave': clave, 'estado': 'error', 'mensaje': error})
+            continue
+
+        vistas.add(clave)
+        filas[(fila['inscripcion_id'], fila['fecha'])] = fila
+        nuevas_claves.append({
+            'clave': clave, 'usuario_id': usuario_id,
+            'inscripcion_id': fila['inscripcion_id'], 'fecha': fila['fecha']
+        })
+        resultados.append({'clave': clave, 'estado': 'aplicado'})
+
+    if filas:
+        conexion = db.session.connection()
+        conexion.execute(insert(SincronizacionAsistencia), nuevas_claves)
+        upsert(Asistencia, list(filas.values()),
+               claves=('inscripcion_id', 'fecha'),
+               actualizar=('presente', 'justificado', 'observaciones'))
+
+        # Sentencias Core: lo que harían los listeners del ORM
+        despues_de_escribir_asistencias([i for i, _ in filas], conexion)
+
+    return resultados
@@ -0,0 +1,34 @@
+# app/services/streaming.py
+"""
+Renderizado de plantillas en streaming.
+
+Jinja produce la página fragmento a fragmento; agrupamos esos fragmentos en
+bloques de unos KB para que el navegador reciba contenido desde el primer
+momento sin pagar una escritura de socket por cada etiqueta.
+"""
+from flask import stream_template, get_flashed_messages
+
+TAMANO_BLOQUE = 8 * 1024
+
+
+def agrupar_fragmentos(fragmentos, tamano=TAMANO_BLOQUE):
+    """Reagrupa un iterable de cadenas en bloques de aproximadamente `tamano` caracteres"""
+    bloque = []
+    acumulado = 0
+    for fragmento in fragmentos:
+        bloque.append(fragmento)
+        acumulado += len(fragmento)
+        if acumulado >= tamano:
+            yield ''.join(bloque)
+            bloque = []
+            acumulado = 0
+    if bloque:
+        yield ''.join(bloque)
+
+
+def renderizar_en_streaming(plantilla, **contexto):
+    """Equivalente a render_template, pero devuelve un iterable para una respuesta en streaming"""
+    # Los mensajes flash se sacan de la sesión ahora: cuando la plantilla los
+    # lea, las cabeceras (y la cookie de sesión) ya se habrán enviado.
+    get_flashed_messages(with_categories=True)
+    return agrupar_fragmentos(stream_template(plantilla, **contexto))
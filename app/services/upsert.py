@@ -0,0 +1,100 @@
+# app/services/upsert.py
+"""
+Inserción o actualización masiva en una sola sentencia.
+
+PostgreSQL y SQLite usan INSERT ... ON CONFLICT (claves) DO UPDATE, que
+requiere una restricción única sobre las claves (p. ej.
+uq_asistencia_inscripcion_fecha). En otros motores se leen las filas
+existentes en una consulta y se hace un INSERT y un UPDATE por lotes.
+
+Son sentencias Core: no pasan por los eventos del ORM. Quien llama debe
+anotar la escritura (ver anotar_escritura) y, si corresponde, incrementar
+la versión de datos.
+"""
+from sqlalchemy import insert, update, select, tuple_, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+_INSERTS_CON_CONFLICTO = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def upsert(modelo, filas, claves, actualizar):
+    """
+    Inserta `filas` (lista de dicts) en la tabla de `modelo`; si ya existe una
+    fila con las mismas `claves`, actualiza sus columnas `actualizar`.
+    Devuelve el número de filas procesadas.
+    """
+    if not filas:
+        return 0
+
+    tabla = modelo.__table__
+    conexion = db.session.connection()
+    insertar = _INSERTS_CON_CONFLICTO.get(conexion.dialect.name)
+
+    if insertar is not None:
+        sentencia = insertar(tabla)
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=[tabla.c[clave] for clave in claves],
+            set_={columna: sentencia.excluded[columna] for columna in actualizar}
+        )
+        conexion.execute(sentencia, filas)
+        return len(filas)
+
+    # Otros motores: una lectura de las claves existentes y dos sentencias por lotes
+    columnas_clave = [tabla.c[clave] for clave in claves]
+    existentes = {
+        tuple(fila) for fila in conexion.execute(
+            select(*columnas_clave).where(
+                tuple_(*columnas_clave).in_([tuple(f[clave] for clave in claves) for f in filas])
+            )
+        )
+    }
+    nuevas = [f for f in filas if tuple(f[clave] for clave in claves) not in existentes]
+    cambiadas = [f for f in filas if tuple(f[clave] for clave in claves) in existentes]
+
+    if nuevas:
+        conexion.execute(insert(tabla), nuevas)
+    if cambiadas:
+        conexion.execute(
+            update(tabla)
+            .where(*[tabla.c[clave] == bindparam(f'_{clave}') for clave in claves])
+            .values({columna: bindparam(f'_{columna}') for columna in actualizar}),
+            [{f'_{columna}': f[columna] for columna in (*claves, *actualizar)} for f in cambiadas]
+        )
+    return len(filas)
+
+
+def insertar_faltantes(modelo, filas, claves, conexion=None):
+    """
+    Inserta las `filas` cuyas `claves` aún no existen (INSERT ... ON CONFLICT
+    DO NOTHING): dos peticiones simultáneas no chocan por la clave única.
+    """
+    if not filas:
+        return
+
+    tabla = modelo.__table__
+    conexion = conexion or db.session.connection()
+    insertar = _INSERTS_CON_CONFLICTO.get(conexion.dialect.name)
+
+    if insertar is not None:
+        conexion.execute(
+            insertar(tabla).on_conflict_do_nothing(index_elements=[tabla.c[clave] for clave in claves]),
+            filas
+        )
+        return
+
+    columnas_clave = [tabla.c[clave] for clave in claves]
+    existentes = {
+        tuple(fila) for fila in conexion.execute(
+            select(*columnas_clave).where(
+                tuple_(*columnas_clave).in_([tuple(f[clave] for clave in claves) for f in filas])
+            )
+        )
+    }
+    nuevas = [f for f in filas if tuple(f[clave] for clave in claves) not in existentes]
+    if nuevas:
+        conexion.execute(insert(tabla), nuevas)
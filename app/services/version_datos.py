@@ -0,0 +1,159 @@
+# app/services/version_datos.py
+"""
+Versión de datos por semestre.
+
+Cada semestre tiene un contador en `versiones_datos` que se incrementa en la
+misma transacción en la que se escriben notas, asistencias, inscripciones,
+cursos o seguimientos de ese semestre. Los cambios en estudiantes afectan a
+todos los semestres. Sirve para saber, con una sola lectura por clave
+primaria, si algo derivado de un semestre (p. ej. un reporte) sigue vigente.
+"""
+import hashlib
+import json
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, select, update, func
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import (
+    VersionDatos, Estudiante, Curso, Inscripcion, Asistencia, Nota, SeguimientoRiesgo
+)
+from app.services.historial import valores_de
+from app.services.upsert import insertar_faltantes
+
+# Registro que recibe los cambios de todos los semestres cuando aún no hay ninguno
+CLAVE_GLOBAL = 'GLOBAL'
+
+
+def obtener_version(semestre):
+    """Versión actual de los datos del semestre (0 si nunca se escribió)"""
+    version = db.session.execute(
+        select(VersionDatos.version).where(VersionDatos.clave == semestre)
+    ).scalar()
+    return version or 0
+
+
+def obtener_version_global():
+    """
+    Versión de todos los datos: cualquier incremento de cualquier semestre la
+    cambia (las versiones solo crecen y las filas no se borran).
+    """
+    version = db.session.execute(select(func.sum(VersionDatos.version))).scalar()
+    return version or 0
+
+
+def _crear_versiones(semestres, conexion, ahora):
+    """Crea en 0 los registros que falten (sin chocar con otra petición que los cree a la vez)"""
+    insertar_faltantes(
+        VersionDatos,
+        [{'clave': semestre, 'version': 0, 'fecha_actualizacion': ahora} for semestre in semestres],
+        claves=('clave',),
+        conexion=conexion
+    )
+
+
+def asegurar_version(semestre):
+    """Devuelve la versión del semestre creando su registro si no existe"""
+    version = obtener_version(semestre)
+    if not version:
+        _crear_versiones([semestre], db.session.connection(), datetime.utcnow())
+    return version
+
+
+def incrementar_version(semestres=None, conexion=None):
+    """
+    Incrementa la versión de los semestres indicados.
+    Con semestres=None se incrementan todos los semestres registrados.
+    """
+    conexion = conexion or db.session.connection()
+    ahora = datetime.utcnow()
+
+    if semestres is None:
+        resultado = conexion.execute(
+            update(VersionDatos).values(version=VersionDatos.version + 1, fecha_actualizacion=ahora)
+        )
+        if resultado.rowcount == 0:
+            # Tabla vacía: sin una fila la versión global no cambiaría
+            incrementar_version([CLAVE_GLOBAL], conexion)
+        return
+
+    semestres = {s for s in semestres if s}
+    if not semestres:
+        return
+    _crear_versiones(semestres, conexion, ahora)
+    conexion.execute(
+        update(VersionDatos)
+        .where(VersionDatos.clave.in_(semestres))
+        .values(version=VersionDatos.version + 1, fecha_actualizacion=ahora)
+    )
+
+
+def semestres_de_inscripciones(inscripcion_ids, conexion=None):
+    """Semestres de los cursos de un conjunto de inscripciones (una consulta)"""
+    ids = {i for i in inscripcion_ids if i}
+    if not ids:
+        return set()
+    conexion = conexion or db.session.connection()
+    filas = conexion.execute(
+        select(Curso.semestre).distinct()
+        .join(Inscripcion, Inscripcion.curso_id == Curso.id)
+        .where(Inscripcion.id.in_(ids))
+    )
+    return {fila[0] for fila in filas}
+
+
+def semestres_de_cursos(curso_ids, conexion=None):
+    ids = {i for i in curso_ids if i}
+    if not ids:
+        return set()
+    conexion = conexion or db.session.connection()
+    filas = conexion.execute(select(Curso.semestre).distinct().where(Curso.id.in_(ids)))
+    return {fila[0] for fila in filas}
+
+
+def huella_reporte(tipo_reporte, parametros):
+    """Identificador estable de un reporte según su tipo y parámetros"""
+    contenido = json.dumps({'tipo': tipo_reporte, **parametros}, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _despues_de_flush(session, flush_context):
+    """Detecta qué semestres cambiaron en este flush e incrementa su versión"""
+    semestres = set()
+    inscripcion_ids = set()
+    curso_ids = set()
+    todos = False
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+
+        if isinstance(obj, Estudiante):
+            todos = True
+        elif isinstance(obj, SeguimientoRiesgo):
+            semestres |= valores_de(obj, 'semestre')
+        elif isinstance(obj, Curso):
+            semestres |= valores_de(obj, 'semestre')
+        elif isinstance(obj, Inscripcion):
+            curso_ids |= valores_de(obj, 'curso_id')
+        elif isinstance(obj, (Asistencia, Nota)):
+            inscripcion_ids |= valores_de(obj, 'inscripcion_id')
+
+    if not (todos or semestres or inscripcion_ids or curso_ids):
+        return
+
+    conexion = session.connection()
+    if todos:
+        incrementar_version(None, conexion)
+
+    semestres |= semestres_de_inscripciones(inscripcion_ids, conexion)
+    semestres |= semestres_de_cursos(curso_ids, conexion)
+    incrementar_version(semestres, conexion)
+
+
+def registrar_eventos_version():
+    """Registra el listener de versiones (idempotente)"""
+    if not event.contains(Session, 'after_flush', _despues_de_flush):
+        event.listen(Session, 'after_flush', _despues_de_flush)
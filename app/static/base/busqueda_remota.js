@@ -0,0 +1,43 @@
+// Búsqueda remota para <select data-busqueda-url="..."> (ver app/campos.py).
+// Añade un cuadro de texto sobre el select y carga las opciones desde el servidor.
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('select[data-busqueda-url]').forEach(function(select) {
+        const entrada = document.createElement('input');
+        entrada.type = 'search';
+        entrada.className = 'form-control form-control-sm mb-1';
+        entrada.placeholder = 'Escriba para buscar...';
+        entrada.autocomplete = 'off';
+        select.parentNode.insertBefore(entrada, select);
+
+        let temporizador = null;
+        let ultimaPeticion = 0;
+
+        entrada.addEventListener('input', function() {
+            clearTimeout(temporizador);
+            const termino = entrada.value.trim();
+            if (termino.length < 2) return;
+
+            temporizador = setTimeout(function() {
+                const peticion = ++ultimaPeticion;
+                const url = select.dataset.busquedaUrl + '?q=' + encodeURIComponent(termino);
+
+                fetch(url, { headers: { 'Accept': 'application/json' } })
+                    .then(function(respuesta) { return respuesta.json(); })
+                    .then(function(datos) {
+                        if (peticion !== ultimaPeticion) return;  // llegó una respuesta más reciente
+
+                        const seleccionado = select.value;
+                        select.innerHTML = '';
+                        datos.resultados.forEach(function(opcion) {
+                            const elemento = new Option(opcion.texto, opcion.id);
+                            elemento.selected = String(opcion.id) === seleccionado;
+                            select.appendChild(elemento);
+                        });
+                        if (!datos.resultados.length) {
+                            select.appendChild(new Option('Sin resultados', ''));
+                        }
+                    });
+            }, 250);
+        });
+    });
+});
@@ -0,0 +1,178 @@
+# benchmark_consultas.py
+"""
+Guarda los planes de ejecución de las consultas más frecuentes (cálculo de
+riesgo, reportes y listados) para comparar antes y después de los índices:
+  - PostgreSQL: EXPLAIN (ANALYZE, BUFFERS) y su "Execution Time"
+  - SQLite: EXPLAIN QUERY PLAN y el tiempo medido ejecutando la consulta
+
+Uso (la revisión 0003 agrega los índices; ver README):
+    flask db upgrade 0002_tablas_derivadas
+    python benchmark_consultas.py --etiqueta antes
+    flask db upgrade
+    python benchmark_consultas.py --etiqueta despues
+    python benchmark_consultas.py --comparar antes despues
+"""
+import sys
+import os
+import argparse
+import json
+import re
+import statistics
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text, func
+
+from app import create_app
+from app.extensions import db
+from app.models import Estudiante, Curso, Inscripcion, Asistencia, Nota, Evaluacion, SeguimientoRiesgo
+from app.services.report_generator import ReportGenerator
+from app.services.paginacion import FECHA_MINIMA
+from app.services.mapa_asistencia import consulta_mapas_estudiante
+from app.services.rachas import consulta_racha_estudiante
+
+DIRECTORIO = 'planes_consultas'
+
+# Misma consulta que CalculatorRiesgoIntrasemestral._evaluar_rendimiento_actual; el
+# factor de asistencia se mide con las consultas de sus servicios (mapas de bits y racha)
+SQL_RENDIMIENTO = """
+    SELECT c.nombre_curso, AVG(n.nota) as promedio_curso, COUNT(n.id) as evaluaciones
+    FROM cursos c
+    JOIN inscripciones i ON c.id = i.curso_id
+    LEFT JOIN notas n ON i.id = n.inscripcion_id
+    WHERE i.estudiante_id = :estudiante_id AND c.semestre = :semestre
+    GROUP BY c.id, c.nombre_curso
+"""
+
+
+def consultas(semestre, estudiante_id, curso_id, inscripcion_id):
+    """[(nombre, sentencia)] con las consultas a medir"""
+    parametros = {'estudiante_id': estudiante_id, 'semestre': semestre}
+    generador = ReportGenerator()
+
+    return [
+        ('riesgo_rendimiento', text(SQL_RENDIMIENTO).bindparams(**parametros)),
+        ('riesgo_asistencia', consulta_mapas_estudiante(estudiante_id, semestre)),
+        ('riesgo_racha_ausencias', consulta_racha_estudiante(estudiante_id, semestre)),
+        ('riesgo_ultimo_seguimiento', SeguimientoRiesgo.query.filter_by(
+            estudiante_id=estudiante_id, semestre=semestre
+        ).order_by(SeguimientoRiesgo.fecha_evaluacion.desc()).limit(1).statement),
+        ('reporte_general', generador._filtrar_riesgo_general(
+            db.session.query(Estudiante, SeguimientoRiesgo), semestre
+        ).statement),
+        ('reporte_alerta_roja', generador._filtrar_riesgo_general(
+            db.session.query(Estudiante, SeguimientoRiesgo), semestre, 'ALERTA_ROJA'
+        ).statement),
+        ('lista_asistencias', Asistencia.query.join(Asistencia.inscripcion)
+            .join(Inscripcion.estudiante).join(Inscripcion.curso)
+            .filter(Inscripcion.curso_id == curso_id)
+            .order_by(Asistencia.fecha.desc(), Curso.nombre_curso, Estudiante.apellidos, Asistencia.id)
+            .limit(11).statement),
+        ('lista_notas', Nota.query.join(Nota.inscripcion).join(Inscripcion.estudiante)
+            .join(Nota.evaluacion).join(Evaluacion.curso)
+            .filter(Inscripcion.curso_id == curso_id)
+            .order_by(func.coalesce(Nota.fecha_registro, FECHA_MINIMA).desc(), Nota.id.desc())
+            .limit(11).statement),
+        ('detalle_curso_inscripciones', Inscripcion.query.filter_by(curso_id=curso_id)
+            .join(Inscripcion.estudiante).order_by(Estudiante.apellidos).statement),
+        ('detalle_inscripcion_asistencias', Asistencia.query.filter_by(inscripcion_id=inscripcion_id)
+            .order_by(Asistencia.fecha.desc(), Asistencia.id.desc()).limit(21).statement),
+        ('cursos_del_semestre', Curso.query.filter_by(semestre=semestre)
+            .order_by(Curso.nombre_curso).statement),
+    ]
+
+
+def _compilar(sentencia, conexion):
+    compilada = sentencia.compile(dialect=conexion.dialect)
+    parametros = compilada.params
+    if compilada.positional:
+        parametros = tuple(parametros[nombre] for nombre in compilada.positiontup)
+    return str(compilada), parametros
+
+
+def medir_consulta(conexion, sentencia, repeticiones):
+    """Devuelve (plan en texto, tiempo en ms)"""
+    sql, parametros = _compilar(sentencia, conexion)
+
+    if conexion.dialect.name == 'postgresql':
+        filas = conexion.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", parametros).fetchall()
+        plan = '\n'.join(fila[0] for fila in filas)
+        tiempo = re.search(r'Execution Time: ([\d.]+) ms', plan)
+        return plan, float(tiempo.group(1)) if tiempo else None
+
+    filas = conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros).fetchall()
+    plan = '\n'.join(str(fila[-1]) for fila in filas)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conexion.exec_driver_sql(sql, parametros).fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return plan, statistics.median(tiempos)
+
+
+def capturar(etiqueta, semestre, repeticiones, directorio):
+    app = create_app()
+
+    with app.app_context():
+        semestre = ReportGenerator.resolver_semestre(semestre)
+        inscripcion = Inscripcion.query.join(Inscripcion.curso).filter(Curso.semestre == semestre).first()
+        if inscripcion is None:
+            print(f"No hay inscripciones en el semestre {semestre}")
+            return
+
+        destino = os.path.join(directorio, etiqueta)
+        os.makedirs(destino, exist_ok=True)
+        conexion = db.session.connection()
+        tiempos = {}
+
+        print(f"\n📊 Planes '{etiqueta}' ({conexion.dialect.name}, semestre {semestre})")
+        for nombre, sentencia in consultas(semestre, inscripcion.estudiante_id,
+                                          inscripcion.curso_id, inscripcion.id):
+            plan, tiempo = medir_consulta(conexion, sentencia, repeticiones)
+            tiempos[nombre] = tiempo
+            with open(os.path.join(destino, f'{nombre}.txt'), 'w', encoding='utf-8') as archivo:
+                archivo.write(plan + '\n')
+            secuencial = ' (scan secuencial)' if re.search(r'Seq Scan|SCAN \w+$', plan, re.M) else ''
+            print(f"  {nombre:<34} {tiempo:9.2f} ms{secuencial}")
+
+        with open(os.path.join(destino, 'tiempos.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(tiempos, archivo, indent=2)
+        print(f"\nPlanes guardados en {destino}/")
+
+
+def comparar(antes, despues, directorio):
+    def cargar(etiqueta):
+        with open(os.path.join(directorio, etiqueta, 'tiempos.json'), encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    tiempos_antes, tiempos_despues = cargar(antes), cargar(despues)
+    print(f"\n  {'consulta':<34} {antes:>10} {despues:>10}   mejora")
+    for nombre, anterior in tiempos_antes.items():
+        actual = tiempos_despues.get(nombre)
+        if anterior is None or actual is None:
+            continue
+        mejora = anterior / actual if actual else float('inf')
+        print(f"  {nombre:<34} {anterior:8.2f}ms {actual:8.2f}ms   x{mejora:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planes de ejecución de las consultas frecuentes')
+    parser.add_argument('--etiqueta', help='Nombre de la captura (p. ej. antes, despues)')
+    parser.add_argument('--comparar', nargs=2, metavar=('ANTES', 'DESPUES'))
+    parser.add_argument('--semestre', default=None)
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help='Ejecuciones por consulta en SQLite (se toma la mediana)')
+    parser.add_argument('--directorio', default=DIRECTORIO)
+    args = parser.parse_args()
+
+    if args.comparar:
+        comparar(*args.comparar, args.directorio)
+    elif args.etiqueta:
+        capturar(args.etiqueta, args.semestre, args.repeticiones, args.directorio)
+    else:
+        parser.error('indique --etiqueta o --comparar')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# benchmark_pdf.py
+"""
+Compara los motores PDF de los reportes de riesgo:
+  - wkhtmltopdf (pdfkit, proceso externo por reporte)
+  - fpdf (nativo, en proceso)
+
+Uso:
+    python benchmark_pdf.py --semestre 2025-1 --repeticiones 5
+"""
+import sys
+import os
+import argparse
+import statistics
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pdfkit
+from app import create_app
+from app.models import Estudiante
+from app.services.report_generator import ReportGenerator
+from app.services import pdf_nativo
+
+
+def medir(funcion, repeticiones):
+    """Devuelve (tiempos en ms, pico de memoria Python en KB, tamaño del PDF)"""
+    tiempos = []
+    tamano = 0
+    tracemalloc.start()
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        pdf_bytes = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+        tamano = len(pdf_bytes)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return tiempos, pico / 1024, tamano
+
+
+def memoria_hijos_kb():
+    """RSS máximo de los procesos hijos (wkhtmltopdf); solo en Unix"""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+def imprimir(nombre, tiempos, pico_kb, tamano, rss_hijos=None):
+    print(f"  {nombre:<12} media {statistics.mean(tiempos):8.1f} ms | "
+          f"p50 {statistics.median(tiempos):8.1f} ms | "
+          f"máx {max(tiempos):8.1f} ms | "
+          f"memoria Python {pico_kb:8.0f} KB | PDF {tamano / 1024:6.0f} KB"
+          + (f" | RSS wkhtmltopdf {rss_hijos} KB" if rss_hijos else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de motores PDF')
+    parser.add_argument('--semestre', default=None)
+    parser.add_argument('--categoria', default='TODOS')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--sin-wkhtmltopdf', action='store_true',
+                        help='Medir solo el motor nativo')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.test_request_context():
+        from app.modules.reportes.routes import get_pdf_config, PDF_OPCIONES
+
+        generator = ReportGenerator()
+        estudiante = Estudiante.query.filter_by(activo=True).first()
+
+        casos = [(
+            'General',
+            generator.generar_reporte_riesgo_general(args.semestre, args.categoria),
+            lambda r: pdf_nativo.renderizar_general(r, r['semestre'], args.categoria),
+        )]
+        if estudiante:
+            casos.append((
+                'Individual',
+                generator.generar_reporte_riesgo_individual(estudiante.id, args.semestre),
+                lambda r: pdf_nativo.renderizar_individual(r, r['semestre']),
+            ))
+
+        for nombre, resultado, nativo in casos:
+            print(f"\n📊 Reporte {nombre} ({args.repeticiones} repeticiones)")
+
+            imprimir('fpdf', *medir(lambda: nativo(resultado), args.repeticiones))
+
+            if not args.sin_wkhtmltopdf:
+                try:
+                    config = get_pdf_config()
+                    tiempos, pico, tamano = medir(
+                        lambda: pdfkit.from_string(resultado['html'], False,
+                                                   configuration=config, options=PDF_OPCIONES),
+                        args.repeticiones
+                    )
+                    imprimir('wkhtmltopdf', tiempos, pico, tamano, memoria_hijos_kb())
+                except (OSError, IOError) as e:
+                    print(f"  wkhtmltopdf no disponible: {e}")
+
+
+if __name__ == '__main__':
+    main()
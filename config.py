@@ -8,6 +8,22 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "default_secret")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Motor PDF de los reportes: "wkhtmltopdf" (pdfkit) o "fpdf" (nativo)
+    PDF_MOTOR = os.getenv("PDF_MOTOR", "wkhtmltopdf")
+    # Segundos que se guardan en memoria los agregados del dashboard (0 = sin caché)
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "60"))
+    # Cada cuántos segundos /dashboard/stream lee la versión de datos para ver cambios de otros procesos
+    SSE_INTERVALO = int(os.getenv("SSE_INTERVALO", "5"))
+    # Precálculo nocturno de reportes (flask precalcular-reportes)
+    PRECALCULO_CATEGORIAS = os.getenv("PRECALCULO_CATEGORIAS", "TODOS,ALERTA_ROJA,ALERTA_AMARILLA").split(",")
+    PRECALCULO_HORA = os.getenv("PRECALCULO_HORA", "02:00")
+    # URL pública usada al renderizar fuera de una petición (logos, enlaces absolutos)
+    URL_BASE = os.getenv("URL_BASE", "http://localhost:5000")
+    # Cargas perezosas durante el renderizado: "log", "raise" o "" (sin definir: "log" solo en debug)
+    GUARDIA_CARGAS_PEREZOSAS = os.getenv("GUARDIA_CARGAS_PEREZOSAS")
+    # Marcas de asistencia diferidas (/asistencias/api/marcar): archivo SQLite local y cada cuántos segundos se vacía
+    BUFFER_ASISTENCIAS_RUTA = os.getenv("BUFFER_ASISTENCIAS_RUTA")  # por defecto instance/buffer_asistencias.db
+    BUFFER_ASISTENCIAS_INTERVALO = int(os.getenv("BUFFER_ASISTENCIAS_INTERVALO", "3"))
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,130 @@
+"""indices y restricciones unicas
+
+Índices de las claves foráneas más consultadas y restricciones únicas:
+una inscripción por estudiante y curso, una asistencia por inscripción y
+fecha, una nota por inscripción y evaluación.
+
+Antes de crear las restricciones se eliminan los duplicados con las mismas
+reglas que `flask depurar-duplicados`: las inscripciones repetidas se
+fusionan en la más antigua y de las asistencias y notas repetidas queda la
+más reciente. Se hace con SQL sobre la conexión de la migración (sin los
+listeners del ORM), así que las tablas derivadas se reconstruyen después
+con los comandos de carga (ver README).
+
+Revision ID: 0003_indices_restricciones
+Revises: 0002_tablas_derivadas
+Create Date: 2026-10-19 20:05:40.701791
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_indices_restricciones'
+down_revision = '0002_tablas_derivadas'
+branch_labels = None
+depends_on = None
+
+# Tablas que apuntan a inscripciones: las filas de una inscripción fusionada pasan a la conservada
+REFERENCIAS_INSCRIPCION = ('asistencias', 'notas', 'sincronizaciones_asistencia')
+
+# Tablas derivadas por inscripción: se vuelven a calcular con los comandos de carga
+DERIVADAS_INSCRIPCION = ('mapas_asistencia', 'asistencia_semanal', 'rachas_ausencias')
+
+
+def _fusionar_inscripciones(conexion):
+    fusiones = [dict(fila._mapping) for fila in conexion.execute(sa.text("""
+        SELECT i.id AS sobrante, g.conservada
+        FROM inscripciones i
+        JOIN (
+            SELECT estudiante_id, curso_id, MIN(id) AS conservada
+            FROM inscripciones
+            GROUP BY estudiante_id, curso_id
+            HAVING COUNT(*) > 1
+        ) g ON g.estudiante_id = i.estudiante_id AND g.curso_id = i.curso_id
+        WHERE i.id <> g.conservada
+    """))]
+    if not fusiones:
+        return
+
+    for tabla in REFERENCIAS_INSCRIPCION:
+        conexion.execute(
+            sa.text(f"UPDATE {tabla} SET inscripcion_id = :conservada WHERE inscripcion_id = :sobrante"),
+            fusiones
+        )
+    for tabla in DERIVADAS_INSCRIPCION + ('inscripciones',):
+        columna = 'id' if tabla == 'inscripciones' else 'inscripcion_id'
+        conexion.execute(sa.text(f"DELETE FROM {tabla} WHERE {columna} = :sobrante"), fusiones)
+
+
+def _eliminar_repetidos(conexion, tabla, *columnas):
+    """Deja la fila de id mayor de cada grupo de `columnas`"""
+    conexion.execute(sa.text(f"""
+        DELETE FROM {tabla} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY {', '.join(columnas)} ORDER BY id DESC) AS orden
+                FROM {tabla}
+            ) numeradas
+            WHERE orden > 1
+        )
+    """))
+
+
+def upgrade():
+    conexion = op.get_bind()
+
+    # Primero las inscripciones: al fusionarlas pueden aparecer asistencias y notas repetidas
+    _fusionar_inscripciones(conexion)
+    _eliminar_repetidos(conexion, 'asistencias', 'inscripcion_id', 'fecha')
+    _eliminar_repetidos(conexion, 'notas', 'inscripcion_id', 'evaluacion_id')
+
+    # Los datos pudieron cambiar: invalida los ETag y reportes guardados
+    conexion.execute(sa.text("UPDATE versiones_datos SET version = version + 1"))
+
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.create_index('ix_asistencias_fecha', ['fecha'], unique=False)
+        batch_op.create_unique_constraint('uq_asistencia_inscripcion_fecha', ['inscripcion_id', 'fecha'])
+
+    with op.batch_alter_table('cursos', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cursos_semestre'), ['semestre'], unique=False)
+
+    with op.batch_alter_table('evaluaciones', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_evaluaciones_curso_id'), ['curso_id'], unique=False)
+
+    with op.batch_alter_table('inscripciones', schema=None) as batch_op:
+        batch_op.create_index('ix_inscripciones_curso_estado', ['curso_id', 'estado'], unique=False)
+        batch_op.create_unique_constraint('uq_inscripcion_estudiante_curso', ['estudiante_id', 'curso_id'])
+
+    with op.batch_alter_table('notas', schema=None) as batch_op:
+        batch_op.create_index('ix_notas_evaluacion', ['evaluacion_id'], unique=False)
+        batch_op.create_unique_constraint('uq_nota_inscripcion_evaluacion', ['inscripcion_id', 'evaluacion_id'])
+
+    with op.batch_alter_table('seguimiento_riesgo', schema=None) as batch_op:
+        batch_op.create_index('ix_seguimiento_estudiante_semestre', ['estudiante_id', 'semestre', 'fecha_evaluacion'], unique=False)
+        batch_op.create_index('ix_seguimiento_semestre_categoria', ['semestre', 'categoria_riesgo'], unique=False)
+
+
+def downgrade():
+    # Los duplicados eliminados no se restauran
+    with op.batch_alter_table('seguimiento_riesgo', schema=None) as batch_op:
+        batch_op.drop_index('ix_seguimiento_semestre_categoria')
+        batch_op.drop_index('ix_seguimiento_estudiante_semestre')
+
+    with op.batch_alter_table('notas', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_nota_inscripcion_evaluacion', type_='unique')
+        batch_op.drop_index('ix_notas_evaluacion')
+
+    with op.batch_alter_table('inscripciones', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_inscripcion_estudiante_curso', type_='unique')
+        batch_op.drop_index('ix_inscripciones_curso_estado')
+
+    with op.batch_alter_table('evaluaciones', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_evaluaciones_curso_id'))
+
+    with op.batch_alter_table('cursos', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cursos_semestre'))
+
+    with op.batch_alter_table('asistencias', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_asistencia_inscripcion_fecha', type_='unique')
+        batch_op.drop_index('ix_asistencias_fecha')